@@ -46,6 +46,11 @@ if not os.path.exists(MODEL_DIR):
 else:
     app.logger.info(f"Model directory contents: {os.listdir(MODEL_DIR)}")
 
+# Prétraitement partagé avec l'entraînement, nécessaire pour charger un ModeleXG. source/pretraitement.py est
+# la seule copie: installé comme module par setup.py (pip install -e . à la racine du dépôt), ou copié dans
+# l'image depuis le contexte de construction 'source' de docker-compose.yaml (COPY --from=source pretraitement.py .)
+from pretraitement import ModeleXG
+
 loaded_model = None
 
 
@@ -191,13 +196,16 @@ def predict():
     try:
         app.logger.info(f"Data received: {data}")
         if "columns" in data and "data" in data:
-            df = pd.DataFrame(data["data"], columns=data["columns"]).values
+            df = pd.DataFrame(data["data"], columns=data["columns"])
             app.logger.info(f"DataFrame created: {df}")
         else:
             app.logger.error("Invalid data format received")
             return jsonify({"error": "Invalid data format"}), 400
-        
-        prediction = loaded_model.predict_proba(df)[:, 1]
+
+        # Un ModeleXG reçoit les tirs bruts et applique lui-même le prétraitement ajusté à l'entraînement;
+        # les autres modèles attendent des colonnes déjà encodées
+        features = df if isinstance(loaded_model, ModeleXG) else df.values
+        prediction = loaded_model.predict_proba(features)[:, 1]
         app.logger.info(f"Prediction completed: {prediction}")
         prediction = prediction.ravel()
         return jsonify({"prediction": prediction.tolist()})
@@ -4,6 +4,10 @@ setup(
     name='ift6758',
     packages=find_packages(),
     # package_dir={'': 'src'},
+    # Le prétraitement des modèles est aussi installé comme module de premier niveau, sous le nom utilisé par les
+    # modèles sérialisés (ModeleXG): le service Flask l'importe ainsi sans en garder une copie
+    package_dir={'': 'source', 'source': 'source'},
+    py_modules=['pretraitement'],
     version='1.1.0',
     description='Sample project repo for IFT6758-2021',
     author='Khalida Ghanem, Oumnia Boudersa, Soumba Camara, Thalia Cantero',
@@ -20,6 +20,9 @@ import seaborn as sns
 import os
 import json
 import pandas as pd
+from stockage_matchs import lire_fichier_match, lister_fichiers_matchs
+from stockage_parquet import ecrire_dataset, charger_dataset
+from caracteristiques import decoder_situation
 
 
 
@@ -27,8 +30,7 @@ class NHLPlayByPlayExtractor:
     
     def __init__(self, json_file):
         # Charger le fichier JSON
-        with open(json_file, 'r', encoding='utf-8') as file:
-            self.data = json.load(file)
+        self.data = lire_fichier_match(json_file)
         
     
     def extract_events(self):
@@ -63,62 +65,14 @@ class NHLPlayByPlayExtractor:
                 
 
                 
-                # Extraire la situation du champ situationCode
-
-
-                # Extraction du situationCode et des informations pertinentes
+                # situationCode brut: emptyNet et strength sont décodés pour toutes les lignes à la fois dans clean_data
                 situation_code = play.get('situationCode', None)
 
-                if situation_code:
-                  away_goalie = situation_code[0]  # 1 ou 0 pour le gardien extérieur
-                  away_skaters = int(situation_code[1])  # Nombre de joueurs extérieurs
-                  home_skaters = int(situation_code[2])  # Nombre de joueurs à domicile
-                  home_goalie = situation_code[3]  # 1 ou 0 pour le gardien à domicile
-
-                # Calcul de empty_net
-                  if eventTeamId== self.data['awayTeam']['id']:
-                    # L'équipe qui effectue l'événement est l'équipe extérieure
-                    if home_goalie == '1':
-                       empty_net = 0  # Le gardien de l'équipe à domicile est dans son filet
-                    else:
-                       empty_net = 1  # Le gardien de l'équipe à domicile a quitté son filet
-                  elif eventTeamId == self.data['homeTeam']['id']:
-                      # L'équipe qui effectue l'événement est l'équipe à domicile
-                    if away_goalie == '1':
-                       empty_net = 0  # Le gardien de l'équipe extérieure est dans son filet
-                    else:
-                       empty_net = 1  # Le gardien de l'équipe extérieure a quitté son filet
-                  else:
-                      empty_net = None  # Cas non traité
-
-               # Calcul de strength
-                  if eventTeamId == self.data['awayTeam']['id']:
-                  # Équipe extérieure effectue l'événement
-                    if away_skaters > home_skaters:
-                      strength = "PP"  # Avantage numérique (power play) pour l'équipe extérieure
-                    elif away_skaters < home_skaters:
-                      strength = "SH"  # Désavantage numérique (short-handed) pour l'équipe extérieure
-                    else:
-                      strength = "EV"  # Forces égales
-                  elif eventTeamId == self.data['homeTeam']['id']:
-                 # Équipe à domicile effectue l'événement
-                    if home_skaters > away_skaters:
-                      strength = "PP"  # Avantage numérique pour l'équipe à domicile
-                    elif home_skaters < away_skaters:
-                       strength = "SH"  # Désavantage numérique pour l'équipe à domicile
-                    else:
-                      strength = "EV"  # Forces égales
-                  else:
-                    strength = None  # Cas non traité
-                else:
-                  empty_net = None
-                  strength = None
-
                 
                 # Ajouter les informations extraites à la liste des événements
                 events_list.append([
                     game_id, season, team_home_Id,team_home,team_away_Id, team_away, event_id,event_type, eventTeamId,event_team,zone_code, period,
-                    period_time, coordinate_x, coordinate_y, empty_net, strength
+                    period_time, coordinate_x, coordinate_y, situation_code, home_team_defending_side
                 ])
         
         
@@ -127,7 +81,7 @@ class NHLPlayByPlayExtractor:
         # Créer un DataFrame à partir de la liste des événements
         columns = [
             'gameId', 'season', 'teamHomeId', 'teamHome', 'teamAwayId','teamAway', 'event_id','eventType','eventTeamId','eventTeam', 'zoneCode',
-            'period', 'periodTime', 'coordinateX', 'coordinateY', 'emptyNet', 'strength'
+            'period', 'periodTime', 'coordinateX', 'coordinateY', 'situationCode', 'homeTeamDefendingSide'
         ] 
 
         return pd.DataFrame(events_list, columns=columns)
@@ -138,11 +92,10 @@ class NHLPlayByPlayExtractor:
     def clean_data(folder_path):
         all_events = []  # Liste pour stocker les événements de tous les fichiers
     
-        # Obtenir tous les fichiers JSON dans le répertoire
-        json_files = sorted(filter(lambda x: x.endswith('.json'), os.listdir(folder_path)))
+        # Obtenir tous les fichiers de matchs du répertoire (JSON, gzip, zstd ou archives par saison)
+        json_files = lister_fichiers_matchs(folder_path)
     
-        for filename in json_files:
-            file_path = os.path.join(folder_path, filename)
+        for file_path in json_files.values():
             print(f"Traitement du fichier : {file_path}")
         
             try:
@@ -156,6 +109,10 @@ class NHLPlayByPlayExtractor:
         # Combiner tous les DataFrames en un seul
         if all_events:
             final_df = pd.concat(all_events, ignore_index=True)
+            # Décodage vectorisé du situationCode (filet vide et forces du point de vue du tireur)
+            situation = decoder_situation(final_df['situationCode'], final_df['eventTeamId'],
+                                          final_df['teamHomeId'], final_df['teamAwayId'])
+            final_df[['emptyNet', 'strength']] = situation[['emptyNet', 'strength']]
             return final_df
         else:
             return pd.DataFrame()  # Retourner un DataFrame vide s'il n'y a pas d'événements
@@ -230,105 +187,17 @@ print(nans_per_column)
 # In[12]:
 
 
-import math
-import pandas as pd
-import numpy as np
-
-def calcul_distance_angle(df):
-   # Initialiser la liste des distances et le dictionnaire des côtés défensifs par période pour chaque ligne
-    distances = []
-    home_defending_side_period = {1: None, 2: None, 3: None}
-
-    # Boucler sur chaque ligne pour calculer les distances
-    for index, row in df.iterrows():
-        # Initialiser la distance à None pour chaque ligne
-        distance = None
-
-        # Extraire les informations pertinentes
-        x = row['coordinateX']
-        y = row['coordinateY']
-        event_team_id = row['eventTeamId']
-        home_team_id = row['teamHomeId']
-        defending_side = row.get('homeTeamDefendingSide', None)
-        zone_code = row.get('zoneCode', None)
-        period = row.get('period', None)
-        season = row.get('season', None)
-
-       # Initialiser la liste des distances et le dictionnaire des côtés défensifs par période
-    angles = []
-    home_defending_side_period = {1: None, 2: None, 3: None}
-    
-    # Boucler sur chaque ligne pour calculer les distances
-    
-    for index, row in df.iterrows():
-        # Initialiser la distance à None pour chaque ligne
-        angle = None
-
-        # Extraire les informations pertinentes
-        x = row['coordinateX']
-        y = row['coordinateY']
-        event_team_id = row['eventTeamId']
-        home_team_id = row['teamHomeId']
-        defending_side = row.get('homeTeamDefendingSide', None)
-        zone_code = row.get('zoneCode', None)
-        period = row.get('period', None)
-        season = row.get('season', None)
-
-        # Vérifier la saison et définir les conditions de calcul
-        if  zone_code is not None:
-            if event_team_id == home_team_id and period in home_defending_side_period:
-                if home_defending_side_period[period] is None:
-                    home_defending_side_period[period] = 'right' if x > 0 else 'left'
-        
-            if zone_code == "D":
-                if x > 0:
-                    distance = math.sqrt((x + 89)**2 + y**2)
-                    angle = np.arctan2(y,(x+89))
-                elif x < 0:
-                    distance = math.sqrt((89 - x)**2 + y**2)
-                    angle = np.arctan2(y,(89-x))
-            elif zone_code == "O":
-                if x > 0:
-                    distance = math.sqrt((89 - x)**2 + y**2)
-                    angle=np.arctan2(y,(89-x))
-                elif x < 0:
-                    distance = math.sqrt((x + 89)**2 + y**2)
-                    angle= np.arctan2(y,(x+89))
-            elif zone_code == "N" and period in home_defending_side_period: 
-                if event_team_id == home_team_id:
-                    if home_defending_side_period[period] == 'right':
-                        distance = math.sqrt((x + 89)**2 + y**2)
-                        angle= np.arctan2(y,(x+89))
-                    elif home_defending_side_period[period] == 'left':
-                        distance = math.sqrt((89 - x)**2 + y**2)
-                        angle= np.arctan2(y,(89-x))
-                else:
-                    if home_defending_side_period[period] == 'right':
-                        distance = math.sqrt((89 - x)**2 + y**2)
-                        angle= np.arctan2(y,(89-x))
-                    elif home_defending_side_period[period] == 'left':
-                        distance = math.sqrt((x + 89)**2 + y**2)
-                        angle= np.arctan2(y,(x+89))
-        
-        if angle is not None:
-            angle = round(np.rad2deg(angle), 4)
-
-        distances.append(distance)
-        angles.append(angle)
+# Calcul vectorisé (numpy) de la distance et de l'angle de chaque tir selon la zone et le côté défendu.
+# Le côté défendu par l'équipe à domicile est résolu une fois par match et par période (prolongations comprises),
+# d'après homeTeamDefendingSide, puis joint aux tirs.
+from caracteristiques import calcul_distance_angle, table_cote_defense
 
-    # Ajouter les distances calculées au DataFrame
-    df['distance'] = distances
-    df['distance_round'] = df['distance'].round(0)
-
-
-    # Ajouter les distances calculées au DataFrame
-    df['angle'] = angles
-    
-    return df
+cotes_defense = table_cote_defense(df2)
+print(cotes_defense.value_counts(dropna=False))
 
 
 # Calculer les distances pour toutes les saisons
-df2 = calcul_distance_angle(df2)
+df2 = calcul_distance_angle(df2, cotes_defense)
 
 # Afficher le DataFrame mis à jour
 print(df2.head())
@@ -479,6 +348,23 @@ train_data.to_csv('../data/Milestone2_data/Q2_train_data.csv')
 test_data.to_csv('../data/Milestone2_data/Q2_test_data.csv')
 df2.to_csv('../data/Milestone2_data/Q2_data.csv', index=False)  # Data comprenant aussi les angles et les distances
 
+# Même données en Parquet, partitionnées par saison et type de match, avec un schéma explicite
+ecrire_dataset(df2, '../data/parquet/Q2_data')
+
+
+# Les notebooks des modèles peuvent ne lire que les colonnes et les saisons utiles
+# (projection et filtre appliqués pendant la lecture des fichiers Parquet). Exemple, dans des variables à part:
+# les cellules suivantes continuent d'utiliser train_data et test_data (avec la colonne gameID en texte)
+
+# In[25]:
+
+
+train_parquet = charger_dataset('../data/parquet/Q2_data', ['gameId', 'distance', 'angle', 'isGoal', 'emptyNet'],
+                                saisons=range(2016, 2020))
+test_parquet = charger_dataset('../data/parquet/Q2_data', ['gameId', 'distance', 'angle', 'isGoal', 'emptyNet'],
+                               saisons=[2020])
+print(train_parquet.shape, test_parquet.shape)
+
 
 # In[25]:
 
@@ -617,8 +503,8 @@ plt.xlabel('Distance du filet (pieds)')
 plt.ylabel('Taux de but (buts / tirs)')
 plt.title("Taux de buts en fonction de la distance")
 plt.tight_layout()
+plt.savefig('../figures/Milestone_2/2-2a_goal_rate_dist.png')
 plt.show()
-plt.savefig('../figures/Milestone_2/2-2a_goal_rate_dist.png')  
 
 
 # In[44]:
@@ -637,8 +523,8 @@ plt.xlabel('Angle par rapport au filet (degrés)')
 plt.ylabel('Taux de but (buts / tirs)')
 plt.title("Taux de buts en fonction de l'angle du tir")
 plt.tight_layout()
+plt.savefig('../figures/Milestone_2/2-2b_goal_rate_angle.png')
 plt.show()
-plt.savefig('../figures/Milestone_2/2-2b_goal_rate_angle.png') 
 
 
 # Question 3:
@@ -19,16 +19,28 @@ import os
 import requests
 import json
 import time
+from stockage_matchs import match_existe, charger_match, enregistrer_match, supprimer_match
+from manifeste import ManifesteTelechargement, DELAI_ABSENT, ERREUR
+from calendrier import CalendrierNHL
+from session_http import creer_session, get_avec_relance, PolitiqueRelance, JournalTelechargement, HIT, MISS, ABSENT
 
 class NHLDataDownloader:
-    def __init__(self, base_dir):
+    def __init__(self, base_dir, taille_pool=10, politique=None, format_stockage='json'):
         """
         Initialise le répertoire où les données seront sauvegardées.
         :param base_dir: Chemin du répertoire local pour la sauvegarde des données
+        :param taille_pool: Nombre de connexions HTTP persistantes gardées ouvertes
+        :param politique: PolitiqueRelance appliquée aux réponses 429/5xx (par défaut PolitiqueRelance())
+        :param format_stockage: 'json' (indenté), 'gzip' ou 'zstd' (JSON compact compressé)
         """
         self.base_dir = base_dir
+        self.format_stockage = format_stockage
         if not os.path.exists(base_dir):
             os.makedirs(base_dir)
+        self.session = creer_session(taille_pool)
+        self.politique = politique if politique is not None else PolitiqueRelance()
+        self.journal = JournalTelechargement(base_dir)
+        self.manifeste = ManifesteTelechargement(base_dir)
 
     def download_game_data(self, game_id: str) -> dict:
      """
@@ -37,29 +49,56 @@ class NHLDataDownloader:
     :param game_id: L'identifiant unique du match (ex. '2020020001' pour le premier match de la saison 2020-21)
     :return: Un dictionnaire contenant les données du match, ou None en cas d'erreur
     """
-     file_path = os.path.join(self.base_dir, f"{game_id}.json")
-     if os.path.exists(file_path):
+     if match_existe(self.base_dir, game_id):
         print(f"Fichier {game_id}.json déjà existant dans le répertoire {self.base_dir}.")
-        with open(file_path, 'r', encoding='utf-8') as f:
-                game = json.load(f)
-                return game
+        self.journal.enregistrer(game_id, HIT)
+        game = charger_match(self.base_dir, game_id)
+        return game
+     elif self.journal.est_absent(game_id):
+        # Match connu comme inexistant (404) lors d'une exécution précédente
+        return None
      else:
         game_type = str(game_id)[4:6]
         game = None  # Initialisation de la variable 'game'
         if game_type == '02' or game_type == '03':
             url = f"https://api-web.nhle.com/v1/gamecenter/{str(game_id)}/play-by-play"
             try:
-                response = requests.get(url)
-                response.raise_for_status()  # Vérifie si la requête a réussi
-                game = response.json()
-                with open(os.path.join(self.base_dir, f"{game_id}.json"), 'w', encoding='utf-8') as f:
-                    json.dump(game, f, ensure_ascii=False, indent=4)
-                    f.close()
-                    print(f"Téléchargé et enregistré : {game_id}.json")
+                # Session persistante, relances 429/5xx avec attente exponentielle (Retry-After respecté)
+                resultat, game, status_code = get_avec_relance(self.session, url, self.politique, self.journal,
+                                                               game_id)
+                if resultat == MISS:
+                    # Écriture atomique, taille et empreinte conservées dans le manifeste
+                    enregistrer_match(self.base_dir, game_id, game, self.manifeste, 200, self.format_stockage)
+                    self.journal.enregistrer(game_id, MISS, 200)
+                    print(f"Téléchargé et enregistré : {game_id} ({self.format_stockage})")
+                else:
+                    # Un 404 est revérifié après un délai, un échec après toutes les tentatives à la reprise
+                    statut = ABSENT if resultat == ABSENT else ERREUR
+                    self.manifeste.enregistrer(game_id, statut, status_http=status_code)
+                    print(f"Aucune donnée pour le match {game_id} ({resultat})")
             except Exception as e:
                 print(f"Erreur de téléchargement du match {game_id}: {e}")
+                self.manifeste.enregistrer(game_id, ERREUR)
+                game = None
             time.sleep(1)  # Délai d'une seconde entre les requêtes
-        return game                        
+        return game
+
+    def reprendre(self, delai_absent=DELAI_ABSENT) -> int:
+     """
+    Mode vérification/reprise: compare les fichiers du répertoire au manifeste et télécharge de nouveau
+    uniquement les matchs manquants, corrompus (taille, empreinte ou JSON invalide), en erreur après toutes
+    les tentatives, ou absents (404) depuis plus de delai_absent secondes.
+    :param delai_absent: Âge en secondes à partir duquel un match absent est redemandé (None: jamais)
+    :return: Nombre de matchs téléchargés de nouveau avec succès
+    """
+     retelecharges = 0
+     for game_id in self.manifeste.verifier(delai_absent):
+        supprimer_match(self.base_dir, game_id)
+        self.journal.oublier_absent(game_id)
+        if self.download_game_data(game_id) is not None:
+            retelecharges += 1
+     print(f"Reprise terminée : {retelecharges} match(s) téléchargé(s) de nouveau dans {self.base_dir}")
+     return retelecharges                        
 
 
 # ##### Exemple de téléchargement d'un fichier existent et d'un fichier non-existent
@@ -85,43 +124,30 @@ downloader.download_game_data(2016020002)
 # Utilisation de la classe
 downloader = NHLDataDownloader(base_dir='../data/nhl_reguliere')
 
-def download_all_seasons(downloader, start_year, end_year):    
+def download_all_seasons(downloader, start_year, end_year, calendrier=None):    
     # Cette partie a seulement relation avec la saison régulière (type 2) 
     """
     Télécharge les données pour des saisons de la LNH.
+    Les IDs des matchs proviennent du calendrier de l'API (mis en cache localement) plutôt que
+    d'un nombre de matchs codé en dur par saison.
     :param downloader: Une instance de la classe NHLDataDownloader
-    :param year: Année de début de la saison (ex. '2020')
-    :param no_of_games: Nombre de matchs à télécharger pour la saison régulière (ex. 1271)
-    :param game_type: '02' pour la saison régulière
+    :param start_year: Année de début de la première saison (ex. 2016)
+    :param end_year: Année de début de la dernière saison (ex. 2023)
+    :param calendrier: Une instance de CalendrierNHL (par défaut CalendrierNHL())
     """
+    calendrier = calendrier if calendrier is not None else CalendrierNHL()
 
     for year in range(start_year, end_year + 1):
         year_str = str(year)
         downloaded_count = 0
-        
-        # Définir le nombre de matchs en fonction de l'année
-        if year_str == '2016':
-            no_of_games = 1231  # 1230 matches in 2016
-        elif year_str == '2020':
-            no_of_games = 869  # 868 matches in 2020 because of covid
-        elif year_str in ['2017', '2018', '2019']:
-            no_of_games = 1272  # Matches normaux pour ces années
-        else:
-            no_of_games = 1354  # Pour les années 2021 et après (32 équipes)
-
-        #print(f"Téléchargement des données de la saison {year_str} pour {no_of_games} matchs.")
-
-        # Boucler sur les IDs de match pour télécharger les données de la saison régulière (type 02)
-        for game_number in range(1, no_of_games + 1):
-            game_id = f"{year_str}02{str(game_number).zfill(4)}"  # Format de l'ID de jeu
+
+        # Boucler sur les IDs de match valides de la saison régulière (type 02)
+        for game_id in calendrier.ids_saison(year)['02']:
             game_data = downloader.download_game_data(game_id=game_id)
 
             #Vérifier le contenu des données téléchargées
             if game_data:
                 downloaded_count += 1
-                #print(f"Données pour le game_id {game_id} téléchargées avec succès.")
-            #else:
-                #print(f"Aucune donnée disponible pour le game_id {game_id}.")
         print(f"Total de fichiers téléchargés pour la saison {year_str}: {downloaded_count}")
 
 
@@ -140,37 +166,26 @@ download_all_seasons(downloader, start_year=2016, end_year=2023)
 # Utilisation de la classe
 downloader = NHLDataDownloader(base_dir='../data/nhl_playoffs')
 
-def download_playoffs_data(downloader,start_year, end_year) -> None:
+def download_playoffs_data(downloader,start_year, end_year, calendrier=None) -> None:
     """
         Fonction utilisant des appels REST calls pour télécharger les données des playoffs des saisons allant de start_year à end_year. Sauvegarde le résultat json dans le path 
         défini dans la classe NHLDataDownloader
         :param start_year: année de début de la liste écrite en 4-digits.
         :param end_year: année de fin de la liste écrite en 4-digits.
+        :param calendrier: Une instance de CalendrierNHL (par défaut CalendrierNHL())
         :return: None
 
         """
-    #Premier tour des playoffs (1/8 de finale) : 0301
-    #Deuxième tour (quarts de finale) : 0302
-    #Troisième tour (demi-finales) : 0303
-    #Finale : 0304
-       
+    # Seuls les matchs de playoffs réellement au calendrier sont demandés, au lieu des
+    # 8x7 + 4x7 + 2x7 + 7 IDs possibles (0301 à 0304) dont la plupart n'existent pas.
+    calendrier = calendrier if calendrier is not None else CalendrierNHL()
+
     for year in range(start_year, end_year + 1):
         year_str = str(year)
         print(f"Téléchargement des données des playoffs pour la saison {year_str}")
 
-        # Générer les IDs des matchs de playoffs
-        playoffs = []
-        # Huitièmes de finale
-        playoffs.extend([f"{year_str}0301{str(matchup)}{game_number}" for matchup in range(1, 9) for game_number in range(1, 8)])
-        # Quarts de finale
-        playoffs.extend([f"{year_str}0302{str(matchup)}{game_number}" for matchup in range(1, 5) for game_number in range(1, 8)])   
-        # Demi-finales
-        playoffs.extend([f"{year_str}0303{str(matchup)}{game_number}" for matchup in range(1, 3) for game_number in range(1, 8)])   
-        # Finales
-        playoffs.extend([f"{year_str}0304{str(1)}{game_number}" for game_number in range(1, 8)])        
-        
         # Télécharger chaque match de playoffs
-        for game_id in playoffs:
+        for game_id in calendrier.ids_saison(year)['03']:
             game_data = downloader.download_game_data(game_id=game_id)
             # Vérifier le contenu des données téléchargées
             if game_data:
@@ -182,42 +197,69 @@ def download_playoffs_data(downloader,start_year, end_year) -> None:
 download_playoffs_data(downloader, start_year=2016, end_year=2023)
 
 
+# #### Vérification et reprise
+# Chaque répertoire contient un manifeste (_manifeste.sqlite) avec le statut, la taille, l'empreinte SHA-256,
+# l'horodatage et le code HTTP de chaque match. _reprendre()_ ne télécharge de nouveau que les fichiers
+# manquants ou corrompus (ex. écriture interrompue avant l'ajout des écritures atomiques), les matchs en erreur
+# après toutes les tentatives (5xx, délai dépassé) et les matchs absents (404) depuis plus d'un jour.
+
+# In[ ]:
+
+
+NHLDataDownloader(base_dir='../data/nhl_reguliere').reprendre()
+NHLDataDownloader(base_dir='../data/nhl_playoffs').reprendre()
+
+
+# #### Mode asynchrone
+# Les deux fonctions précédentes téléchargent un match à la fois avec une pause fixe d'une seconde.
+# _AsyncNHLDataDownloader_ garde plusieurs requêtes en vol derrière un limiteur de débit (TokenBucket) partagé,
+# en réutilisant le même cache disque et le même nommage _{game_id}.json_.
+
+# In[ ]:
+
+
+from telechargement_async import AsyncNHLDataDownloader, download_all_seasons_async, download_playoffs_data_async
+
+downloader_async = AsyncNHLDataDownloader(base_dir='../data/nhl_reguliere', concurrence=8, requetes_par_seconde=5)
+download_all_seasons_async(downloader_async, start_year=2016, end_year=2023)
+
+downloader_async = AsyncNHLDataDownloader(base_dir='../data/nhl_playoffs', concurrence=8, requetes_par_seconde=5)
+download_playoffs_data_async(downloader_async, start_year=2016, end_year=2023)
+
+
+# #### Stockage compact
+# _format_stockage='gzip'_ (ou _'zstd'_ si le paquet _zstandard_ est installé) écrit du JSON compact compressé au lieu
+# du JSON indenté. Les répertoires existants peuvent être convertis, un fichier par match ou une archive par saison
+# et type de match (_201602.zip_, _201603.zip_).
+# Tous les lecteurs (_NHLPlayByPlayExtractor_, _extract_player_names_, _read_files_json_) lisent les deux formats.
+
+# In[ ]:
+
+
+from stockage_matchs import convertir_repertoire
+
+convertir_repertoire('../data/nhl_reguliere', '../data/nhl_reguliere_gz', format_stockage='gzip')
+convertir_repertoire('../data/nhl_playoffs', '../data/nhl_playoffs_saisons', par_saison=True)
+
+
 # ### 3. Fusion des deux repertoires
 # _data/nhl_reguliere_ et _data/nhl_playoffs_ dans _data/nhl_data_
+# 
+# Aucun fichier n'est copié: _data/nhl_data_ ne contient que des liens physiques vers les fichiers des deux
+# répertoires sources. Relancer la cellule ne lie que les matchs ajoutés (ou téléchargés de nouveau) depuis la
+# dernière synchronisation. Les lecteurs acceptent aussi directement une liste de répertoires,
+# ex. _lister_fichiers_matchs(['../data/nhl_reguliere', '../data/nhl_playoffs'])_.
 
 # In[4]:
 
 
-import os
-import shutil
+from stockage_matchs import synchroniser_depot
 
 # Define the paths to your folders
 reguliere_folder = '../data/nhl_reguliere'
 playoffs_folder = '../data/nhl_playoffs'
 destination_folder ='../data/nhl_data'
 
-# Create the destination folder if it doesn't exist
-if not os.path.exists(destination_folder):
-    os.makedirs(destination_folder)
-
-# Function to copy files from a source folder to the destination folder
-def copy_files(source_folder, destination_folder):
-    # Loop through all files in the source folder
-    for filename in os.listdir(source_folder):
-            source_file = os.path.join(source_folder, filename)
-            destination_file = os.path.join(destination_folder, filename)
-
-            # Check if the source_file is actually a file and not a directory
-            if os.path.isfile(source_file):
-                # Copy the file to the destination folder
-                shutil.copy(source_file, destination_file)
-                print(f"Copied {filename} to {destination_folder}")
-            else:
-                print(f"Skipped directory: {filename}")
-
-# Copy files from both nhl_reguliere and nhl_playoffs to nhl_data
-copy_files(reguliere_folder, destination_folder)
-copy_files(playoffs_folder, destination_folder)
-
-print("All files have been copied successfully.")
-
+# Lier les fichiers de nhl_reguliere et nhl_playoffs dans nhl_data (mode='symlink' si les répertoires
+# sont sur des disques différents)
+synchroniser_depot([reguliere_folder, playoffs_folder], destination_folder)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Banc d'essai du calcul des secondes de jeu (gameSeconds) à partir de periodTime ('MM:SS').
+# Usage: python benchmark_caracteristiques.py [fichier CSV avec gameId, period et periodTime]
+# Sans fichier, une colonne synthétique de 2 millions de temps est utilisée.
+
+import sys
+import time
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from caracteristiques import secondes_match
+
+
+def secondes_strptime(df: pd.DataFrame) -> list:
+    """Méthode du notebook Q4 (get_time_diff): un strptime par ligne."""
+    debut_periode = dt.datetime.strptime('00:00', '%M:%S')
+    return [(periode - 1) * 1200 + (dt.datetime.strptime(temps, '%M:%S') - debut_periode).seconds
+            for periode, temps in zip(df['period'], df['periodTime'])]
+
+
+def secondes_apply(df: pd.DataFrame) -> pd.Series:
+    """Méthode du notebook Q4 (calculate_game_seconds): str.split dans un apply(axis=1)."""
+    def calculate_game_seconds(row):
+        minutes, seconds = map(int, row['periodTime'].split(':'))
+        return (row['period'] - 1) * 1200 + minutes * 60 + seconds
+    return df.apply(calculate_game_seconds, axis=1)
+
+
+def secondes_vectorisees(df: pd.DataFrame) -> pd.arrays.IntegerArray:
+    """Nouvelle méthode: analyse octet par octet des valeurs distinctes (caracteristiques.secondes_match)."""
+    return secondes_match(df['period'], df['periodTime'])
+
+
+def donnees_synthetiques(n: int = 2_000_000) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    temps = np.array([f"{m:02d}:{s:02d}" for m in range(20) for s in range(60)], dtype=object)
+    return pd.DataFrame({'period': rng.integers(1, 4, n), 'periodTime': temps[rng.integers(0, len(temps), n)]})
+
+
+def mesurer(methode, df: pd.DataFrame):
+    """
+    :return: Un tuple (durée en secondes, résultat)
+    """
+    debut = time.perf_counter()
+    resultat = methode(df)
+    return time.perf_counter() - debut, resultat
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        df = pd.read_csv(sys.argv[1], usecols=['period', 'periodTime'], low_memory=False)
+        df = df.dropna().astype({'period': int, 'periodTime': str})
+    else:
+        df = donnees_synthetiques()
+    print(f"{len(df)} temps à convertir")
+
+    reference = None
+    for nom, methode in [('strptime', secondes_strptime), ('apply(axis=1)', secondes_apply),
+                         ('octets', secondes_vectorisees)]:
+        duree, resultat = mesurer(methode, df)
+        resultat = np.asarray(resultat, dtype=np.int64)
+        identique = reference is None or np.array_equal(resultat, reference)
+        reference = resultat if reference is None else reference
+        print(f"{nom:>16}: {duree:7.2f} s ({len(df) / duree / 1e6:7.2f} M lignes/s), "
+              f"résultat identique: {identique}")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Banc d'essai de l'extraction des tirs/buts et des backends de décodage JSON sur les fichiers de matchs réels.
+# Usage: python benchmark_extraction.py [répertoire des matchs]
+
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from decodage_json import CLES_EXTRACTION, backends_disponibles, decoder_json
+from stockage_matchs import lire_fichier_match, lire_octets_match, lister_fichiers_matchs
+from extraction_evenements import (COLONNES_BRUTES, TamponsEvenements, extraire_roster, extraire_match,
+                                   iterer_tirs)
+
+
+def extraction_lignes(fichiers) -> pd.DataFrame:
+    """Ancienne méthode: une liste Python par tir, puis un DataFrame construit à partir de la liste des lignes."""
+    lignes = []
+    for file_path in fichiers:
+        data = lire_fichier_match(file_path)
+        lignes.extend(list(ligne) for ligne in iterer_tirs(data, extraire_roster(data)))
+    return pd.DataFrame(lignes, columns=COLONNES_BRUTES)
+
+
+def extraction_tampons(fichiers) -> pd.DataFrame:
+    """Nouvelle méthode: les valeurs sont écrites directement dans des tampons typés en colonnes."""
+    tampons = TamponsEvenements()
+    for file_path in fichiers:
+        data = lire_fichier_match(file_path)
+        extraire_match(data, extraire_roster(data), tampons)
+    return tampons.vers_dataframe()
+
+
+def mesurer(methode, fichiers):
+    """
+    Exécute une méthode d'extraction en mesurant sa durée et son pic de mémoire (tracemalloc).
+    :return: Un tuple (durée en secondes, pic de mémoire en octets, mémoire du DataFrame final en octets)
+    """
+    tracemalloc.start()
+    debut = time.perf_counter()
+    df = methode(fichiers)
+    duree = time.perf_counter() - debut
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duree, pic, int(df.memory_usage(deep=True).sum())
+
+
+def mesurer_decodage(contenus: list, backend: str, cles=None) -> float:
+    """
+    Mesure le temps de décodage d'une liste de documents JSON déjà lus en mémoire (lecture du disque exclue).
+    :return: Durée en secondes
+    """
+    debut = time.perf_counter()
+    for contenu in contenus:
+        decoder_json(contenu, cles, backend)
+    return time.perf_counter() - debut
+
+
+if __name__ == '__main__':
+    repertoire = sys.argv[1] if len(sys.argv) > 1 else '../data/nhl_data'
+    fichiers = list(lister_fichiers_matchs(repertoire).values())
+    print(f"{len(fichiers)} fichiers de matchs dans {repertoire}")
+
+    # Les fichiers compressés sont exclus: seule la vitesse de décodage JSON est comparée
+    contenus = [lire_octets_match(f) for f in fichiers if f.endswith('.json')]
+    taille = sum(len(contenu) for contenu in contenus)
+    print(f"Décodage de {len(contenus)} documents JSON ({taille / 2**20:.1f} Mio)")
+    for backend in backends_disponibles():
+        complet = mesurer_decodage(contenus, backend)
+        partiel = mesurer_decodage(contenus, backend, CLES_EXTRACTION)
+        print(f"{backend:>16}: complet {complet:7.2f} s ({taille / 2**20 / complet:6.1f} Mio/s), "
+              f"sous-arbres de l'extraction {partiel:7.2f} s")
+
+    for nom, methode in [('liste de lignes', extraction_lignes), ('tampons typés', extraction_tampons)]:
+        duree, pic, taille_df = mesurer(methode, fichiers)
+        print(f"{nom:>16}: {duree:7.2f} s, pic mémoire {pic / 2**20:8.1f} Mio, DataFrame {taille_df / 2**20:8.1f} Mio")
@@ -0,0 +1,126 @@
+import os
+import json
+import time
+from datetime import date
+from urllib.parse import urlencode
+
+from session_http import creer_session, get_avec_relance, PolitiqueRelance, MISS
+from stockage_matchs import ecrire_atomique
+
+URL_CALENDRIER = "https://api.nhle.com/stats/rest/en/game"
+
+# Types de matchs de l'API: 2 = saison régulière, 3 = playoffs
+TYPES_MATCHS = {'02': 2, '03': 3}
+
+
+def code_saison(year) -> int:
+    """
+    Convertit l'année de début d'une saison en code de saison de l'API (ex. 2016 -> 20162017).
+    """
+    return int(f"{year}{int(year) + 1}")
+
+
+def saison_en_cours(jour: date = None) -> int:
+    """
+    Année de début de la saison en cours: une saison commence en septembre (camp d'entraînement).
+    :param jour: Date de référence (par défaut aujourd'hui)
+    """
+    jour = jour if jour is not None else date.today()
+    return jour.year if jour.month >= 9 else jour.year - 1
+
+
+def extraire_ids_calendrier(calendrier: dict, game_types=('02', '03')) -> dict:
+    """
+    Extrait les IDs des matchs d'une réponse du calendrier de l'API.
+    :param calendrier: Réponse JSON de l'API ({'data': [{'id': ..., 'gameType': ..., ...}, ...]})
+    :param game_types: Types de matchs à conserver ('02' pour la saison régulière, '03' pour les playoffs)
+    :return: Dictionnaire {game_type: liste triée des IDs de matchs}
+    """
+    ids = {game_type: set() for game_type in game_types}
+    types_api = {TYPES_MATCHS[game_type]: game_type for game_type in game_types}
+    for match in calendrier.get('data', []):
+        game_type = types_api.get(match.get('gameType'))
+        if game_type is not None:
+            ids[game_type].add(str(match['id']))
+    return {game_type: sorted(game_ids) for game_type, game_ids in ids.items()}
+
+
+class CalendrierNHL:
+    """
+    Découverte des IDs de matchs valides à partir du calendrier de l'API, avec un cache local par saison.
+    Remplace l'énumération des IDs (nombres de matchs codés en dur, 105 IDs de playoffs testés par année).
+    """
+
+    def __init__(self, cache_dir: str = '../data/calendrier', url: str = URL_CALENDRIER, session=None,
+                 politique: PolitiqueRelance = None, ttl_saison_en_cours: float = 24 * 3600):
+        """
+        :param cache_dir: Répertoire où les IDs découverts sont sauvegardés (un fichier par saison)
+        :param url: URL du calendrier (modifiable pour pointer vers un serveur local de test)
+        :param session: Session HTTP à réutiliser (par défaut une nouvelle session persistante)
+        :param politique: PolitiqueRelance appliquée aux réponses 429/5xx
+        :param ttl_saison_en_cours: Durée de validité en secondes du cache de la saison en cours (et des saisons
+                                    futures), dont le calendrier change encore (playoffs, reports); les saisons
+                                    terminées restent en cache indéfiniment
+        """
+        self.cache_dir = cache_dir
+        self.ttl_saison_en_cours = ttl_saison_en_cours
+        self.url = url
+        self.session = session if session is not None else creer_session(taille_pool=1)
+        self.politique = politique if politique is not None else PolitiqueRelance()
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def chemin_cache(self, year) -> str:
+        return os.path.join(self.cache_dir, f"calendrier_{code_saison(year)}.json")
+
+    def cache_valide(self, year) -> bool:
+        """
+        Vérifie si le cache d'une saison existe et peut être utilisé sans interroger l'API.
+        """
+        chemin = self.chemin_cache(year)
+        if not os.path.exists(chemin):
+            return False
+        if int(year) < saison_en_cours():
+            return True
+        return time.time() - os.path.getmtime(chemin) < self.ttl_saison_en_cours
+
+    def telecharger_calendrier(self, year) -> dict:
+        """
+        Télécharge le calendrier complet d'une saison.
+        :param year: Année de début de la saison (ex. 2016)
+        :return: Réponse JSON de l'API
+        """
+        url = f"{self.url}?{urlencode({'cayenneExp': f'season={code_saison(year)}'})}"
+        resultat, calendrier, _ = get_avec_relance(self.session, url, self.politique)
+        if resultat != MISS:
+            raise RuntimeError(f"Impossible de télécharger le calendrier de la saison {year} ({resultat})")
+        return calendrier
+
+    def ids_saison(self, year, rafraichir: bool = False) -> dict:
+        """
+        Retourne les IDs des matchs de saison régulière et de playoffs d'une saison, depuis le cache si possible.
+        :param year: Année de début de la saison (ex. 2016)
+        :param rafraichir: Ignore le cache, même s'il est encore valide
+        :return: Dictionnaire {'02': [...], '03': [...]}
+        """
+        chemin = self.chemin_cache(year)
+        if not rafraichir and self.cache_valide(year):
+            with open(chemin, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        ids = extraire_ids_calendrier(self.telecharger_calendrier(year), tuple(TYPES_MATCHS))
+        ecrire_atomique(chemin, json.dumps(ids).encode('utf-8'))
+        print(f"Calendrier {code_saison(year)}: {len(ids['02'])} matchs réguliers, {len(ids['03'])} matchs de playoffs")
+        return ids
+
+    def ids_matchs(self, start_year, end_year, game_type: str) -> list:
+        """
+        Retourne les IDs de tous les matchs d'un type donné pour une plage de saisons.
+        :param start_year: Année de début écrite en 4 chiffres
+        :param end_year: Année de fin écrite en 4 chiffres
+        :param game_type: '02' pour la saison régulière, '03' pour les playoffs
+        """
+        game_ids = []
+        for year in range(start_year, end_year + 1):
+            game_ids.extend(self.ids_saison(year)[game_type])
+        return game_ids
@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+
+# Position des filets sur l'axe des x (en pieds, centre de la patinoire en 0)
+X_FILET = 89
+
+
+def table_cote_defense(df: pd.DataFrame) -> pd.Series:
+    """
+    Construit en un seul passage groupé la table (gameId, period) -> côté défendu par l'équipe à domicile
+    ('left' ou 'right'), pour toutes les périodes, prolongations comprises.
+    Le champ homeTeamDefendingSide de l'API est utilisé en priorité. À défaut, le côté est déduit des tirs
+    de la période: un tir en zone offensive (O) est dirigé vers le filet du côté de son x, un tir en zone
+    défensive (D) vers le filet opposé; la majorité des tirs indique le filet attaqué par l'équipe à domicile.
+    :param df: DataFrame avec gameId, period, coordinateX, zoneCode, eventTeamId, teamHomeId
+               et, si disponible, homeTeamDefendingSide
+    :return: Série indexée par (gameId, period)
+    """
+    zone = df['zoneCode'].to_numpy(dtype=object)
+    sens_zone = np.select([zone == 'O', zone == 'D'], [1, -1], 0)
+    sens_equipe = np.where((df['eventTeamId'] == df['teamHomeId']).to_numpy(dtype=bool, na_value=False), 1, -1)
+    # > 0: l'équipe à domicile attaque le filet de droite (x = +89)
+    vote = np.nan_to_num(np.sign(df['coordinateX'].to_numpy(dtype=np.float64))) * sens_zone * sens_equipe
+
+    aide = pd.DataFrame({'gameId': df['gameId'].to_numpy(), 'period': df['period'].to_numpy(), 'vote': vote})
+    agregations = {'vote': ('vote', 'sum')}
+    if 'homeTeamDefendingSide' in df.columns:
+        aide['api'] = df['homeTeamDefendingSide'].to_numpy(dtype=object)
+        agregations['api'] = ('api', 'first')
+    groupes = aide.groupby(['gameId', 'period'], sort=False).agg(**agregations)
+
+    infere = pd.Series(np.select([groupes['vote'] > 0, groupes['vote'] < 0], ['left', 'right'], None),
+                       index=groupes.index, dtype=object)
+    if 'api' in groupes.columns:
+        return groupes['api'].where(groupes['api'].isin(['left', 'right']), infere).rename('homeDefendingSide')
+    return infere.rename('homeDefendingSide')
+
+
+def calcul_distance_angle(df: pd.DataFrame, cotes: pd.Series = None) -> pd.DataFrame:
+    """
+    Calcule la distance et l'angle de chaque tir par rapport au filet visé, de façon vectorisée.
+    - Zone défensive (D) ou offensive (O): le filet visé se déduit du signe de coordinateX.
+    - Zone neutre (N): le filet visé se déduit du côté défendu par l'équipe à domicile pendant la période du match.
+    :param df: DataFrame avec gameId, coordinateX, coordinateY, eventTeamId, teamHomeId, zoneCode et period
+    :param cotes: Table (gameId, period) -> côté défendu retournée par table_cote_defense (calculée si absente)
+    :return: Le DataFrame avec les colonnes 'distance', 'distance_round' et 'angle' (en degrés, arrondi à 4 décimales)
+    """
+    x = df['coordinateX'].to_numpy(dtype=np.float64)
+    y = df['coordinateY'].to_numpy(dtype=np.float64)
+    zone = df['zoneCode'].to_numpy(dtype=object)
+    tir_domicile = (df['eventTeamId'] == df['teamHomeId']).to_numpy(dtype=bool, na_value=False)
+
+    # Filet situé du côté gauche (x = -89) ou droit (x = +89) de la patinoire
+    filet_gauche = ((zone == 'D') & (x > 0)) | ((zone == 'O') & (x < 0))
+    filet_droit = ((zone == 'D') & (x < 0)) | ((zone == 'O') & (x > 0))
+
+    # Zone neutre: jointure avec la table des côtés défendus par match et par période;
+    # l'équipe à domicile vise le filet opposé au côté qu'elle défend
+    if cotes is None:
+        cotes = table_cote_defense(df)
+    cote = cotes.reindex(pd.MultiIndex.from_arrays([df['gameId'], df['period']])).to_numpy(dtype=object)
+    neutre = (zone == 'N') & ((cote == 'left') | (cote == 'right')) & df['eventTeamId'].notna().to_numpy()
+    vise_gauche = tir_domicile == (cote == 'right')
+    filet_gauche |= neutre & vise_gauche
+    filet_droit |= neutre & ~vise_gauche
+
+    dx = np.full(len(df), np.nan)
+    dx[filet_gauche] = x[filet_gauche] + X_FILET
+    dx[filet_droit] = X_FILET - x[filet_droit]
+
+    df['distance'] = np.sqrt(dx ** 2 + y ** 2)
+    df['distance_round'] = df['distance'].round(0)
+    df['angle'] = np.round(np.rad2deg(np.arctan2(y, dx)), 4)
+    return df
+
+
+FORCES = ['EV', 'PP', 'SH']  # Forces égales, avantage numérique, désavantage numérique
+
+
+def _chiffres_situation(situation_code):
+    """
+    Convertit une colonne de situationCode (texte '1551', ou entier 651 pour '0651') en matrice (n, 4) de chiffres.
+    :return: Un tuple (matrice int16 des chiffres, masque des codes valides)
+    """
+    codes = pd.Series(situation_code).reset_index(drop=True)
+    if pd.api.types.is_numeric_dtype(codes):
+        codes = codes.astype('Int64')  # 651.0 -> 651 (zéro initial perdu dans un CSV)
+    texte = codes.astype('string').str.zfill(4)
+    valide = (texte.str.len() == 4).fillna(False).to_numpy(dtype=bool)
+    # Lecture octet par octet: chaque code devient 4 octets ASCII, '0' (48) à '9' (57)
+    octets = np.asarray(texte.where(valide, '0000').to_numpy(dtype=object), dtype='S4')
+    chiffres = octets.view(np.uint8).reshape(-1, 4).astype(np.int16) - ord('0')
+    valide &= ((chiffres >= 0) & (chiffres <= 9)).all(axis=1)
+    return chiffres, valide
+
+
+def _en_reels(valeurs, n: int) -> np.ndarray:
+    # IDs d'équipe (éventuellement nullables ou scalaires) en float64, NaN pour une valeur manquante
+    serie = pd.Series(np.broadcast_to(valeurs, (n,)) if np.ndim(valeurs) == 0 else valeurs)
+    return pd.to_numeric(serie, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def decoder_situation(situation_code, event_team_id, team_home_id, team_away_id) -> pd.DataFrame:
+    """
+    Décode en un seul passage vectorisé le situationCode (gardien extérieur, patineurs extérieurs,
+    patineurs à domicile, gardien à domicile), ex. '1451': avantage numérique de l'équipe extérieure.
+    :param situation_code: Colonne des situationCode bruts
+    :param event_team_id: Colonne des IDs de l'équipe qui effectue l'événement
+    :param team_home_id: Colonne (ou valeur) des IDs de l'équipe à domicile
+    :param team_away_id: Colonne (ou valeur) des IDs de l'équipe extérieure
+    :return: DataFrame (même index que situation_code s'il s'agit d'une Série) avec awayGoalie, awaySkaters,
+             homeSkaters, homeGoalie, puis, du point de vue de l'équipe qui effectue l'événement, emptyNet (filet
+             adverse vide), strength (EV, PP, SH), non_gardiens_amicaux et non_gardiens_adverses
+    """
+    chiffres, valide = _chiffres_situation(situation_code)
+    n = len(valide)
+    away_goalie, away_skaters, home_skaters, home_goalie = chiffres.T
+
+    equipe = _en_reels(event_team_id, n)
+    domicile = equipe == _en_reels(team_home_id, n)
+    exterieur = equipe == _en_reels(team_away_id, n)
+    connu = valide & (domicile | exterieur)  # Situation décodée et équipe identifiée
+
+    amicaux = np.where(domicile, home_skaters, away_skaters)
+    adverses = np.where(domicile, away_skaters, home_skaters)
+    gardien_adverse = np.where(domicile, away_goalie, home_goalie)
+    forces = np.select([amicaux > adverses, amicaux < adverses], [1, 2], 0)
+
+    def entiers(valeurs, masque_valide):
+        return pd.arrays.IntegerArray(valeurs.astype(np.int8), ~masque_valide)
+
+    index = situation_code.index if isinstance(situation_code, pd.Series) else None
+    return pd.DataFrame({
+        'awayGoalie': entiers(away_goalie, valide),
+        'awaySkaters': entiers(away_skaters, valide),
+        'homeSkaters': entiers(home_skaters, valide),
+        'homeGoalie': entiers(home_goalie, valide),
+        'emptyNet': entiers((gardien_adverse != 1).astype(np.int8), connu),
+        'strength': pd.Categorical.from_codes(np.where(connu, forces, -1), categories=FORCES),
+        'non_gardiens_amicaux': entiers(amicaux, connu),
+        'non_gardiens_adverses': entiers(adverses, connu),
+    }, index=index)
+
+
+DUREE_PERIODE = 20 * 60  # Durée d'une période réglementaire (et d'une prolongation en séries), en secondes
+DUREE_PROLONGATION = 5 * 60  # Prolongation en saison régulière (et en présaison)
+TYPE_SERIES = 3  # Type de match des séries éliminatoires dans l'ID (ex. 2016030111)
+
+
+def _analyser_temps(valeurs: np.ndarray) -> np.ndarray:
+    # Chaque temps devient 5 octets ASCII 'MM:SS' ('M:SS' est complété par un zéro); -1 si invalide
+    octets = np.char.zfill(np.char.encode(np.asarray(valeurs, dtype='U5'), 'ascii', 'replace'), 5)
+    chiffres = octets.view(np.uint8).reshape(-1, 5).astype(np.int32) - ord('0')
+    secondes = (chiffres[:, 0] * 10 + chiffres[:, 1]) * 60 + chiffres[:, 3] * 10 + chiffres[:, 4]
+    valide = ((chiffres[:, [0, 1, 3, 4]] >= 0) & (chiffres[:, [0, 1, 3, 4]] <= 9)).all(axis=1)
+    valide &= (octets.view(np.uint8).reshape(-1, 5)[:, 2] == ord(':')) & (chiffres[:, 3] <= 5)
+    return np.where(valide, secondes, -1)
+
+
+def secondes_periode(period_time) -> pd.arrays.IntegerArray:
+    """
+    Convertit une colonne de temps écoulés dans la période ('MM:SS') en secondes entières, sans strptime
+    ni split ligne par ligne: les valeurs distinctes sont analysées octet par octet, puis redistribuées.
+    :param period_time: Colonne des periodTime (texte, catégorielle ou liste)
+    :return: IntegerArray Int32 (<NA> pour une valeur manquante ou invalide)
+    """
+    # Une saison ne compte qu'environ 1200 valeurs distinctes: chacune n'est analysée qu'une fois
+    codes, valeurs = pd.factorize(pd.Series(period_time))
+    texte = pd.Series(valeurs, dtype='string').fillna('')
+    valide = texte.str.len().between(4, 5).to_numpy(dtype=bool)
+    secondes = np.full(len(valeurs) + 1, -1, dtype=np.int32)  # Dernier élément: code -1 (valeur manquante)
+    if valide.any():
+        secondes[:-1][valide] = _analyser_temps(texte[valide].to_numpy(dtype=object))
+    resultat = secondes[codes]
+    return pd.arrays.IntegerArray(resultat, resultat < 0)
+
+
+def secondes_match(period, period_time, game_id=None) -> pd.arrays.IntegerArray:
+    """
+    Temps écoulé depuis le début du match, en secondes entières, prolongations et tirs de barrage compris.
+    Les périodes 1 à 3 durent 20 minutes. En séries éliminatoires, chaque prolongation dure aussi 20 minutes;
+    en saison régulière, la prolongation (période 4) dure 5 minutes et la période 5 est la fusillade
+    (tous ses tirs sont à 00:00, soit 65 minutes).
+    :param period: Colonne des numéros de période
+    :param period_time: Colonne des periodTime ('MM:SS')
+    :param game_id: Colonne des IDs de match (le type de match en est extrait); None pour des périodes
+                    de 20 minutes partout
+    :return: IntegerArray Int32 (<NA> si la période ou le temps manque)
+    """
+    temps = secondes_periode(period_time)
+    periodes = pd.to_numeric(pd.Series(period), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    debut = (periodes - 1) * DUREE_PERIODE
+    if game_id is not None:
+        ids = pd.to_numeric(pd.Series(game_id), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        saison_reguliere = (ids // 10000) % 100 != TYPE_SERIES
+        # Après la 4e période (5 minutes), la fusillade commence à 65 minutes
+        debut = np.where(saison_reguliere & (periodes >= 5), 3 * DUREE_PERIODE + DUREE_PROLONGATION, debut)
+    total = debut + temps.to_numpy(dtype=np.float64, na_value=np.nan)
+    manquant = np.isnan(total)
+    return pd.arrays.IntegerArray(np.where(manquant, 0, total).astype(np.int32), manquant)
+
+
+def ajouter_evenement_precedent(actions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ajoute à chaque action les caractéristiques de l'action qui la précède dans le même match, par décalages
+    groupés par match (la première action d'un match n'a pas d'action précédente).
+    Le flux doit contenir toutes les actions (pas seulement les tirs), dans l'ordre du match: le résultat
+    peut ensuite être filtré sur les tirs et les buts.
+    - lastEvent, lastCoordinateX, lastCoordinateY: type et coordonnées de l'action précédente
+    - lastDistance: distance entre les deux actions (NaN si des coordonnées manquent)
+    - timeLastEvent: secondes écoulées depuis l'action précédente (gameSeconds)
+    - rebound: l'action précédente est un tir au but
+    - speed: lastDistance / timeLastEvent (0 si aucune seconde ne s'est écoulée)
+    - chang_angle: pour un rebond, |180 - (angle + angle du tir précédent)|, 0 sinon
+    - vitesse_chang_angle: chang_angle / timeLastEvent (0 si aucune seconde ne s'est écoulée)
+    :param actions: DataFrame avec gameId, eventType, period, periodTime, coordinateX, coordinateY et angle
+                    (voir extraction_evenements.extraire_actions et calcul_distance_angle)
+    :return: Le DataFrame avec les colonnes ajoutées
+    """
+    actions['gameSeconds'] = secondes_match(actions['period'], actions['periodTime'], actions['gameId'])
+    colonnes = ['eventType', 'coordinateX', 'coordinateY', 'gameSeconds', 'angle']
+    precedent = actions[colonnes].groupby(actions['gameId'], sort=False, observed=True).shift(1)
+
+    x = actions['coordinateX'].to_numpy(dtype=np.float64)
+    y = actions['coordinateY'].to_numpy(dtype=np.float64)
+    x_precedent = precedent['coordinateX'].to_numpy(dtype=np.float64)
+    y_precedent = precedent['coordinateY'].to_numpy(dtype=np.float64)
+    distance = np.sqrt((x - x_precedent) ** 2 + (y - y_precedent) ** 2)
+    temps = (actions['gameSeconds'].to_numpy(dtype=np.float64, na_value=np.nan)
+             - precedent['gameSeconds'].to_numpy(dtype=np.float64, na_value=np.nan))
+    rebond = (precedent['eventType'] == 'shot-on-goal').to_numpy(dtype=bool)
+    changement = np.where(rebond, np.abs(180 - (actions['angle'].to_numpy(dtype=np.float64)
+                                                  + precedent['angle'].to_numpy(dtype=np.float64))), 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        actions['lastEvent'] = precedent['eventType']
+        actions['lastCoordinateX'] = x_precedent
+        actions['lastCoordinateY'] = y_precedent
+        actions['lastDistance'] = distance
+        actions['timeLastEvent'] = temps
+        actions['rebound'] = rebond
+        actions['speed'] = np.where(temps != 0, distance / temps, 0)
+        actions['chang_angle'] = changement
+        actions['vitesse_chang_angle'] = np.where(temps != 0, changement / temps, 0)
+    return actions
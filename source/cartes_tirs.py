@@ -0,0 +1,184 @@
+import io
+import os
+import json
+
+import numpy as np
+import pandas as pd
+from scipy.ndimage import gaussian_filter
+
+from manifeste import empreinte
+from stockage_matchs import ecrire_atomique, signature_fichier
+
+# Grille de la demi-patinoire, en cases d'un pied: x de 0 à 99 (filet à 89), y de 0 à 84 (y + 42)
+TAILLE_GRILLE = (100, 85)
+
+# Seules colonnes du CSV des tirs nécessaires aux cartes
+COLONNES_CARTES = ['season', 'gameId', 'teamHome', 'teamAway', 'coordinateX', 'coordinateY']
+
+
+def projeter_demi_patinoire(coordinate_x, coordinate_y):
+    """
+    Projette les coordonnées des tirs sur une demi-patinoire: les tirs du côté gauche (x < 0) sont retournés
+    par symétrie centrale, puis y est décalé de 42 pieds pour être positif.
+    :return: Un tuple (x_new, y_new) de np.ndarray float64
+    """
+    x = np.asarray(coordinate_x, dtype=np.float64)
+    y = np.asarray(coordinate_y, dtype=np.float64)
+    gauche = x < 0
+    return np.where(gauche, -x, x), np.where(gauche, -y, y) + 42
+
+
+def cube_taux_tirs(df: pd.DataFrame, saisons=None):
+    """
+    Construit en un seul passage (np.bincount) le nombre moyen de tirs par match pour chaque case de la
+    demi-patinoire, pour toutes les saisons et toutes les équipes à la fois.
+    Comme dans les cartes d'origine, un tir compte pour les deux équipes du match, et le taux d'une équipe est
+    divisé par son nombre de matchs dans la saison (celui de la ligue par le nombre de matchs de la saison).
+    Les tirs sans coordonnées sont ignorés, ceux qui tombent hors de la grille ne sont pas comptés.
+    :param df: DataFrame des tirs avec season, gameId, teamHome, teamAway, coordinateX et coordinateY
+    :param saisons: Saisons à inclure, dans l'ordre du cube (par défaut toutes, triées)
+    :return: Un tuple (taux, ligue, saisons, equipes):
+             taux: np.ndarray (saison, équipe, 100, 85), NaN pour une équipe absente de la saison;
+             ligue: np.ndarray (saison, 100, 85);
+             saisons et equipes: listes donnant l'ordre des deux premiers axes
+    """
+    df = df.dropna(subset=['coordinateX', 'coordinateY'])
+    saisons = sorted(df['season'].unique()) if saisons is None else list(saisons)
+    df = df[df['season'].isin(saisons)]
+    equipes = sorted(set(df['teamHome'].dropna().unique()) | set(df['teamAway'].dropna().unique()))
+    n_saisons, n_equipes = len(saisons), len(equipes)
+    n_cases = TAILLE_GRILLE[0] * TAILLE_GRILLE[1]
+
+    i_saison = pd.Index(saisons).get_indexer(df['season'])
+    index_equipes = pd.Index(equipes)
+    i_domicile = index_equipes.get_indexer(df['teamHome'])
+    i_exterieur = index_equipes.get_indexer(df['teamAway'])
+    game_id = df['gameId'].to_numpy()
+
+    x_new, y_new = projeter_demi_patinoire(df['coordinateX'], df['coordinateY'])
+    x_case, y_case = np.floor(x_new), np.floor(y_new)
+    dans_grille = (x_case >= 0) & (x_case < TAILLE_GRILLE[0]) & (y_case >= 0) & (y_case < TAILLE_GRILLE[1])
+    case = np.where(dans_grille, x_case * TAILLE_GRILLE[1] + y_case, 0).astype(np.int64)
+
+    # Tirs par (saison, équipe, case): chaque tir est compté une fois pour chacune des deux équipes du match
+    comptes = np.zeros(n_saisons * n_equipes * n_cases)
+    for i_equipe, garde in ((i_domicile, dans_grille), (i_exterieur, dans_grille & (i_exterieur != i_domicile))):
+        garde = garde & (i_equipe >= 0)
+        index = (i_saison[garde] * n_equipes + i_equipe[garde]) * n_cases + case[garde]
+        comptes += np.bincount(index, minlength=comptes.size)
+    comptes_ligue = np.bincount(i_saison[dans_grille] * n_cases + case[dans_grille],
+                                minlength=n_saisons * n_cases).astype(np.float64)
+
+    # Matchs par (saison, équipe) et par saison
+    paires = pd.DataFrame({
+        'saison': np.concatenate([i_saison, i_saison]),
+        'equipe': np.concatenate([i_domicile, i_exterieur]),
+        'gameId': np.concatenate([game_id, game_id]),
+    })
+    paires = paires[paires['equipe'] >= 0].drop_duplicates()
+    matchs = np.bincount(paires['saison'] * n_equipes + paires['equipe'], minlength=n_saisons * n_equipes)
+    matchs_ligue = np.bincount(
+        pd.DataFrame({'saison': i_saison, 'gameId': game_id}).drop_duplicates()['saison'], minlength=n_saisons)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        taux = comptes.reshape(n_saisons, n_equipes, *TAILLE_GRILLE) / matchs.reshape(n_saisons, n_equipes, 1, 1)
+        ligue = comptes_ligue.reshape(n_saisons, *TAILLE_GRILLE) / matchs_ligue.reshape(n_saisons, 1, 1)
+    return taux, ligue, saisons, equipes
+
+
+def cube_excedent_tirs(df: pd.DataFrame, saisons=None):
+    """
+    Écart entre le taux de tirs de chaque équipe et celui de la ligue, pour chaque saison et chaque case,
+    obtenu par diffusion (broadcasting) de la carte de la ligue sur toutes les équipes.
+    :return: Un tuple (excedent (saison, équipe, 100, 85), saisons, equipes)
+    """
+    taux, ligue, saisons, equipes = cube_taux_tirs(df, saisons)
+    return taux - ligue[:, np.newaxis], saisons, equipes
+
+
+def lisser_cube(cube: np.ndarray, sigma: float = 4, seuil: float = 0.0001) -> np.ndarray:
+    """
+    Lisse toutes les cartes d'un cube (..., 100, 85) en un seul appel à gaussian_filter: le noyau gaussien ne
+    s'applique qu'aux deux derniers axes (sigma nul sur les axes saison et équipe), ce qui donne le même résultat
+    que le lissage de chaque carte séparément. Une carte entièrement NaN (équipe absente) reste NaN.
+    :param cube: Cartes à lisser, par exemple l'excédent (saison, équipe, 100, 85) de cube_excedent_tirs
+    :param sigma: Paramètre du noyau gaussien sur les axes spatiaux
+    :param seuil: Les valeurs lissées dont la valeur absolue est inférieure ou égale au seuil deviennent NaN
+    :return: np.ndarray float32 de même forme que le cube
+    """
+    sigmas = (0,) * (cube.ndim - 2) + (sigma, sigma)
+    lisse = gaussian_filter(np.asarray(cube, dtype=np.float64), sigma=sigmas)
+    lisse[np.abs(lisse) <= seuil] = np.nan
+    return lisse.astype(np.float32)
+
+
+def cube_excedent_lisse(df: pd.DataFrame, saisons=None, sigma: float = 4, seuil: float = 0.0001):
+    """
+    Excédent de tirs de chaque équipe par rapport à la ligue, lissé, pour toutes les saisons et équipes.
+    :return: Un tuple (cube float32 (saison, équipe, 100, 85), saisons, equipes), où saisons et equipes donnent
+             l'ordre des deux premiers axes
+    """
+    excedent, saisons, equipes = cube_excedent_tirs(df, saisons)
+    return lisser_cube(excedent, sigma, seuil), saisons, equipes
+
+
+def _chemin_cache(cache_dir: str, csv_path: str, saison, sigma, seuil) -> str:
+    # Clé: signature du CSV (taille, mtime), saison et paramètres du lissage; un changement du CSV invalide le cache
+    cle = empreinte(json.dumps([signature_fichier(csv_path), int(saison), sigma, seuil]).encode('utf-8'))
+    return os.path.join(cache_dir, f"{saison}_sigma{sigma}_{cle[:16]}")
+
+
+def charger_cube_lisse(csv_path: str, saisons: list, sigma: float = 4, seuil: float = 0.0001,
+                       cache_dir: str = '../data/cache_cartes'):
+    """
+    Cube lissé de cube_excedent_lisse, lu d'un cache sur le disque: un fichier .npy float32 (équipe, 100, 85) par
+    saison et sigma, ouvert en mémoire mappée, et la liste de ses équipes dans un .json à côté.
+    Le CSV n'est lu (une seule fois, colonnes COLONNES_CARTES seulement) que pour les saisons absentes du cache.
+    :param csv_path: CSV des tirs (ex. '../data/nhl_play_by_play_combined.csv')
+    :param saisons: Saisons d'intérêt, dans l'ordre du cube
+    :param cache_dir: Répertoire du cache
+    :return: Un tuple (cube float32 (saison, équipe, 100, 85), saisons, equipes), comme cube_excedent_lisse
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    chemins = {saison: _chemin_cache(cache_dir, csv_path, saison, sigma, seuil) for saison in saisons}
+    manquantes = [saison for saison in saisons if not os.path.exists(chemins[saison] + '.npy')]
+
+    if manquantes:
+        print(f"Cartes à calculer pour les saisons {manquantes}")
+        df = pd.read_csv(csv_path, usecols=COLONNES_CARTES)
+        df = df[df['season'].isin(manquantes)]
+        for saison in manquantes:
+            cube, _, equipes_saison = cube_excedent_lisse(df, [saison], sigma, seuil)
+            # Le .json est écrit avant le .npy: un .npy présent a toujours sa liste d'équipes
+            ecrire_atomique(chemins[saison] + '.json', json.dumps(equipes_saison).encode('utf-8'))
+            tampon = io.BytesIO()
+            np.save(tampon, cube[0])
+            ecrire_atomique(chemins[saison] + '.npy', tampon.getvalue())
+
+    cartes, equipes_par_saison = {}, {}
+    for saison in saisons:
+        cartes[saison] = np.load(chemins[saison] + '.npy', mmap_mode='r')
+        with open(chemins[saison] + '.json', 'r') as f:
+            equipes_par_saison[saison] = json.load(f)
+
+    # Assemblage sur l'union triée des équipes; une équipe absente d'une saison reste NaN
+    equipes = sorted(set().union(*equipes_par_saison.values()))
+    cube = np.full((len(saisons), len(equipes), *TAILLE_GRILLE), np.nan, dtype=np.float32)
+    for i_saison, saison in enumerate(saisons):
+        cube[i_saison, [equipes.index(equipe) for equipe in equipes_par_saison[saison]]] = cartes[saison]
+    return cube, list(saisons), equipes
+
+
+def quantifier_cube(cube: np.ndarray, pas: int = 2, chiffres: int = 3) -> np.ndarray:
+    """
+    Réduit un cube de cartes pour l'export HTML: une case sur `pas` dans chaque direction spatiale, et valeurs
+    arrondies à `chiffres` chiffres significatifs par rapport au maximum absolu du cube (même arrondi pour toutes
+    les cartes; None pour ne pas arrondir). Le résultat est en float64 pour que Plotly écrive les nombres arrondis
+    sous leur forme courte.
+    :return: np.ndarray (..., ceil(100 / pas), ceil(85 / pas)); les NaN sont conservés
+    """
+    reduit = np.asarray(cube[..., ::pas, ::pas], dtype=np.float64)
+    maximum = np.nanmax(np.abs(reduit)) if np.isfinite(reduit).any() else 0
+    if chiffres is not None and maximum > 0:
+        reduit = np.round(reduit, chiffres - 1 - int(np.floor(np.log10(maximum))))
+    return reduit
@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Construction des figures du projet (cartes des équipes, figures du jalon 2, métriques des modèles).
+# Chaque figure est une tâche (fichier, fonction de dessin, données) rendue dans un pool de processus avec le
+# moteur Agg et l'API orientée objet de matplotlib, sans l'état global de pyplot. Une figure n'est redessinée
+# que si l'empreinte de ses données, de ses paramètres ou du code de dessin (sa fonction et le code du projet
+# qu'elle appelle, ex. plot_metrics.py) a changé.
+# Usage: python construction_figures.py [répertoire des matchs] [CSV des tirs] [CSV des prédictions] [--forcer]
+# Le CSV des prédictions contient les colonnes isGoal et probabilite (probabilité de but prédite).
+
+import io
+import os
+import sys
+import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import seaborn as sns
+import matplotlib
+import matplotlib.image as mpimg
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from manifeste import empreinte
+from pipeline_etapes import sources_appelees
+from stockage_matchs import ecrire_atomique
+from plot_metrics import (calculer_percentile, taux_buts, dessiner_ROC, dessiner_taux_buts,
+                          dessiner_taux_buts_cumules, dessiner_courbe_calibration)
+
+RINK_IMG = '../figures/nhl_rink.png'
+
+# Fichier des empreintes des figures construites, dans le répertoire des figures
+FICHIER_EMPREINTES = '.empreintes_figures.json'
+
+# Cartes d'équipes publiées, écrites dans DOSSIER_CARTES: les cartes '{Equipe}_{saison}.png' à la racine des
+# figures sont celles du jalon 1 (autre rendu), conservées telles quelles
+DOSSIER_CARTES = 'cartes_equipes'
+EQUIPES_CARTES = ['Avalanche', 'Lightning', 'Sabres']
+SAISONS_CARTES = [20182019, 20192020, 20202021]
+
+
+def empreinte_donnees(valeur) -> str:
+    """
+    Empreinte SHA-256 du contenu d'une donnée de figure: DataFrame ou Series (colonnes, types et valeurs),
+    tableau numpy (type, forme et valeurs) ou valeur sérialisable en JSON.
+    """
+    if isinstance(valeur, pd.DataFrame):
+        entete = json.dumps([list(map(str, valeur.columns)), list(map(str, valeur.dtypes))])
+        contenu = entete.encode('utf-8') + pd.util.hash_pandas_object(valeur).to_numpy().tobytes()
+    elif isinstance(valeur, pd.Series):
+        entete = json.dumps([str(valeur.name), str(valeur.dtype)])
+        contenu = entete.encode('utf-8') + pd.util.hash_pandas_object(valeur).to_numpy().tobytes()
+    elif isinstance(valeur, np.ndarray):
+        contenu = f"{valeur.dtype}{valeur.shape}".encode('utf-8') + np.ascontiguousarray(valeur).tobytes()
+    else:
+        contenu = json.dumps(valeur, sort_keys=True, default=str).encode('utf-8')
+    return empreinte(contenu)
+
+
+class TacheFigure:
+    """
+    Figure à construire: fonction(ax, **donnees, **parametres) dessine sur les axes d'une figure Agg, qui est
+    ensuite sauvegardée dans fichier (relatif au répertoire des figures). La fonction doit être définie au niveau
+    d'un module pour être envoyée à un autre processus.
+    """
+
+    def __init__(self, fichier: str, fonction, donnees: dict = None, parametres: dict = None,
+                 taille=(8, 6), dpi: int = 100, version: str = ''):
+        """
+        :param fichier: Chemin du fichier de la figure, relatif au répertoire des figures (ex. 'Milestone_2/x.png')
+        :param fonction: Fonction de dessin, fonction(ax, **donnees, **parametres)
+        :param donnees: Données de la figure (DataFrames, tableaux numpy), dont le contenu entre dans l'empreinte
+        :param parametres: Paramètres de la fonction (sérialisables en JSON)
+        :param taille: Taille de la figure en pouces
+        :param dpi: Résolution de la figure
+        :param version: Version à changer à la main lorsque le rendu change ailleurs que dans le code suivi par
+                        sources_appelees (ex. une mise à jour de matplotlib ou de l'image de la patinoire)
+        """
+        self.fichier = fichier
+        self.fonction = fonction
+        self.donnees = dict(donnees or {})
+        self.parametres = dict(parametres or {})
+        self.taille = tuple(taille)
+        self.dpi = dpi
+        self.version = version
+
+    def empreinte(self) -> str:
+        """
+        Empreinte des données, des paramètres, du format et du code de dessin: la fonction et le code du projet
+        qu'elle appelle (voir pipeline_etapes.sources_appelees), ex. les fonctions dessiner_* de plot_metrics.py.
+        """
+        try:
+            sources = sources_appelees(self.fonction)
+        except (OSError, TypeError):
+            sources = {}
+        if not sources:
+            sources = {'fonction': getattr(self.fonction, '__qualname__', repr(self.fonction))}
+        description = {
+            'code': empreinte(json.dumps(sources, sort_keys=True).encode('utf-8')),
+            'version': self.version,
+            'donnees': {nom: empreinte_donnees(valeur) for nom, valeur in sorted(self.donnees.items())},
+            'parametres': self.parametres,
+            'format': [self.taille, self.dpi],
+        }
+        return empreinte(json.dumps(description, sort_keys=True, default=str).encode('utf-8'))
+
+
+def _initialiser_processus():
+    # Aucun processus de rendu n'affiche de fenêtre: seaborn passe par pyplot, qui doit utiliser Agg
+    matplotlib.use('Agg')
+
+
+def rendre_figure(tache: TacheFigure, dossier: str) -> str:
+    """
+    Dessine une figure avec le moteur Agg et l'écrit de façon atomique.
+    :return: Chemin du fichier écrit
+    """
+    fig = Figure(figsize=tache.taille, dpi=tache.dpi)
+    FigureCanvasAgg(fig)
+    tache.fonction(fig.add_subplot(), **tache.donnees, **tache.parametres)
+    fig.tight_layout()
+
+    chemin = os.path.join(dossier, tache.fichier)
+    os.makedirs(os.path.dirname(chemin) or '.', exist_ok=True)
+    tampon = io.BytesIO()
+    fig.savefig(tampon, format=os.path.splitext(chemin)[1][1:] or 'png')
+    ecrire_atomique(chemin, tampon.getvalue())
+    return chemin
+
+
+def construire_figures(taches: list, dossier: str = '../figures', n_workers: int = None, forcer: bool = False) -> dict:
+    """
+    Construit les figures dont l'empreinte a changé depuis la dernière construction (ou dont le fichier manque).
+    :param taches: Liste de TacheFigure
+    :param dossier: Répertoire des figures, qui contient aussi le fichier des empreintes
+    :param n_workers: Nombre de processus (1 pour le mode série, par défaut le nombre de cœurs)
+    :param forcer: Redessiner toutes les figures
+    :return: Dictionnaire {fichier: 'inchangée', 'rendue' ou 'échec'}
+    """
+    chemin_empreintes = os.path.join(dossier, FICHIER_EMPREINTES)
+    empreintes = {}
+    if os.path.exists(chemin_empreintes):
+        with open(chemin_empreintes, 'r') as f:
+            empreintes = json.load(f)
+
+    statuts = {}
+    a_rendre = []
+    for tache in taches:
+        cle = tache.empreinte()
+        if not forcer and empreintes.get(tache.fichier) == cle and os.path.exists(os.path.join(dossier, tache.fichier)):
+            statuts[tache.fichier] = 'inchangée'
+        else:
+            a_rendre.append((tache, cle))
+    print(f"{len(a_rendre)} figure(s) à dessiner, {len(statuts)} inchangée(s)")
+
+    def terminer(tache, cle, resultat):
+        try:
+            resultat()
+        except Exception as e:
+            print(f"Erreur lors du rendu de la figure {tache.fichier} : {e}")
+            statuts[tache.fichier] = 'échec'
+            return
+        empreintes[tache.fichier] = cle
+        statuts[tache.fichier] = 'rendue'
+        print(f"Figure {tache.fichier}: rendue")
+
+    n_workers = n_workers or os.cpu_count() or 1
+    try:
+        if n_workers <= 1 or len(a_rendre) <= 1:
+            for tache, cle in a_rendre:
+                terminer(tache, cle, lambda: rendre_figure(tache, dossier))
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_initialiser_processus) as executor:
+                futurs = {executor.submit(rendre_figure, tache, dossier): (tache, cle) for tache, cle in a_rendre}
+                for futur in as_completed(futurs):
+                    terminer(*futurs[futur], futur.result)
+    finally:
+        # Les empreintes des figures rendues sont conservées même si une autre figure a échoué
+        os.makedirs(dossier, exist_ok=True)
+        ecrire_atomique(chemin_empreintes, json.dumps(empreintes, indent=2, sort_keys=True).encode('utf-8'))
+    return statuts
+
+
+# Fonctions de dessin des figures
+
+def figure_carte_equipe(ax, carte: np.ndarray, equipe: str, saison: int, image_patinoire: str = RINK_IMG):
+    """
+    Carte (100, 85) de l'écart lissé entre la fréquence de tirs d'une équipe et celle de la ligue, sur la
+    demi-patinoire offensive (même orientation que le graphique interactif de visualisations_avancees.py).
+    """
+    if image_patinoire and os.path.exists(image_patinoire):
+        ax.imshow(mpimg.imread(image_patinoire), extent=(-100, 100, -42.5, 42.5), alpha=0.5, zorder=0)
+    if np.isfinite(carte).any():
+        limite = np.nanmax(np.abs(carte))
+        x = np.linspace(0, 100, carte.shape[0])
+        y = np.linspace(-42.5, 42.5, carte.shape[1])
+        contours = ax.contourf(x, y, np.ma.masked_invalid(carte.T), levels=np.linspace(-limite, limite, 21),
+                               cmap='RdBu_r', alpha=0.8, zorder=1)
+        ax.figure.colorbar(contours, ax=ax, label="Écart à la ligue (tirs par heure)")
+    ax.set_xlim(0, 100)
+    ax.set_ylim(-42.5, 42.5)
+    ax.set_aspect('equal')
+    ax.set_title(f"{equipe}, saison {saison}: fréquence des tirs par rapport à la moyenne de la ligue")
+
+
+def figure_histogramme_tirs(ax, tirs: pd.DataFrame, colonne: str, xlabel: str, titre: str):
+    """Histogramme du nombre de tirs et de buts, séparés, selon une colonne (ex. distance ou angle)."""
+    sns.histplot(data=tirs[tirs['isGoal'] == 0], x=colonne, color='brown', label='Tirs', ax=ax)
+    sns.histplot(data=tirs[tirs['isGoal'] == 1], x=colonne, color='black', label='Buts', ax=ax)
+    ax.set(xlabel=xlabel, ylabel='count')
+    ax.legend()
+    ax.set_title(titre)
+
+
+def figure_taux_buts(ax, tirs: pd.DataFrame, colonne: str, plage: list, couleur: str, xlabel: str, titre: str,
+                     bin_num: int = 200):
+    """Taux de buts, #buts / (#pas_de_buts + #buts), par intervalle d'une colonne."""
+    goal_hist, goal_bins = np.histogram(tirs.loc[tirs['isGoal'] == 1, colonne], bins=bin_num, range=tuple(plage))
+    all_hist, _ = np.histogram(tirs[colonne], bins=bin_num, range=tuple(plage))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        goal_rate_hist = np.nan_to_num(goal_hist / all_hist)
+    ax.hist(goal_bins[:-1], goal_bins, weights=goal_rate_hist, color=couleur, edgecolor='black')
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel('Taux de but (buts / tirs)')
+    ax.set_title(titre)
+
+
+def figure_buts_filet_vide(ax, tirs: pd.DataFrame):
+    """Histogramme des buts selon la distance du filet, avec ou sans filet vide (échelle logarithmique)."""
+    buts = tirs[tirs['isGoal'] == 1]
+    sns.histplot(data=buts, x='distance', hue='emptyNet', palette=['#808080', '#8B4513'][:buts['emptyNet'].nunique()],
+                 ax=ax)
+    ax.set(xlabel='Distance du filet (pieds)', ylabel='Count')
+    ax.set_yscale('log')
+    ax.set_title("Histogramme des buts: distance du filet, avec ou sans filet vide")
+
+
+def figure_ROC(ax, y_val: pd.DataFrame, pred_probs: np.ndarray):
+    dessiner_ROC(ax, y_val, pred_probs)
+
+
+def figure_taux_buts_percentile(ax, y_val: pd.DataFrame, pred_probs: np.ndarray):
+    dessiner_taux_buts(ax, taux_buts(calculer_percentile(pred_probs, y_val)))
+
+
+def figure_taux_buts_cumules(ax, y_val: pd.DataFrame, pred_probs: np.ndarray):
+    dessiner_taux_buts_cumules(ax, calculer_percentile(pred_probs, y_val))
+
+
+def figure_calibration(ax, y_val: pd.DataFrame, pred_probs: np.ndarray):
+    dessiner_courbe_calibration(ax, y_val, pred_probs)
+
+
+# Tâches des figures du projet
+
+def taches_cartes_equipes(cube_tirs, equipes=None, saisons=None, image_patinoire: str = RINK_IMG) -> list:
+    """
+    Une carte '{DOSSIER_CARTES}/{equipe}_{saison}.png' par équipe et saison.
+    :param cube_tirs: Tuple (cube, saisons, equipes) de cartes_tirs.charger_cube_lisse ou cube_excedent_lisse
+    :param equipes: Équipes à dessiner (par défaut toutes celles du cube)
+    :param saisons: Saisons à dessiner (par défaut toutes celles du cube)
+    """
+    cube, saisons_cube, equipes_cube = cube_tirs
+    taches = []
+    for saison in (saisons or saisons_cube):
+        for equipe in (equipes or equipes_cube):
+            carte = np.asarray(cube[saisons_cube.index(saison), equipes_cube.index(equipe)])
+            taches.append(TacheFigure(f"{DOSSIER_CARTES}/{equipe}_{saison}.png", figure_carte_equipe, {'carte': carte},
+                                      {'equipe': equipe, 'saison': saison, 'image_patinoire': image_patinoire},
+                                      taille=(10, 5)))
+    return taches
+
+
+def taches_jalon_2(tirs: pd.DataFrame) -> list:
+    """
+    Figures du jalon 2 (Milestone_2/) sur les tirs d'entraînement (distance, angle, isGoal et emptyNet).
+    Chaque tâche ne reçoit que ses colonnes: elle n'est redessinée que si celles-ci changent.
+    """
+    distance, angle = tirs[['distance', 'isGoal']], tirs[['angle', 'isGoal']]
+    return [
+        TacheFigure('Milestone_2/2-1a_dist_from_net.png', figure_histogramme_tirs, {'tirs': distance},
+                    {'colonne': 'distance', 'xlabel': 'Distance du filet (ft)',
+                     'titre': "Nombre de tirs par distance du filet"}),
+        TacheFigure('Milestone_2/2-1b_angle_from_net.png', figure_histogramme_tirs, {'tirs': angle},
+                    {'colonne': 'angle', 'xlabel': 'Angle du filet (degrés)', 'titre': "Nombre de tirs par angle de tir"}),
+        TacheFigure('Milestone_2/2-2a_goal_rate_dist.png', figure_taux_buts, {'tirs': distance},
+                    {'colonne': 'distance', 'plage': [0, 200], 'couleur': 'skyblue',
+                     'xlabel': 'Distance du filet (pieds)', 'titre': "Taux de buts en fonction de la distance"},
+                    taille=(10, 6)),
+        TacheFigure('Milestone_2/2-2b_goal_rate_angle.png', figure_taux_buts, {'tirs': angle},
+                    {'colonne': 'angle', 'plage': [-180.0, 180.0], 'couleur': 'salmon',
+                     'xlabel': 'Angle par rapport au filet (degrés)',
+                     'titre': "Taux de buts en fonction de l'angle du tir"},
+                    taille=(10, 6)),
+        TacheFigure('Milestone_2/hist_buts_distance_du_filet.png', figure_buts_filet_vide,
+                    {'tirs': tirs[['distance', 'isGoal', 'emptyNet']]}),
+    ]
+
+
+def taches_metriques(y_val: pd.DataFrame, pred_probs: np.ndarray) -> list:
+    """
+    Figures de plot_metrics.py: courbe ROC, taux de buts, buts cumulés et courbe de calibration.
+    :param y_val: DataFrame avec la colonne isGoal
+    :param pred_probs: Probabilités prédites (n, 2), la colonne 1 étant la probabilité de but
+    """
+    donnees = {'y_val': y_val, 'pred_probs': pred_probs}
+    return [
+        TacheFigure('roc_curve.png', figure_ROC, donnees),
+        TacheFigure('goal_rate_plot.png', figure_taux_buts_percentile, donnees),
+        TacheFigure('cumulative_goal_rate.png', figure_taux_buts_cumules, donnees),
+        TacheFigure('calibration_curve.png', figure_calibration, donnees),
+    ]
+
+
+if __name__ == '__main__':
+    matplotlib.use('Agg')
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith('--')]
+    dossier = arguments[0] if len(arguments) > 0 else '../data/nhl_data'
+    csv_tirs = arguments[1] if len(arguments) > 1 else '../data/nhl_play_by_play_combined.csv'
+    csv_predictions = arguments[2] if len(arguments) > 2 else None
+
+    taches = []
+    if os.path.exists(csv_tirs):
+        from cartes_tirs import charger_cube_lisse
+        taches += taches_cartes_equipes(charger_cube_lisse(csv_tirs, SAISONS_CARTES), EQUIPES_CARTES)
+    if os.path.exists(dossier):
+        from pipeline_caracteristiques import construire_pipeline
+        taches += taches_jalon_2(construire_pipeline(dossier).executer('entrainement'))
+    if csv_predictions is not None:
+        predictions = pd.read_csv(csv_predictions, usecols=['isGoal', 'probabilite'])
+        probabilites = predictions['probabilite'].to_numpy()
+        taches += taches_metriques(predictions[['isGoal']], np.column_stack([1 - probabilites, probabilites]))
+
+    statuts = construire_figures(taches, forcer='--forcer' in sys.argv)
+    print(pd.Series(statuts, dtype=object).value_counts().to_string())
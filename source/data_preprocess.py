@@ -1,24 +1,29 @@
 #DATA SPLIT AND PREPROCESSING
 import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
 from sklearn.model_selection import train_test_split
 
+from pretraitement import PretraitementTirs
+
 
 #DATA PREPROCESSING
-def preprocess_data(file_path, output_path):
-    # Load data
-    data = pd.read_csv(file_path)
+def pretraiter(data, pretraitement=None):
+    """
+    Normalise les caractéristiques continues (MinMax) et encode les catégorielles en one-hot.
+    :param data: DataFrame des tirs (Q4)
+    :param pretraitement: PretraitementTirs déjà ajusté (ex. celui du modèle), ou None pour l'ajuster sur data
+    :return: Un tuple (DataFrame prétraité, PretraitementTirs ajusté)
+    """
+    if pretraitement is None:
+        pretraitement = PretraitementTirs().ajuster(data)
+    return pretraitement.transformer_dataframe(data), pretraitement
 
-    # Normalize features
-    scaler = MinMaxScaler()
-    scaled_features = scaler.fit_transform(data[['distance', 'angle', 'speed', 'chang_angle']])
-    data[['distance', 'angle', 'speed', 'chang_angle']] = scaled_features
 
-    # One-hot encode categorical features
-    categorical_features = ['shotType', 'lastEvent', 'period', 'non_gardiens_amicaux', 'non_gardiens_adverses']
-    data = pd.get_dummies(data, columns=categorical_features, drop_first=True, dtype=int)
+def preprocess_data(file_path, output_path):
+    # Load data
+    data, pretraitement = pretraiter(pd.read_csv(file_path))
 
-    # Save preprocessed data
+    # Save preprocessed data. A model meant for serving is saved with its fitted preprocessing
+    # in a single ModeleXG (see pretraiter and save_models.sauvegarder_modele)
     data.to_csv(f"{output_path}.csv", index=False)
     print(f"Preprocessed data saved to {output_path}.csv")
 
@@ -69,6 +69,8 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 import json
+from stockage_matchs import lire_fichier_match, lister_fichiers_matchs
+from index_matchs import IndexMatchs
 
 # Imports for JupyterLite
 try:
@@ -89,33 +91,28 @@ def read_files_json(folder):
     # Liste pour suivre les fichiers qui ont été lus
     files_read = []
 
-    # Parcourir tous les fichiers dans le dossier spécifié
-    for filename in os.listdir(folder):
-        # Vérifier si le fichier a l'extension '.json'
-        is_json = filename.endswith('.json')
-        # Enlever l'extension '.json' pour obtenir le nom de base du fichier
-        name = filename.replace('.json', '')
-        
-        if is_json:
-            # Ouvrir et charger le fichier avec encodage utf-8
-            try:
-                with open(f"{folder}{filename}", encoding='utf-8') as file:
-                    # Charger le contenu JSON du fichier dans un dictionnaire
-                    file_dict = json.load(file)
-                    # Ajouter le nom du fichier à la liste des fichiers lus
-                    files_read.append(name)
-                    # Ajouter les données du fichier au dictionnaire, avec le nom du fichier comme clé
-                    all_data[name] = file_dict
-            except UnicodeDecodeError as e:
-                # Afficher un message d'erreur si un problème d'encodage se produit
-                print(f"Erreur de décodage du fichier {filename}: {e}")
+    # Parcourir tous les fichiers de matchs du dossier (JSON, gzip, zstd ou archives par saison)
+    for name, file_path in lister_fichiers_matchs(folder).items():
+        # Ouvrir et charger le fichier, quel que soit son format
+        try:
+            # Charger le contenu JSON du fichier dans un dictionnaire
+            file_dict = lire_fichier_match(file_path)
+            # Ajouter le nom du fichier à la liste des fichiers lus
+            files_read.append(name)
+            # Ajouter les données du fichier au dictionnaire, avec le nom du fichier comme clé
+            all_data[name] = file_dict
+        except UnicodeDecodeError as e:
+            # Afficher un message d'erreur si un problème d'encodage se produit
+            print(f"Erreur de décodage du fichier {file_path}: {e}")
     
     # Afficher la liste des fichiers qui ont été lus avec succès
     #print(f"Fichiers lus : {files_read}")
     return all_data
 
-# Charger toutes les données des fichiers JSON dans le dossier 'data/nhl_data/'
-data = read_files_json('../data/nhl_data/')
+# Index des matchs du dossier 'data/nhl_data/' (construit une fois puis relu du disque); chaque match n'est
+# chargé qu'à la demande et seuls les derniers matchs consultés restent en mémoire.
+# read_files_json charge au contraire tous les matchs en mémoire.
+data = IndexMatchs('../data/nhl_data/')
 
 # Charger l'image de la patinoire pour l'affichage des événements
 rink = plt.imread("../figures/nhl_rink.png")
@@ -158,14 +155,19 @@ for file_key in list(data.keys())[:3]:  # Limitez l'affichage à 3 fichiers pour
 # In[4]:
 
 
+# Type de match dans l'ID (caractères 5 et 6) selon le choix de l'utilisateur
+TYPES_MATCH = {'Saison régulière': '02', 'Playoffs': '03'}
+
+
 class Debugger_interactif:
     def __init__(self, data):
         # Initialisation des variables
         self.data = data
         
         # Variables principales
-        self.current_data = data  # Contient le dictionnaire des données actuelles (peut être filtré)
+        self.current_data = data.matchs_de()  # IDs triés des matchs actuels (peut être filtré), chargés à la demande dans data
         self.current_season = str('2016')  # Saison actuelle
+        self.filtered_season = None  # Saison des matchs filtrés (None: toutes les saisons)
         self.current_game_type = 'Saison régulière'  # Type de jeu actuel (saison régulière ou playoffs)
         self.current_game_id = '2016020122'  # Match actuel (initialisé au premier)
         self.current_event = 1  # Événement actuel
@@ -191,7 +193,7 @@ class Debugger_interactif:
 
         # Slider pour sélectionner un match particulier
         self.game_id = widgets.SelectionSlider(
-            options=sorted(list(self.current_data.keys())),
+            options=self.current_data,
             value=self.current_game_id,
             description='ID de match',
         )
@@ -201,21 +203,14 @@ class Debugger_interactif:
         self.event = widgets.IntSlider(
             value=1,
             min=1,
-            max=len(self.current_data[self.current_game_id]['plays']),
+            max=self.data.resume(self.current_game_id)['nombre_evenements'],
             description='Événement'
         )
         self.event.observe(self.update_event, 'value')
 
     def season_range(self):
-        """Liste les fichiers dans le dossier 'data' et renvoie la saison minimale et maximale."""
-        min_season = 3000
-        max_season = 0
-        for game_id in self.data.keys():
-            season = int(game_id[:4])
-            if season < min_season:
-                min_season = season
-            if season > max_season:
-                max_season = season
+        """Renvoie la saison minimale et maximale des matchs de l'index."""
+        min_season, max_season = self.data.saisons()
         return (str(min_season), str(max_season))
 
     def plot_coordinates(self):
@@ -240,7 +235,7 @@ class Debugger_interactif:
                 print(f"{self.home_team} (domicile) vs. {self.away_team} (extérieur)")
                 print(f"Début du match : {self.start_time}")
                 print(f"Score final : {self.home_team} {self.final_score_home} - {self.final_score_away} {self.away_team}")
-                print(f"Nombre total d'événements : {len(self.current_data[self.current_game_id]['plays'])}")
+                print(f"Nombre total d'événements : {self.data.resume(self.current_game_id)['nombre_evenements']}")
                 print(f"Stade : {self.venue_name}, Lieu : {self.venue_city}")
                 print(f"Description de l'événement actuel : {self.event_description}")
                 print(f"Période : {self.event_period}, Temps dans la période : {self.event_time}")
@@ -251,25 +246,20 @@ class Debugger_interactif:
                 print("Aucune donnée disponible.")
 
     def filter_season(self):
-        """Filtre les données selon la saison sélectionnée."""
-        filtered_data = {game_id: data for game_id, data in self.data.items() if game_id.startswith(self.current_season)}
-        self.current_data = filtered_data if filtered_data else self.data
+        """Filtre les données selon la saison sélectionnée (toutes les saisons si elle n'a aucun match)."""
+        self.filtered_season = int(self.current_season) if self.data.matchs_de(int(self.current_season)) else None
+        self.current_data = self.data.matchs_de(self.filtered_season)
 
     def filter_playoffs(self):
         """Filtre les données pour ne garder que les matchs de playoffs ou de saison régulière."""
-        filtered_data = {}
-        for game_id in self.current_data.keys():
-            if self.current_game_type == "Playoffs" and game_id[4:6] == '03':
-                filtered_data[game_id] = self.current_data[game_id]
-            elif self.current_game_type == "Saison régulière" and game_id[4:6] == '02':
-                filtered_data[game_id] = self.current_data[game_id]
-        self.current_data = filtered_data
+        type_match = TYPES_MATCH[self.current_game_type]
+        self.current_data = self.data.matchs_de(self.filtered_season, type_match)
 
     def update_vars(self):
         """Met à jour les variables liées au jeu et à l'événement."""
         if not self.current_game_id:
             return
-        game = self.current_data.get(self.current_game_id, {})
+        game = self.data.get(self.current_game_id, {})
         self.home_team = game.get('homeTeam', {}).get('abbrev', 'N/A')
         self.away_team = game.get('awayTeam', {}).get('abbrev', 'N/A')
         
@@ -301,7 +291,7 @@ class Debugger_interactif:
             self.filter_season()
             self.filter_playoffs()
             if self.current_game_id:
-                self.game_id.options = sorted(list(self.current_data.keys()))
+                self.game_id.options = self.current_data
                 self.update_vars()
                 self.display_info()
 
@@ -313,7 +303,7 @@ class Debugger_interactif:
             self.filter_season()
             self.filter_playoffs()
             if self.current_game_id:
-                self.game_id.options = sorted(list(self.current_data.keys()))
+                self.game_id.options = self.current_data
                 self.update_vars()
                 self.display_info()
 
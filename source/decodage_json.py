@@ -0,0 +1,97 @@
+import os
+import json
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+# Clés du JSON d'un match utilisées par l'extraction des tirs/buts
+CLES_EXTRACTION = ('id', 'season', 'homeTeam', 'awayTeam', 'plays', 'rosterSpots')
+
+# Backend imposé pour tout le processus (ex. NHL_JSON_BACKEND=json pour comparer avec la bibliothèque standard)
+_backend_impose = os.environ.get('NHL_JSON_BACKEND')
+
+# Un analyseur simdjson ne peut contenir qu'un document à la fois: un analyseur par thread
+_local = threading.local()
+
+
+def backends_disponibles() -> list:
+    """
+    :return: Liste des backends de décodage installés, parmi 'orjson', 'simdjson' et 'json'
+    """
+    backends = []
+    if orjson is not None:
+        backends.append('orjson')
+    if simdjson is not None:
+        backends.append('simdjson')
+    backends.append('json')
+    return backends
+
+
+def choisir_backend(nom: str = None):
+    """
+    Impose un backend de décodage pour tout le processus.
+    :param nom: 'orjson', 'simdjson', 'json', ou None pour revenir au choix automatique
+    """
+    global _backend_impose
+    if nom is not None and nom not in backends_disponibles():
+        raise RuntimeError(f"Backend JSON '{nom}' indisponible, choisir parmi {backends_disponibles()}")
+    _backend_impose = nom
+
+
+def _backend_automatique() -> str:
+    # Les actions ('plays') forment l'essentiel d'un fichier de match: même limité aux sous-arbres utiles,
+    # simdjson reste plus lent qu'un décodage complet par orjson (voir benchmark_extraction.py)
+    if _backend_impose is not None:
+        return _backend_impose
+    return backends_disponibles()[0]
+
+
+def _analyseur_simdjson():
+    if not hasattr(_local, 'analyseur'):
+        _local.analyseur = simdjson.Parser()
+    return _local.analyseur
+
+
+def _vers_python(valeur):
+    if isinstance(valeur, simdjson.Object):
+        return valeur.as_dict()
+    if isinstance(valeur, simdjson.Array):
+        return valeur.as_list()
+    return valeur
+
+
+def decoder_json(contenu: bytes, cles=None, backend: str = None) -> dict:
+    """
+    Décode un document JSON avec le backend le plus rapide disponible.
+    :param contenu: Octets du document JSON (non compressé)
+    :param cles: Clés de premier niveau à conserver (ex. CLES_EXTRACTION), ou None pour tout le document
+    :param backend: 'orjson', 'simdjson' ou 'json' (par défaut choisi automatiquement)
+    :return: Un dictionnaire avec les données décodées
+    """
+    backend = backend or _backend_automatique()
+
+    if backend == 'simdjson':
+        analyseur = _analyseur_simdjson()
+        if cles is None:
+            return analyseur.parse(contenu, True)
+        # Seuls les sous-arbres demandés sont convertis; le reste du document n'est jamais matérialisé
+        document = analyseur.parse(contenu)
+        data = {cle: _vers_python(document[cle]) for cle in cles if cle in document}
+        del document  # Libère l'analyseur pour le document suivant
+        return data
+
+    if backend == 'orjson':
+        data = orjson.loads(contenu)
+    else:
+        data = json.loads(contenu)
+    if cles is None:
+        return data
+    return {cle: data[cle] for cle in cles if cle in data}
@@ -0,0 +1,220 @@
+import os
+import json
+
+import pandas as pd
+
+from manifeste import empreinte
+from calendrier import code_saison
+from stockage_matchs import ecrire_atomique, lire_octets_match, lister_fichiers_matchs, signature_fichier
+from extraction_evenements import COLONNES_EVENEMENTS, SCHEMA_EVENEMENTS, iterer_lots
+from stockage_parquet import chemin_fragment_match, ecrire_fragment_match
+
+
+class ETLIncremental:
+    """
+    Extraction incrémentale des tirs/buts: seuls les fichiers de matchs nouveaux ou modifiés depuis la dernière
+    exécution sont extraits. Les lignes de chaque match sont écrites dans sa propre partition,
+    '{sortie_dir}/season={saison}/{game_id}.csv', remplacée en entier lorsque le match est extrait de nouveau.
+    Les matchs extraits ou retirés sont notés dans parquet_en_attente, conservé dans le fichier d'état jusqu'à ce
+    que leurs fichiers Parquet soient réécrits (voir mettre_a_jour_dataset), même si le processus s'arrête entre
+    les deux.
+    """
+
+    NOM_ETAT = '_etat_etl.json'
+
+    def __init__(self, sortie_dir: str = '../data/nhl_play_by_play', n_workers: int = 1, taille_lot: int = 64):
+        """
+        :param sortie_dir: Répertoire des partitions et du fichier d'état
+        :param n_workers: Nombre de processus pour l'extraction (1 pour le mode série)
+        :param taille_lot: Nombre de fichiers envoyés à un processus à la fois
+        """
+        self.sortie_dir = sortie_dir
+        self.n_workers = n_workers
+        self.taille_lot = taille_lot
+        self.chemin_etat = os.path.join(sortie_dir, self.NOM_ETAT)
+        os.makedirs(sortie_dir, exist_ok=True)
+        # État: {game_id: {'source': chemin, 'signature': signature_fichier, 'sha256': empreinte du contenu}}
+        self.etat = {}
+        # IDs des matchs extraits ou retirés dont le fichier Parquet n'a pas encore été mis à jour
+        self.parquet_en_attente = set()
+        if os.path.exists(self.chemin_etat):
+            with open(self.chemin_etat, 'r', encoding='utf-8') as f:
+                contenu = json.load(f)
+            if 'matchs' in contenu:
+                self.etat = contenu['matchs']
+                self.parquet_en_attente = set(contenu.get('parquet_en_attente', []))
+            else:
+                self.etat = contenu  # Ancien format: le dictionnaire des matchs seul
+
+    def _sauvegarder_etat(self):
+        contenu = {'matchs': self.etat, 'parquet_en_attente': sorted(self.parquet_en_attente)}
+        ecrire_atomique(self.chemin_etat, json.dumps(contenu).encode('utf-8'))
+
+    def chemin_partition(self, game_id) -> str:
+        return os.path.join(self.sortie_dir, f"season={code_saison(str(game_id)[:4])}", f"{game_id}.csv")
+
+    def matchs_modifies(self, fichiers: dict):
+        """
+        Compare chaque fichier à l'état de la dernière exécution: la signature (taille, mtime) d'abord,
+        puis l'empreinte SHA-256 du contenu seulement si la signature a changé.
+        :param fichiers: Dictionnaire {game_id: chemin} retourné par lister_fichiers_matchs
+        :return: Un tuple ({game_id: (chemin, signature, sha256)} à extraire, liste des game_ids disparus)
+        """
+        a_extraire = {}
+        for game_id, file_path in fichiers.items():
+            entree = self.etat.get(game_id)
+            signature = signature_fichier(file_path)
+            partition_existe = os.path.exists(self.chemin_partition(game_id))
+            if entree is not None and entree['signature'] == signature and partition_existe:
+                continue
+            sha256 = empreinte(lire_octets_match(file_path))
+            if entree is not None and entree['sha256'] == sha256 and partition_existe:
+                # Fichier touché ou copié sans changement de contenu: seule la signature est mise à jour
+                entree.update(source=file_path, signature=signature)
+                continue
+            a_extraire[game_id] = (file_path, signature, sha256)
+        supprimes = [game_id for game_id in self.etat if game_id not in fichiers]
+        return a_extraire, supprimes
+
+    def _ecrire_partition(self, game_id, df_match: pd.DataFrame):
+        chemin = self.chemin_partition(game_id)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        ecrire_atomique(chemin, df_match.to_csv(index=False).encode('utf-8'))
+        self.parquet_en_attente.add(str(game_id))
+
+    def _retirer_partition(self, game_id):
+        chemin = self.chemin_partition(game_id)
+        if os.path.exists(chemin):
+            os.remove(chemin)
+        self.etat.pop(game_id, None)
+        self.parquet_en_attente.add(str(game_id))
+
+    def executer(self, folder_path) -> dict:
+        """
+        Met à jour les partitions à partir des fichiers de matchs.
+        Un match qui ne peut pas être extrait perd sa partition (ses anciennes lignes ne sont plus exportées) et
+        sera de nouveau tenté à la prochaine exécution.
+        :param folder_path: Répertoire (ou liste de répertoires) des fichiers de matchs
+        :return: Dictionnaire {'extraits': n, 'inchanges': n, 'supprimes': n, 'echecs': n}
+        """
+        fichiers = lister_fichiers_matchs(folder_path)
+        a_extraire, supprimes = self.matchs_modifies(fichiers)
+        print(f"{len(a_extraire)} match(s) nouveau(x) ou modifié(s), "
+              f"{len(fichiers) - len(a_extraire)} inchangé(s), {len(supprimes)} supprimé(s)")
+
+        for game_id in supprimes:
+            self._retirer_partition(game_id)
+
+        ids_par_chemin = {file_path: game_id for game_id, (file_path, _, _) in a_extraire.items()}
+        en_attente = dict(a_extraire)
+        echecs = set()
+        for _, _, tampons, echecs_lot in iterer_lots(ids_par_chemin, None, self.n_workers, self.taille_lot):
+            echecs.update(ids_par_chemin[file_path] for file_path in echecs_lot)
+            for game_id, df_match in tampons.vers_dataframe().groupby('gameId', sort=False):
+                game_id = str(game_id)
+                if game_id not in en_attente:
+                    continue  # ID interne différent du nom du fichier
+                file_path, signature, sha256 = en_attente.pop(game_id)
+                self._ecrire_partition(game_id, df_match)
+                self.etat[game_id] = {'source': file_path, 'signature': signature, 'sha256': sha256}
+            self._sauvegarder_etat()  # Une interruption ne fait perdre que le lot en cours
+
+        # Matchs extraits sans aucun tir ni but: partition vide (remplace d'éventuelles anciennes lignes)
+        vide = pd.DataFrame(columns=COLONNES_EVENEMENTS)
+        for game_id, (file_path, signature, sha256) in en_attente.items():
+            if game_id in echecs:
+                self._retirer_partition(game_id)
+                continue
+            self._ecrire_partition(game_id, vide)
+            self.etat[game_id] = {'source': file_path, 'signature': signature, 'sha256': sha256}
+        self._sauvegarder_etat()
+        if echecs:
+            print(f"Attention: {len(echecs)} match(s) n'ont pas pu être extraits et sont retirés des partitions: "
+                  f"{', '.join(sorted(echecs))}")
+
+        return {'extraits': len(a_extraire) - len(echecs), 'inchanges': len(fichiers) - len(a_extraire),
+                'supprimes': len(supprimes), 'echecs': len(echecs)}
+
+    def charger(self, saisons=None) -> pd.DataFrame:
+        """
+        Charge les partitions dans un seul DataFrame, trié par match, avec les types de SCHEMA_EVENEMENTS.
+        :param saisons: Codes des saisons à charger (ex. [20162017, 20172018]), ou None pour toutes
+        """
+        saisons = None if saisons is None else {str(saison) for saison in saisons}
+        fragments = []
+        for dossier in sorted(os.listdir(self.sortie_dir)):
+            if not dossier.startswith('season='):
+                continue
+            if saisons is not None and dossier[len('season='):] not in saisons:
+                continue
+            chemin_dossier = os.path.join(self.sortie_dir, dossier)
+            for nom in sorted(os.listdir(chemin_dossier)):
+                if nom.endswith('.csv'):
+                    fragments.append(pd.read_csv(os.path.join(chemin_dossier, nom)))
+        if not fragments:
+            return pd.DataFrame(columns=COLONNES_EVENEMENTS).astype(SCHEMA_EVENEMENTS)
+        return pd.concat(fragments, ignore_index=True).astype(SCHEMA_EVENEMENTS)
+
+    @staticmethod
+    def _lire_partition(chemin: str) -> pd.DataFrame:
+        return pd.read_csv(chemin).astype(SCHEMA_EVENEMENTS)
+
+    def _matchs_de_partition(self, dossier_parquet: str) -> set:
+        # IDs des matchs de la partition CSV correspondant à un répertoire 'season=X/gameType=YY' du jeu Parquet
+        saison = os.path.basename(os.path.dirname(dossier_parquet))
+        game_type = os.path.basename(dossier_parquet)[len('gameType='):]
+        chemin_dossier = os.path.join(self.sortie_dir, saison)
+        if not os.path.isdir(chemin_dossier):
+            return set()
+        return {nom[:-len('.csv')] for nom in os.listdir(chemin_dossier)
+                if nom.endswith('.csv') and nom[4:6] == game_type}
+
+    def mettre_a_jour_dataset(self, racine: str) -> int:
+        """
+        Met à jour le jeu de données Parquet partitionné (stockage_parquet) avec un fichier par match: seuls les
+        matchs de parquet_en_attente sont réécrits à partir de leur partition CSV, ou supprimés s'ils ont été
+        retirés, et un répertoire de partition devenu vide est supprimé. Le coût dépend du nombre de matchs
+        nouveaux ou modifiés. La liste d'attente n'est vidée (dans le fichier d'état) qu'une fois les fichiers
+        écrits; ce jeu de données doit être le seul mis à jour par cet ETL.
+        Une partition écrite d'un bloc par ecrire_dataset (part-*.parquet) est convertie en un fichier par match
+        la première fois qu'un de ses matchs est mis à jour.
+        :param racine: Répertoire du jeu de données (ex. '../data/parquet/nhl_play_by_play')
+        :return: Nombre de fichiers de matchs réécrits ou supprimés
+        """
+        if not self.parquet_en_attente:
+            print(f"Aucun match en attente, {racine} est à jour")
+            return 0
+        a_mettre_a_jour = set(self.parquet_en_attente)
+        dossiers = {os.path.dirname(chemin_fragment_match(racine, game_id)) for game_id in a_mettre_a_jour}
+        for dossier in dossiers:
+            if not os.path.isdir(dossier):
+                continue
+            anciens = [nom for nom in os.listdir(dossier) if nom.startswith('part-')]
+            if anciens:
+                for nom in anciens:
+                    os.remove(os.path.join(dossier, nom))
+                a_mettre_a_jour |= self._matchs_de_partition(dossier)
+
+        for game_id in sorted(a_mettre_a_jour):
+            chemin = self.chemin_partition(game_id)
+            if os.path.exists(chemin):
+                ecrire_fragment_match(self._lire_partition(chemin), racine, game_id)
+            elif os.path.exists(chemin_fragment_match(racine, game_id)):
+                os.remove(chemin_fragment_match(racine, game_id))
+
+        for dossier in dossiers:
+            for vide in (dossier, os.path.dirname(dossier)):
+                if os.path.isdir(vide) and not os.listdir(vide):
+                    os.rmdir(vide)
+
+        self.parquet_en_attente.clear()
+        self._sauvegarder_etat()
+        print(f"{len(a_mettre_a_jour)} match(s) mis à jour dans {racine}")
+        return len(a_mettre_a_jour)
+
+    def exporter_csv(self, chemin: str):
+        """
+        Réécrit le fichier CSV combiné à partir de toutes les partitions (sans relire les fichiers JSON).
+        Le coût dépend de la taille du corpus: pour la mise à jour quotidienne, mettre_a_jour_dataset suffit.
+        """
+        self.charger().to_csv(chemin, index=False)
@@ -0,0 +1,408 @@
+from array import array
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from caracteristiques import decoder_situation
+from decodage_json import CLES_EXTRACTION
+from stockage_matchs import lire_fichier_match, lister_fichiers_matchs
+
+# Événements retenus: tirs au but et buts
+TYPES_TIRS = ('shot-on-goal', 'goal')
+
+COLONNES_EVENEMENTS = [
+    'gameId', 'season', 'teamHomeId', 'teamHome', 'teamAwayId', 'teamAway', 'event_id', 'eventType', 'eventTeamId', 'eventTeam',
+    'period', 'periodTime', 'coordinateX', 'coordinateY', 'shooterName',
+    'goalieName', 'shotType', 'emptyNet', 'strength'
+]
+
+
+# Type de chaque colonne du DataFrame des tirs/buts: entiers 32 bits (ou 8 bits) pouvant être manquants,
+# coordonnées en float32 et chaînes répétitives encodées en catégories
+SCHEMA_EVENEMENTS = {
+    'gameId': 'Int32', 'season': 'Int32', 'teamHomeId': 'Int32', 'teamHome': 'category',
+    'teamAwayId': 'Int32', 'teamAway': 'category', 'event_id': 'Int32', 'eventType': 'category',
+    'eventTeamId': 'Int32', 'eventTeam': 'category', 'period': 'Int8', 'periodTime': 'category',
+    'coordinateX': 'float32', 'coordinateY': 'float32', 'shooterName': 'category', 'goalieName': 'category',
+    'shotType': 'category', 'emptyNet': 'Int8', 'strength': 'category'
+}
+
+# Colonnes remplies pendant l'extraction: le situationCode brut est conservé, puis emptyNet et strength
+# en sont décodés pour toutes les lignes à la fois (caracteristiques.decoder_situation)
+COLONNES_BRUTES = [colonne for colonne in COLONNES_EVENEMENTS if colonne not in ('emptyNet', 'strength')]
+COLONNES_BRUTES.append('situationCode')
+SCHEMA_BRUT = {colonne: SCHEMA_EVENEMENTS.get(colonne, 'category') for colonne in COLONNES_BRUTES}
+
+
+class ColonneEntiere:
+    """Tampon d'entiers typé (array) avec un masque des valeurs manquantes."""
+
+    TYPES = {'Int32': ('i', np.int32), 'Int8': ('b', np.int8)}
+
+    def __init__(self, dtype: str = 'Int32'):
+        self.dtype = dtype
+        code, _ = self.TYPES[dtype]
+        self.valeurs = array(code)
+        self.manquants = bytearray()
+
+    def ajouter(self, valeur):
+        # Les valeurs absentes ou non entières (ex. 'Unknown') sont manquantes
+        if isinstance(valeur, int):
+            self.valeurs.append(valeur)
+            self.manquants.append(0)
+        else:
+            self.valeurs.append(0)
+            self.manquants.append(1)
+
+    def etendre(self, autre: 'ColonneEntiere'):
+        self.valeurs.extend(autre.valeurs)
+        self.manquants.extend(autre.manquants)
+
+    def vers_serie(self):
+        _, np_dtype = self.TYPES[self.dtype]
+        return pd.arrays.IntegerArray(np.frombuffer(self.valeurs, dtype=np_dtype),
+                                      np.frombuffer(self.manquants, dtype=np.bool_))
+
+
+class ColonneReelle:
+    """Tampon de float32 (les valeurs manquantes deviennent NaN)."""
+
+    def __init__(self):
+        self.valeurs = array('f')
+
+    def ajouter(self, valeur):
+        self.valeurs.append(float('nan') if valeur is None else valeur)
+
+    def etendre(self, autre: 'ColonneReelle'):
+        self.valeurs.extend(autre.valeurs)
+
+    def vers_serie(self):
+        return np.frombuffer(self.valeurs, dtype=np.float32)
+
+
+class ColonneCategorielle:
+    """Tampon de chaînes encodées par dictionnaire: un code entier par ligne, -1 pour une valeur manquante."""
+
+    def __init__(self):
+        self.codes = array('i')
+        self.categories = []
+        self._index = {}
+
+    def code(self, valeur) -> int:
+        if valeur is None:
+            return -1
+        code = self._index.get(valeur)
+        if code is None:
+            code = self._index[valeur] = len(self.categories)
+            self.categories.append(valeur)
+        return code
+
+    def ajouter(self, valeur):
+        self.codes.append(self.code(valeur))
+
+    def etendre(self, autre: 'ColonneCategorielle'):
+        # Traduit les codes de l'autre tampon dans le dictionnaire de celui-ci; le -1 final sert aux codes -1
+        correspondance = np.array([self.code(valeur) for valeur in autre.categories] + [-1], dtype=np.int32)
+        self.codes.frombytes(correspondance[np.frombuffer(autre.codes, dtype=np.int32)].tobytes())
+
+    def vers_serie(self):
+        return pd.Categorical.from_codes(np.frombuffer(self.codes, dtype=np.int32), categories=self.categories)
+
+
+class Tampons:
+    """
+    Tampons typés, un par colonne d'un schéma {colonne: dtype}, remplis directement pendant l'extraction
+    (sans liste intermédiaire de lignes). Les tampons d'un lot peuvent être fusionnés dans un autre.
+    """
+
+    def __init__(self, schema: dict):
+        """
+        :param schema: {colonne: 'Int32', 'Int8', 'float32' ou 'category'}, dans l'ordre des valeurs d'une ligne
+        """
+        self.schema = schema
+        self.colonnes = {}
+        for colonne, dtype in schema.items():
+            if dtype == 'category':
+                self.colonnes[colonne] = ColonneCategorielle()
+            elif dtype == 'float32':
+                self.colonnes[colonne] = ColonneReelle()
+            else:
+                self.colonnes[colonne] = ColonneEntiere(dtype)
+        self._ajouts = [colonne.ajouter for colonne in self.colonnes.values()]
+
+    def __len__(self):
+        return len(self.colonnes['gameId'].valeurs)
+
+    def ajouter(self, ligne):
+        """Ajoute une ligne (valeurs dans l'ordre du schéma) aux tampons."""
+        for ajouter, valeur in zip(self._ajouts, ligne):
+            ajouter(valeur)
+
+    def etendre(self, autre: 'Tampons'):
+        for colonne in self.schema:
+            self.colonnes[colonne].etendre(autre.colonnes[colonne])
+
+    def vers_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame({colonne: self.colonnes[colonne].vers_serie() for colonne in self.schema})
+
+
+class TamponsEvenements(Tampons):
+    """
+    Tampons des tirs/buts, une colonne par élément de COLONNES_BRUTES; emptyNet et strength sont décodés du
+    situationCode lors de la conversion en DataFrame.
+    """
+
+    def __init__(self):
+        super().__init__(SCHEMA_BRUT)
+
+    def vers_dataframe(self) -> pd.DataFrame:
+        colonnes = {colonne: self.colonnes[colonne].vers_serie() for colonne in COLONNES_BRUTES}
+        situation = decoder_situation(pd.Series(colonnes.pop('situationCode')), colonnes['eventTeamId'],
+                                      colonnes['teamHomeId'], colonnes['teamAwayId'])
+        colonnes['emptyNet'] = situation['emptyNet'].array
+        colonnes['strength'] = situation['strength'].array
+        return pd.DataFrame(colonnes, columns=COLONNES_EVENEMENTS)
+
+
+def extraire_roster(data: dict) -> dict:
+    """
+    Crée un dictionnaire {ID du joueur: nom du joueur} à partir de 'rosterSpots'.
+    """
+    players = {}
+    for player in data.get('rosterSpots', []):
+        players[player['playerId']] = f"{player['firstName']['default']} {player['lastName']['default']}"
+    return players
+
+
+def iterer_tirs(data: dict, player_names: dict, event_types: set = None):
+    """
+    Parcourt les actions d'un match une seule fois et génère une ligne par tir ou but.
+    :param data: Données JSON du match
+    :param player_names: Dictionnaire {ID du joueur: nom du joueur}
+    :param event_types: Set complété au passage avec les types de tous les événements du match
+    :return: Générateur de tuples dans l'ordre de COLONNES_BRUTES
+    """
+    game_id = data.get('id')
+    season = data.get('season')
+    team_home_Id = data['homeTeam']['id']
+    team_away_Id = data['awayTeam']['id']
+    team_home = data['homeTeam']['name']['default']
+    team_away = data['awayTeam']['name']['default']
+
+    for play in data.get('plays', []):
+        event_type = play.get('typeDescKey')
+        if event_type and event_types is not None:
+            event_types.add(event_type)
+        if event_type not in TYPES_TIRS:
+            continue
+
+        details = play.get('details', {})
+        event_team_id = details.get('eventOwnerTeamId', None)
+        yield (
+            game_id, season, team_home_Id, team_home, team_away_Id, team_away,
+            play.get('eventId', 'Unknown'), event_type, event_team_id,
+            team_home if event_team_id == team_home_Id else team_away,
+            play['periodDescriptor']['number'], play['timeInPeriod'],
+            details.get('xCoord', None), details.get('yCoord', None),
+            player_names.get(details.get('shootingPlayerId', 'Unknown'), 'Unknown'),
+            player_names.get(details.get('goalieInNetId', 'Unknown'), 'Unknown'),
+            details.get('shotType', None), play.get('situationCode', None)
+        )
+
+
+def extraire_match(data: dict, player_names: dict, tampons: TamponsEvenements) -> set:
+    """
+    Ajoute les tirs et les buts d'un match aux tampons typés.
+    :return: Set des types d'événements du match
+    """
+    event_types = set()
+    # Les lignes d'un seul match sont d'abord validées: un fichier invalide n'ajoute rien aux tampons
+    for ligne in list(iterer_tirs(data, player_names, event_types)):
+        tampons.ajouter(ligne)
+    return event_types
+
+
+def extraire_fichier(file_path: str, tampons: TamponsEvenements, player_names: dict = None):
+    """
+    Lit un fichier de match une seule fois, ajoute ses tirs/buts aux tampons et retourne son roster
+    et ses types d'événements.
+    :param player_names: Dictionnaire {ID du joueur: nom du joueur} à utiliser (par défaut le roster du match)
+    :return: Un tuple (roster, set des types d'événements)
+    """
+    # Seuls les sous-arbres utilisés par l'extraction (équipes, actions, roster) sont décodés
+    data = lire_fichier_match(file_path, CLES_EXTRACTION)
+    roster = extraire_roster(data)
+    event_types = extraire_match(data, roster if player_names is None else player_names, tampons)
+    return roster, event_types
+
+
+def extraire_lot(file_paths: list, player_names: dict = None):
+    """
+    Traite un lot de fichiers (exécuté dans un processus du pool en mode parallèle).
+    Les tirs/buts sont retournés dans des tampons typés en colonnes plutôt qu'en un DataFrame par match,
+    ce qui réduit le coût de sérialisation entre les processus et évite un pd.concat par match.
+    :return: Un tuple (roster du lot, set des types d'événements, TamponsEvenements, fichiers en erreur)
+    """
+    roster_lot = {}
+    types_lot = set()
+    tampons = TamponsEvenements()
+    echecs = []
+
+    for file_path in file_paths:
+        print(f"Traitement du fichier : {file_path}")
+        try:
+            roster, event_types = extraire_fichier(file_path, tampons, player_names)
+        except Exception as e:
+            print(f"Erreur lors du traitement du fichier {file_path} : {e}")
+            echecs.append(file_path)
+            continue
+        roster_lot.update(roster)
+        types_lot.update(event_types)
+    return roster_lot, types_lot, tampons, echecs
+
+
+def iterer_lots(file_paths, player_names: dict = None, n_workers: int = 1, taille_lot: int = 64,
+                fonction_lot=None):
+    """
+    Découpe les fichiers en lots et les traite en série (n_workers <= 1) ou dans un pool de processus.
+    Les lots sont retournés dans l'ordre des fichiers, quel que soit le mode.
+    :param n_workers: Nombre de processus
+    :param taille_lot: Nombre de fichiers envoyés à un processus à la fois
+    :param fonction_lot: Fonction de niveau module appliquée à chaque lot (par défaut extraire_lot avec
+                         player_names), ex. extraire_lot_actions
+    """
+    file_paths = list(file_paths)
+    lots = [file_paths[i:i + taille_lot] for i in range(0, len(file_paths), taille_lot)]
+    worker = partial(extraire_lot, player_names=player_names) if fonction_lot is None else fonction_lot
+    if n_workers <= 1:
+        yield from map(worker, lots)
+        return
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        yield from executor.map(worker, lots)
+
+
+def signaler_echecs(echecs: list, ignorer_echecs: bool = False):
+    """
+    Signale les fichiers qui n'ont pas pu être extraits: une exception par défaut, pour qu'un DataFrame incomplet
+    ne passe pas inaperçu, ou un simple message si ignorer_echecs est vrai.
+    """
+    if not echecs:
+        return
+    message = f"{len(echecs)} fichier(s) n'ont pas pu être extraits: {', '.join(echecs[:10])}"
+    if len(echecs) > 10:
+        message += ", ..."
+    if not ignorer_echecs:
+        raise RuntimeError(message)
+    print(f"Attention: {message}")
+
+
+def extraire_repertoire(folder_path, player_names: dict = None, n_workers: int = 1, taille_lot: int = 64,
+                        ignorer_echecs: bool = False):
+    """
+    Extraction en une seule passe: chaque fichier n'est lu et décodé qu'une fois pour construire ensemble
+    la correspondance ID -> nom des joueurs, l'inventaire des types d'événements et le DataFrame des tirs/buts.
+    Le résultat est identique en mode série et en mode parallèle.
+    :param folder_path: Répertoire (ou liste de répertoires) des fichiers de matchs
+    :param player_names: Noms des joueurs à utiliser pour les tireurs et gardiens (par défaut le roster de chaque match)
+    :param n_workers: Nombre de processus (1 pour le mode série)
+    :param taille_lot: Nombre de fichiers par lot envoyé à un processus
+    :param ignorer_echecs: Si faux (par défaut), un fichier illisible lève une RuntimeError à la fin de l'extraction;
+                           si vrai, les fichiers en erreur sont seulement signalés et exclus du résultat
+    :return: Un tuple (all_player_names, liste triée des types d'événements, DataFrame des tirs et buts)
+    """
+    all_player_names = {}
+    event_types = set()
+    tampons = TamponsEvenements()
+    echecs = []
+
+    fichiers = lister_fichiers_matchs(folder_path).values()
+    for roster, types_lot, tampons_lot, echecs_lot in iterer_lots(fichiers, player_names, n_workers, taille_lot):
+        all_player_names.update(roster)
+        event_types.update(types_lot)
+        tampons.etendre(tampons_lot)
+        echecs.extend(echecs_lot)
+
+    signaler_echecs(echecs, ignorer_echecs)
+    return all_player_names, sorted(event_types), tampons.vers_dataframe()
+
+
+# Flux complet des actions d'un match (tous les types d'événements), pour les caractéristiques
+# qui dépendent de l'événement précédent (caracteristiques.ajouter_evenement_precedent)
+COLONNES_ACTIONS = [
+    'gameId', 'season', 'teamHomeId', 'teamAwayId', 'event_id', 'eventType', 'eventTeamId', 'zoneCode',
+    'period', 'periodTime', 'coordinateX', 'coordinateY', 'shotType', 'situationCode', 'homeTeamDefendingSide'
+]
+
+SCHEMA_ACTIONS = {colonne: SCHEMA_BRUT.get(colonne, 'category') for colonne in COLONNES_ACTIONS}
+
+
+def iterer_actions(data: dict):
+    """
+    Génère une ligne par action du match, dans l'ordre de l'API, quel que soit son type.
+    :param data: Données JSON du match
+    :return: Générateur de tuples dans l'ordre de COLONNES_ACTIONS
+    """
+    game_id = data.get('id')
+    season = data.get('season')
+    team_home_Id = data['homeTeam']['id']
+    team_away_Id = data['awayTeam']['id']
+
+    for play in data.get('plays', []):
+        details = play.get('details', {})
+        yield (
+            game_id, season, team_home_Id, team_away_Id, play.get('eventId'), play.get('typeDescKey'),
+            details.get('eventOwnerTeamId'), details.get('zoneCode'),
+            play.get('periodDescriptor', {}).get('number'), play.get('timeInPeriod'),
+            details.get('xCoord'), details.get('yCoord'), details.get('shotType'),
+            play.get('situationCode'), play.get('homeTeamDefendingSide')
+        )
+
+
+def extraire_lot_actions(file_paths: list):
+    """
+    Traite un lot de fichiers pour extraire_actions (exécuté dans un processus du pool en mode parallèle).
+    :return: Un tuple (Tampons des actions selon SCHEMA_ACTIONS, fichiers en erreur)
+    """
+    tampons = Tampons(SCHEMA_ACTIONS)
+    echecs = []
+    for file_path in file_paths:
+        print(f"Traitement du fichier : {file_path}")
+        try:
+            # Les lignes d'un match ne sont ajoutées que si tout le fichier a pu être lu
+            lignes = list(iterer_actions(lire_fichier_match(file_path, CLES_EXTRACTION)))
+        except Exception as e:
+            print(f"Erreur lors du traitement du fichier {file_path} : {e}")
+            echecs.append(file_path)
+            continue
+        for ligne in lignes:
+            tampons.ajouter(ligne)
+    return tampons, echecs
+
+
+def extraire_actions(folder_path, n_workers: int = 1, taille_lot: int = 64,
+                     ignorer_echecs: bool = False) -> pd.DataFrame:
+    """
+    Extrait le flux complet des actions de tous les matchs d'un répertoire, match par match et dans l'ordre
+    des actions, avec les types de SCHEMA_ACTIONS. Comme extraire_repertoire, les actions sont écrites dans des
+    tampons typés, par lots traités en série ou dans un pool de processus.
+    :param folder_path: Répertoire (ou liste de répertoires) des fichiers de matchs
+    :param n_workers: Nombre de processus (1 pour le mode série)
+    :param taille_lot: Nombre de fichiers par lot envoyé à un processus
+    :param ignorer_echecs: Voir extraire_repertoire
+    :return: DataFrame des actions (une ligne par action)
+    """
+    tampons = Tampons(SCHEMA_ACTIONS)
+    echecs = []
+    fichiers = lister_fichiers_matchs(folder_path).values()
+    for tampons_lot, echecs_lot in iterer_lots(fichiers, None, n_workers, taille_lot, extraire_lot_actions):
+        tampons.etendre(tampons_lot)
+        echecs.extend(echecs_lot)
+
+    signaler_echecs(echecs, ignorer_echecs)
+    df = tampons.vers_dataframe()
+    # Catégories triées, comme la conversion astype(SCHEMA_ACTIONS) d'une liste de lignes
+    for colonne in df.select_dtypes('category').columns:
+        df[colonne] = df[colonne].cat.reorder_categories(sorted(df[colonne].cat.categories))
+    return df
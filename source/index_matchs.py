@@ -0,0 +1,139 @@
+import os
+import json
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from functools import lru_cache
+
+from stockage_matchs import lister_fichiers_matchs, lire_fichier_match, signature_fichier, ecrire_atomique
+
+# Nom du fichier de l'index dans le répertoire des matchs (ignoré par lister_fichiers_matchs grâce au '_')
+FICHIER_INDEX = '_index_matchs.json'
+
+# Clés de premier niveau lues pour construire l'index
+CLES_INDEX = ('gameDate', 'startTimeUTC', 'homeTeam', 'awayTeam', 'plays')
+
+
+def resume_match(game_id, game: dict) -> dict:
+    """
+    Résumé d'un match pour l'index: saison et type de match (tirés de l'ID), équipes, date et nombre d'événements.
+    """
+    game_id = str(game_id)
+    return {
+        'saison': int(game_id[:4]),
+        'type_match': game_id[4:6],
+        'domicile': game.get('homeTeam', {}).get('abbrev'),
+        'exterieur': game.get('awayTeam', {}).get('abbrev'),
+        'date': game.get('gameDate') or game.get('startTimeUTC', '')[:10] or None,
+        'nombre_evenements': len(game.get('plays', [])),
+    }
+
+
+class IndexMatchs(Mapping):
+    """
+    Matchs d'un répertoire accessibles comme un dictionnaire {game_id: données du match}, sans tout charger:
+    un index léger (saison, type de match, équipes, date, nombre d'événements) est construit une fois et conservé
+    sur le disque, et les données complètes d'un match ne sont lues qu'à la demande, avec un cache LRU borné.
+    À l'ouverture, seuls les fichiers ajoutés ou modifiés depuis la dernière construction de l'index sont relus.
+    Les IDs sont aussi partitionnés par saison et type de match (voir matchs_de), pour les filtres du déboggeur.
+    """
+
+    def __init__(self, folder_path, chemin_index: str = None, taille_cache: int = 32):
+        """
+        :param folder_path: Répertoire (ou liste de répertoires) des fichiers de matchs
+        :param chemin_index: Fichier de l'index (par défaut FICHIER_INDEX dans le premier répertoire)
+        :param taille_cache: Nombre maximal de matchs complets gardés en mémoire
+        """
+        premier = folder_path[0] if isinstance(folder_path, (list, tuple)) else folder_path
+        self.chemin_index = chemin_index or os.path.join(premier, FICHIER_INDEX)
+        self.fichiers = lister_fichiers_matchs(folder_path)
+        self.matchs = self._construire()
+        self.ids, self.partitions = self._partitionner()
+        self.charger = lru_cache(maxsize=taille_cache)(self._charger)
+
+    def _construire(self) -> dict:
+        ancien = {}
+        if os.path.exists(self.chemin_index):
+            with open(self.chemin_index, 'r') as f:
+                ancien = json.load(f)
+
+        index = {}
+        relus = 0
+        for game_id, file_path in self.fichiers.items():
+            signature = signature_fichier(file_path)
+            entree = ancien.get(game_id)
+            if entree is None or entree['signature'] != signature:
+                try:
+                    entree = resume_match(game_id, lire_fichier_match(file_path, CLES_INDEX))
+                except Exception as e:
+                    # Le fichier en erreur est noté dans l'index: il ne sera relu que s'il est modifié
+                    print(f"Erreur de décodage du fichier {file_path}: {e}")
+                    entree = {'erreur': str(e)}
+                entree['signature'] = signature
+                relus += 1
+            index[game_id] = entree
+
+        if relus or index.keys() != ancien.keys():
+            ecrire_atomique(self.chemin_index, json.dumps(index).encode('utf-8'))
+        matchs = {game_id: entree for game_id, entree in index.items() if 'erreur' not in entree}
+        if relus:
+            print(f"Index des matchs: {relus} fichier(s) lu(s), {len(matchs)} match(s)")
+        return matchs
+
+    def _partitionner(self):
+        # Un ID commence par la saison (4 chiffres) puis le type de match (2 chiffres): dans la liste triée des IDs,
+        # les matchs d'une saison, ou d'une saison et d'un type, forment une plage contiguë trouvée par bisection
+        ids = tuple(sorted(self.matchs))
+        partitions = {(None, None): ids}
+        par_type = {}  # {type de match: IDs de toutes les saisons, réunis en un seul tuple à la fin}
+        for saison in sorted({int(game_id[:4]) for game_id in ids}):
+            prefixe = str(saison)
+            partitions[(saison, None)] = ids[bisect_left(ids, prefixe):bisect_right(ids, prefixe + '~')]
+            for type_match in sorted({game_id[4:6] for game_id in partitions[(saison, None)]}):
+                prefixe = f"{saison}{type_match}"
+                partition = ids[bisect_left(ids, prefixe):bisect_right(ids, prefixe + '~')]
+                partitions[(saison, type_match)] = partition
+                par_type.setdefault(type_match, []).extend(partition)
+        for type_match, ids_type in par_type.items():
+            partitions[(None, type_match)] = tuple(ids_type)
+        return ids, partitions
+
+    def matchs_de(self, saison: int = None, type_match: str = None) -> tuple:
+        """
+        IDs triés des matchs d'une saison et/ou d'un type de match, précalculés: la réponse ne dépend pas du
+        nombre de matchs.
+        :param saison: Année de début de la saison (ex. 2016), ou None pour toutes les saisons
+        :param type_match: '02' (saison régulière), '03' (playoffs), etc., ou None pour tous les types
+        :return: Tuple d'IDs (vide si aucun match)
+        """
+        return self.partitions.get((saison, type_match), ())
+
+    def saisons(self) -> tuple:
+        """
+        :return: Un tuple (première saison, dernière saison) de l'index, ou None s'il est vide
+        """
+        if not self.ids:
+            return None
+        return int(self.ids[0][:4]), int(self.ids[-1][:4])
+
+    def _charger(self, game_id: str) -> dict:
+        return lire_fichier_match(self.fichiers[game_id])
+
+    def resume(self, game_id: str) -> dict:
+        """
+        :return: L'entrée de l'index du match (voir resume_match), sans lire son fichier
+        """
+        return self.matchs[game_id]
+
+    def __getitem__(self, game_id: str) -> dict:
+        if game_id not in self.matchs:
+            raise KeyError(game_id)
+        return self.charger(game_id)
+
+    def __iter__(self):
+        return iter(self.matchs)
+
+    def __len__(self) -> int:
+        return len(self.matchs)
+
+    def __contains__(self, game_id) -> bool:
+        return game_id in self.matchs
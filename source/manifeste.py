@@ -0,0 +1,140 @@
+import os
+import time
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+
+from stockage_matchs import lister_fichiers_matchs, lire_octets_match, decoder_contenu
+
+# Statuts possibles d'un match dans le manifeste
+OK = 'ok'                # Fichier complet, taille et empreinte vérifiées
+MANQUANT = 'manquant'    # Enregistré dans le manifeste mais absent du disque
+CORROMPU = 'corrompu'    # Taille, empreinte ou contenu JSON invalide
+ABSENT = 'absent'        # Le match n'existe pas dans l'API (404), revérifié après DELAI_ABSENT
+ERREUR = 'erreur'        # Téléchargement échoué après toutes les tentatives (5xx, délai dépassé, erreur réseau)
+
+# Délai en secondes après lequel un match ABSENT est redemandé: un match à venir répond 404 tant que ses
+# données ne sont pas publiées
+DELAI_ABSENT = 24 * 3600
+
+
+def empreinte(contenu: bytes) -> str:
+    """Retourne l'empreinte SHA-256 (hexadécimale) d'un contenu."""
+    return hashlib.sha256(contenu).hexdigest()
+
+
+class ManifesteTelechargement:
+    """
+    Manifeste SQLite des matchs téléchargés dans base_dir: statut, taille en octets, empreinte SHA-256,
+    horodatage du téléchargement et code HTTP, par ID de match.
+    """
+
+    NOM_FICHIER = '_manifeste.sqlite'
+
+    def __init__(self, base_dir: str):
+        """
+        :param base_dir: Répertoire des fichiers JSON des matchs (le manifeste y est créé)
+        """
+        self.base_dir = base_dir
+        self.chemin = os.path.join(base_dir, self.NOM_FICHIER)
+        with self._connexion() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS matchs (
+                       game_id TEXT PRIMARY KEY,
+                       statut TEXT NOT NULL,
+                       taille INTEGER,
+                       sha256 TEXT,
+                       horodatage REAL,
+                       status_http INTEGER
+                   )"""
+            )
+
+    @contextmanager
+    def _connexion(self):
+        # Une connexion par opération: le manifeste est aussi utilisé depuis les threads du mode asynchrone
+        conn = sqlite3.connect(self.chemin, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def enregistrer(self, game_id, statut: str, contenu: bytes = None, status_http=None):
+        """
+        Enregistre (ou remplace) l'entrée d'un match.
+        :param game_id: L'identifiant du match
+        :param statut: OK, MANQUANT, CORROMPU, ABSENT ou ERREUR
+        :param contenu: Octets écrits sur le disque, pour la taille et l'empreinte
+        :param status_http: Code HTTP de la réponse de l'API
+        """
+        taille = len(contenu) if contenu is not None else None
+        sha256 = empreinte(contenu) if contenu is not None else None
+        with self._connexion() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO matchs VALUES (?, ?, ?, ?, ?, ?)",
+                (str(game_id), statut, taille, sha256, time.time(), status_http),
+            )
+
+    def enregistrer_telechargement(self, game_id, contenu: bytes, status_http=None):
+        """Enregistre un match qui vient d'être écrit sur le disque avec succès."""
+        self.enregistrer(game_id, OK, contenu, status_http)
+
+    def marquer(self, game_id, statut: str):
+        """Change le statut d'un match sans toucher à ses autres informations."""
+        with self._connexion() as conn:
+            conn.execute("UPDATE matchs SET statut = ? WHERE game_id = ?", (statut, str(game_id)))
+
+    def entrees(self) -> dict:
+        """
+        :return: Dictionnaire {game_id: (statut, taille, sha256, horodatage, status_http)}
+        """
+        with self._connexion() as conn:
+            lignes = conn.execute("SELECT * FROM matchs").fetchall()
+        return {ligne[0]: ligne[1:] for ligne in lignes}
+
+    def verifier(self, delai_absent: float = DELAI_ABSENT) -> list:
+        """
+        Vérifie chaque fichier du répertoire par rapport au manifeste.
+        Les fichiers présents sur le disque mais inconnus du manifeste (téléchargés avant son ajout)
+        sont validés en les décodant, puis ajoutés au manifeste.
+        :param delai_absent: Âge en secondes à partir duquel un match ABSENT (404) est redemandé
+                             (None pour ne jamais les redemander)
+        :return: Liste triée des IDs des matchs manquants, corrompus, en erreur ou absents depuis delai_absent,
+                 à télécharger de nouveau
+        """
+        entrees = self.entrees()
+        fichiers = lister_fichiers_matchs(self.base_dir)
+        a_retelecharger = []
+        maintenant = time.time()
+
+        for game_id in sorted(set(entrees) | set(fichiers)):
+            statut, taille, sha256, horodatage, _ = entrees.get(game_id, (None, None, None, None, None))
+            if statut == ABSENT:
+                if delai_absent is not None and maintenant - (horodatage or 0) >= delai_absent:
+                    a_retelecharger.append(game_id)
+                continue
+            if game_id not in fichiers:
+                # Un échec de téléchargement garde son statut (et son code HTTP) jusqu'à la reprise
+                if statut != ERREUR:
+                    self.marquer(game_id, MANQUANT)
+                a_retelecharger.append(game_id)
+                continue
+
+            contenu = lire_octets_match(fichiers[game_id])
+            if statut is None:
+                try:
+                    decoder_contenu(contenu, fichiers[game_id])
+                except (ValueError, OSError, EOFError):
+                    self.enregistrer(game_id, CORROMPU)
+                    a_retelecharger.append(game_id)
+                else:
+                    self.enregistrer(game_id, OK, contenu)
+            elif len(contenu) != taille or empreinte(contenu) != sha256:
+                self.marquer(game_id, CORROMPU)
+                a_retelecharger.append(game_id)
+            elif statut != OK:
+                self.marquer(game_id, OK)
+
+        print(f"Vérification de {self.base_dir}: {len(a_retelecharger)} match(s) manquant(s), corrompu(s), "
+              f"en erreur ou à revérifier")
+        return a_retelecharger
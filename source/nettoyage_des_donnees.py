@@ -39,6 +39,10 @@
 
 
 import os, json, pandas as pd
+from stockage_matchs import lire_fichier_match, lister_fichiers_matchs
+from extraction_evenements import TamponsEvenements, extraire_match, extraire_repertoire
+from etl_incremental import ETLIncremental
+from stockage_parquet import ecrire_dataset
 
 
 # In[2]:
@@ -52,8 +56,7 @@ def extract_player_names(file_path):
     
     # Open the JSON file with utf-8 encoding to avoid Unicode errors
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
+        data = lire_fichier_match(file_path)
         
         # Check if 'rosterSpots' exists in the data
         if 'rosterSpots' in data:
@@ -73,17 +76,23 @@ def process_all_files(directory):
     Process all JSON files in the specified directory and extract player names.
     """
     all_players = {}
-    for filename in os.listdir(directory):
-        if filename.endswith('.json'):
-            file_path = os.path.join(directory, filename)
-            print(f"Processing file: {file_path}")
-            player_names = extract_player_names(file_path)
-            all_players.update(player_names)
+    for file_path in lister_fichiers_matchs(directory).values():
+        print(f"Processing file: {file_path}")
+        player_names = extract_player_names(file_path)
+        all_players.update(player_names)
     return all_players
 
-# Example usage
+# Une seule passe sur les fichiers: chaque match n'est lu et décodé qu'une fois pour obtenir
+# les noms des joueurs, les types d'événements et les tirs/buts (réutilisés dans les cellules suivantes)
+# Avec N_WORKERS > 1, les fichiers sont répartis par lots entre N_WORKERS processus (ex. os.cpu_count()).
+# Le mode série (1) est le défaut: ce fichier exécute ses cellules à l'import, et sous macOS/Windows chaque
+# processus du pool réimporte le module principal; le mode parallèle est donc à activer dans le notebook.
+# Les fichiers illisibles sont affichés puis exclus (IGNORER_ECHECS = False pour lever une RuntimeError)
 nhl_data_directory = '../data/nhl_data'
-all_player_names = process_all_files(nhl_data_directory)
+N_WORKERS = 1
+IGNORER_ECHECS = True
+all_player_names, unique_event_types, df_combined = extraire_repertoire(nhl_data_directory, n_workers=N_WORKERS,
+                                                                        ignorer_echecs=IGNORER_ECHECS)
 print("Extracted Player Names:")
 for player_id, player_name in all_player_names.items():
     print(f"Player ID: {player_id}, Player Name: {player_name}")
@@ -97,17 +106,15 @@ for player_id, player_name in all_player_names.items():
 def extract_unique_event_types_from_folder(folder_path):
     event_types = set()  # Utiliser un set pour obtenir des types uniques
 
-    # Obtenir tous les fichiers JSON dans le répertoire
-    json_files = sorted(filter(lambda x: x.endswith('.json'), os.listdir(folder_path)))
+    # Obtenir tous les fichiers de matchs du répertoire (JSON, gzip, zstd ou archives par saison)
+    json_files = lister_fichiers_matchs(folder_path)
     
-    for filename in json_files:
-        file_path = os.path.join(folder_path, filename)
+    for file_path in json_files.values():
         print(f"Processing file: {file_path}")
         
         try:
             # Charger le fichier JSON
-            with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
+            data = lire_fichier_match(file_path)
 
             # Extraire les types d'événements du champ 'plays'
             plays = data.get('plays', [])
@@ -122,10 +129,7 @@ def extract_unique_event_types_from_folder(folder_path):
     # Retourner la liste des types d'événements uniques
     return sorted(event_types)
 
-# Exemple d'utilisation
-folder_path = '../data/nhl_data'
-unique_event_types = extract_unique_event_types_from_folder(folder_path)
-
+# Les types d'événements ont déjà été inventoriés pendant la passe unique (cellule précédente)
 # Afficher la liste des types d'événements uniques
 print("Types d'événements uniques dans tous les fichiers JSON :")
 print(unique_event_types)
@@ -140,153 +144,37 @@ print(unique_event_types)
 # In[4]:
 
 
-# Process_all_files est une fonction qui traite tous les fichiers dans le répertoire nhl_data_directory et extrait les noms des joueurs
-nhl_data_directory = '../data/nhl_data' 
-all_player_names = process_all_files(nhl_data_directory)
-
 class NHLPlayByPlayExtractor:
     
     def __init__(self, json_file, player_names):
         # Charger le fichier JSON
-        with open(json_file, 'r', encoding='utf-8') as file:
-            self.data = json.load(file)
+        self.data = lire_fichier_match(json_file)
         self.player_names = player_names  # Stocker le dictionnaire des noms des joueurs
     
     def extract_events(self):
-        events_list = []
-        
-        # Extraire les informations du match
-        game_id = self.data.get('id')
-        season = self.data.get('season')
-        team_home_Id = self.data['homeTeam']['id']
-        team_away_Id = self.data['awayTeam']['id']
-        team_home = self.data['homeTeam']['name']['default']
-        team_away = self.data['awayTeam']['name']['default']
-        
         # Extraire les actions pertinentes (uniquement les tirs et les buts)
-        plays = self.data.get('plays', [])
-        for play in plays:
-            event_type = play['typeDescKey']
-            
-            # Inclure uniquement les événements "Tir au but" et "But"
-            if event_type in ['shot-on-goal', 'goal']:
-                event_id = play.get('eventId', 'Unknown')  # Extraction de l'event_id555
-                period = play['periodDescriptor']['number']
-                period_time = play['timeInPeriod']
-                details = play.get('details', {})
-                eventTeamId=details.get('eventOwnerTeamId', None)
-                coordinate_x = details.get('xCoord', None)
-                coordinate_y = details.get('yCoord', None)
-                event_team = team_home if eventTeamId== self.data['homeTeam']['id'] else team_away
-            
-        
-          
-                # Récupérer les IDs des joueurs
-                shooter_id = play['details'].get('shootingPlayerId', 'Unknown')
-                goalie_id = play['details'].get('goalieInNetId', 'Unknown')
-                
-                # Remplacer les IDs par les noms à l'aide du dictionnaire player_names
-                shooter_name = self.player_names.get(shooter_id, 'Unknown')
-                goalie_name = self.player_names.get(goalie_id, 'Unknown')
-                
-                shot_type = play['details'].get('shotType', None)
-                
-                # Extraire la situation du champ situationCode
-
-
-                # Extraction du situationCode et des informations pertinentes
-                situation_code = play.get('details', {}).get('situationCode', None)
-
-                if situation_code:
-                  away_goalie = situation_code[0]  # 1 ou 0 pour le gardien extérieur
-                  away_skaters = int(situation_code[1])  # Nombre de joueurs extérieurs
-                  home_skaters = int(situation_code[2])  # Nombre de joueurs à domicile
-                  home_goalie = situation_code[3]  # 1 ou 0 pour le gardien à domicile
-
-                # Calcul de empty_net
-                  if eventTeamId== self.data['awayTeam']['id']:
-                    # L'équipe qui effectue l'événement est l'équipe extérieure
-                    if home_goalie == '1':
-                       empty_net = 0  # Le gardien de l'équipe à domicile est dans son filet
-                    else:
-                       empty_net = 1  # Le gardien de l'équipe à domicile a quitté son filet
-                  elif eventTeamId == self.data['homeTeam']['id']:
-                      # L'équipe qui effectue l'événement est l'équipe à domicile
-                    if away_goalie == '1':
-                       empty_net = 0  # Le gardien de l'équipe extérieure est dans son filet
-                    else:
-                       empty_net = 1  # Le gardien de l'équipe extérieure a quitté son filet
-                  else:
-                      empty_net = None  # Cas non traité
-
-               # Calcul de strength
-                  if eventTeamId == self.data['awayTeam']['id']:
-                  # Équipe extérieure effectue l'événement
-                    if away_skaters > home_skaters:
-                      strength = "PP"  # Avantage numérique (power play) pour l'équipe extérieure
-                    elif away_skaters < home_skaters:
-                      strength = "SH"  # Désavantage numérique (short-handed) pour l'équipe extérieure
-                    else:
-                      strength = "EV"  # Forces égales
-                  elif eventTeamId == self.data['homeTeam']['id']:
-                 # Équipe à domicile effectue l'événement
-                    if home_skaters > away_skaters:
-                      strength = "PP"  # Avantage numérique pour l'équipe à domicile
-                    elif home_skaters < away_skaters:
-                       strength = "SH"  # Désavantage numérique pour l'équipe à domicile
-                    else:
-                      strength = "EV"  # Forces égales
-                  else:
-                    strength = None  # Cas non traité
-                else:
-                  empty_net = None
-                  strength = None
-
-                # Ajouter les informations extraites à la liste des événements
-                events_list.append([
-                    game_id, season, team_home_Id,team_home,team_away_Id, team_away, event_id,event_type, eventTeamId,event_team, period,
-                    period_time, coordinate_x, coordinate_y, shooter_name, goalie_name, 
-                    shot_type, empty_net, strength
-                ])
-        
-        # Créer un DataFrame à partir de la liste des événements
-        columns = [
-            'gameId', 'season', 'teamHomeId', 'teamHome', 'teamAwayId','teamAway', 'event_id','eventType','eventTeamId','eventTeam',
-            'period', 'periodTime', 'coordinateX', 'coordinateY', 'shooterName', 
-            'goalieName', 'shotType', 'emptyNet', 'strength'
-        ]
-        return pd.DataFrame(events_list, columns=columns)
+        # Les valeurs sont écrites directement dans des colonnes typées (int32, float32, catégories)
+        tampons = TamponsEvenements()
+        extraire_match(self.data, self.player_names, tampons)
+        return tampons.vers_dataframe()
     
     
     @staticmethod
-    def clean_data(folder_path, player_names):
-        all_events = []  # Liste pour stocker les événements de tous les fichiers
-    
-        # Obtenir tous les fichiers JSON dans le répertoire
-        json_files = sorted(filter(lambda x: x.endswith('.json'), os.listdir(folder_path)))
-    
-        for filename in json_files:
-            file_path = os.path.join(folder_path, filename)
-            print(f"Traitement du fichier : {file_path}")
-        
-            try:
-                # Passer les noms des joueurs lors de la création d'une instance de NHLPlayByPlayExtractor
-                extractor = NHLPlayByPlayExtractor(file_path, player_names)
-                df = extractor.extract_events()
-                all_events.append(df)
-            except Exception as e:
-                print(f"Erreur lors du traitement du fichier {file_path} : {e}")
-    
-        # Combiner tous les DataFrames en un seul
-        if all_events:
-            final_df = pd.concat(all_events, ignore_index=True)
-            return final_df
-        else:
-            return pd.DataFrame()  # Retourner un DataFrame vide s'il n'y a pas d'événements
-
-
-json_directory_path = '../data/nhl_data'
-df_combined = NHLPlayByPlayExtractor.clean_data(json_directory_path, all_player_names)
+    def clean_data(folder_path, player_names, n_workers=1, taille_lot=64, ignorer_echecs=True):
+        """
+        Extrait les tirs et les buts de tous les fichiers du répertoire.
+        :param n_workers: Nombre de processus (1 pour traiter les fichiers en série)
+        :param taille_lot: Nombre de fichiers envoyés à un processus à la fois
+        :param ignorer_echecs: Affiche et exclut les fichiers illisibles (par défaut, comme auparavant); si faux,
+                               lève une RuntimeError à la fin de l'extraction
+        """
+        _, _, final_df = extraire_repertoire(folder_path, player_names, n_workers=n_workers, taille_lot=taille_lot,
+                                             ignorer_echecs=ignorer_echecs)
+        return final_df
+
+
+# df_combined provient de la passe unique; NHLPlayByPlayExtractor.clean_data(nhl_data_directory, all_player_names,
+# n_workers=N_WORKERS) produit le même résultat mais relit tous les fichiers
 
 # Afficher le DataFrame combiné
 print(df_combined)
@@ -294,6 +182,9 @@ print(df_combined)
 # Enregistrer éventuellement dans un fichier CSV
 df_combined.to_csv('../data/nhl_play_by_play_combined.csv', index=False) 
 
+# Même contenu en Parquet, partitionné par saison et type de match (lecture rapide avec stockage_parquet.charger_dataset)
+ecrire_dataset(df_combined, '../data/parquet/nhl_play_by_play')
+
 
 # #### Verifier les 10 premieres lignes du dataframe des données nettoyées:
 
@@ -303,3 +194,23 @@ df_combined.to_csv('../data/nhl_play_by_play_combined.csv', index=False)
 # Afficher les 10 premières lignes du DataFrame
 print(df_combined.head(10))
 
+
+# #### Mise à jour incrémentale
+# 
+# Pour une mise à jour quotidienne, seuls les matchs nouveaux ou modifiés depuis la dernière exécution sont extraits
+# (taille, date de modification et empreinte de chaque fichier conservées dans _etat_etl.json).
+# Les lignes de chaque match sont écrites dans une partition par saison et par match, puis seuls les fichiers
+# Parquet de ces matchs sont réécrits (un fichier par match): le coût dépend du nombre de matchs nouveaux, pas du
+# corpus. Un match qui ne peut plus être extrait est retiré des partitions (et signalé) plutôt que d'y laisser
+# ses anciennes lignes.
+
+# In[6]:
+
+
+etl = ETLIncremental('../data/nhl_play_by_play', n_workers=N_WORKERS)
+print(etl.executer(nhl_data_directory))
+etl.mettre_a_jour_dataset('../data/parquet/nhl_play_by_play')
+
+# Le CSV combiné est reconstruit en entier à partir de toutes les partitions: à n'exécuter que si un notebook
+# en a besoin
+# etl.exporter_csv('../data/nhl_play_by_play_combined.csv')
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Pipeline des caractéristiques des tirs (Q2 et Q4), de l'extraction des actions jusqu'aux données prétraitées
+# pour les modèles. Chaque étape est mise en cache: après une modification, seule l'étape modifiée et celles
+# qui en dépendent sont recalculées.
+# Usage: python pipeline_caracteristiques.py [répertoire des matchs]
+
+import os
+import sys
+
+import pandas as pd
+
+from pipeline_etapes import Pipeline
+from stockage_matchs import signature_repertoire
+from extraction_evenements import TYPES_TIRS, extraire_actions
+from caracteristiques import calcul_distance_angle, ajouter_evenement_precedent, decoder_situation
+from data_preprocess import pretraiter
+from pretraitement import PretraitementTirs
+
+
+def etape_actions(dossier, signature: str) -> pd.DataFrame:
+    # La signature des fichiers n'est utilisée que pour la clé du cache; le nombre de processus ne change pas
+    # le résultat et n'en fait donc pas partie
+    return extraire_actions(dossier, n_workers=os.cpu_count())
+
+
+def etape_distance_angle(actions: pd.DataFrame) -> pd.DataFrame:
+    return calcul_distance_angle(actions.copy())
+
+
+def etape_evenement_precedent(actions: pd.DataFrame) -> pd.DataFrame:
+    # Sur le flux complet des actions: l'action précédente d'un tir n'est pas forcément un tir
+    return ajouter_evenement_precedent(actions.copy())
+
+
+def etape_tirs(actions: pd.DataFrame, colonnes_requises: list) -> pd.DataFrame:
+    """Tirs au but et buts seulement, sans les lignes où une colonne requise manque, avec la cible isGoal."""
+    tirs = actions[actions['eventType'].isin(TYPES_TIRS)].dropna(subset=colonnes_requises)
+    tirs = tirs.reset_index(drop=True)
+    tirs['eventType'] = tirs['eventType'].cat.remove_unused_categories()
+    tirs['isGoal'] = (tirs['eventType'] == 'goal').astype('int8')
+    return tirs
+
+
+def etape_situation(tirs: pd.DataFrame) -> pd.DataFrame:
+    """Filet vide, forces et nombre de patineurs de chaque équipe, décodés du situationCode."""
+    situation = decoder_situation(tirs['situationCode'], tirs['eventTeamId'], tirs['teamHomeId'], tirs['teamAwayId'])
+    colonnes = ['emptyNet', 'strength', 'non_gardiens_amicaux', 'non_gardiens_adverses']
+    return pd.concat([tirs, situation[colonnes]], axis=1)
+
+
+def etape_encodage(tirs: pd.DataFrame, colonnes: list) -> pd.DataFrame:
+    """Encodage des colonnes catégorielles en entiers (catégories triées, comme LabelEncoder)."""
+    tirs = tirs.copy()
+    for colonne in colonnes:
+        valeurs = tirs[colonne].astype('category')
+        tirs[colonne] = valeurs.cat.reorder_categories(sorted(valeurs.cat.categories)).cat.codes
+    return tirs
+
+
+def etape_entrainement(tirs: pd.DataFrame, saisons: list) -> pd.DataFrame:
+    """Tirs des saisons d'entraînement (années de début, ex. 2016 pour 20162017)."""
+    return tirs[(tirs['season'] // 10000).isin(saisons)].reset_index(drop=True)
+
+
+def etape_pretraitement_ajuste(tirs: pd.DataFrame) -> PretraitementTirs:
+    """Bornes MinMax et vocabulaires des catégories, ajustés sur les tirs d'entraînement (à joindre au modèle)."""
+    return PretraitementTirs().ajuster(tirs)
+
+
+def etape_pretraitement(tirs: pd.DataFrame, pretraitement: PretraitementTirs) -> pd.DataFrame:
+    """Normalisation MinMax et encodage one-hot de data_preprocess.pretraiter, avec le prétraitement ajusté."""
+    return pretraiter(tirs, pretraitement)[0]
+
+
+def construire_pipeline(dossier, cache_dir: str = '../data/cache_pipeline',
+                        saisons_entrainement=(2016, 2017, 2018, 2019)) -> Pipeline:
+    """
+    Déclare les étapes du pipeline des caractéristiques.
+    :param dossier: Répertoire (ou liste de répertoires) des fichiers de matchs
+    :param cache_dir: Répertoire du cache des étapes
+    :param saisons_entrainement: Saisons (années de début) utilisées pour l'entraînement
+    :return: Pipeline, dont les étapes 'tirs_encodes' (Q4_data), 'pretraitement' (Q4_train prétraité) et
+             'pretraitement_ajuste' (PretraitementTirs à joindre au modèle) sont les principaux résultats
+    """
+    pipeline = Pipeline(cache_dir)
+    pipeline.ajouter('actions', etape_actions,
+                     parametres={'dossier': dossier, 'signature': signature_repertoire(dossier)})
+    pipeline.ajouter('distance_angle', etape_distance_angle, ['actions'])
+    pipeline.ajouter('evenement_precedent', etape_evenement_precedent, ['distance_angle'])
+    pipeline.ajouter('tirs', etape_tirs, ['evenement_precedent'],
+                     {'colonnes_requises': ['coordinateX', 'coordinateY', 'shotType']})
+    pipeline.ajouter('situation', etape_situation, ['tirs'])
+    pipeline.ajouter('tirs_encodes', etape_encodage, ['situation'], {'colonnes': ['shotType', 'lastEvent']})
+    pipeline.ajouter('entrainement', etape_entrainement, ['tirs_encodes'],
+                     {'saisons': list(saisons_entrainement)})
+    pipeline.ajouter('pretraitement_ajuste', etape_pretraitement_ajuste, ['entrainement'])
+    pipeline.ajouter('pretraitement', etape_pretraitement, ['entrainement', 'pretraitement_ajuste'])
+    return pipeline
+
+
+if __name__ == '__main__':
+    dossier = sys.argv[1] if len(sys.argv) > 1 else '../data/nhl_data'
+    pipeline = construire_pipeline(dossier)
+    donnees = pipeline.executer('pretraitement')
+    print(donnees.shape)
+    print(f"{pipeline.nettoyer_cache()} ancien(s) résultat(s) supprimé(s) du cache")
@@ -0,0 +1,225 @@
+import io
+import os
+import json
+import types
+import pickle
+import inspect
+
+import pandas as pd
+
+from manifeste import empreinte
+from stockage_matchs import ecrire_atomique
+
+
+def _module_de(objet):
+    # Module où un objet référencé par une étape est défini (None pour une valeur ordinaire)
+    if isinstance(objet, types.ModuleType):
+        return objet
+    if isinstance(objet, (types.FunctionType, type)):
+        return inspect.getmodule(objet)
+    return None
+
+
+def _objets_references(code: types.CodeType, espace_noms: dict):
+    # Noms globaux utilisés par une fonction, y compris dans ses fonctions imbriquées et compréhensions
+    for nom in code.co_names:
+        if nom in espace_noms:
+            yield espace_noms[nom]
+    for constante in code.co_consts:
+        if isinstance(constante, types.CodeType):
+            yield from _objets_references(constante, espace_noms)
+
+
+def sources_appelees(fonction) -> dict:
+    """
+    Code source dont dépend une fonction d'étape, pour la clé du cache: son propre source, celui des fonctions de
+    son module qu'elle appelle (récursivement), et le fichier complet de chaque module du projet qu'elle utilise,
+    directement ou par les imports de ces modules. Les modules du projet sont ceux du répertoire du module de la
+    fonction (source/); les bibliothèques installées sont ignorées.
+    :return: Dictionnaire {nom qualifié de fonction ou nom de module: code source}
+    """
+    module = inspect.getmodule(fonction)
+    if module is None or not getattr(module, '__file__', None):
+        return {}
+    dossier = os.path.dirname(os.path.abspath(module.__file__))
+
+    def du_projet(autre) -> bool:
+        fichier = getattr(autre, '__file__', None)
+        return fichier is not None and os.path.dirname(os.path.abspath(fichier)) == dossier
+
+    sources = {}
+    fonctions, modules = [fonction], []
+    while fonctions:
+        courante = fonctions.pop()
+        nom = f"{courante.__module__}.{courante.__qualname__}"
+        if nom in sources:
+            continue
+        sources[nom] = inspect.getsource(courante)
+        for objet in _objets_references(courante.__code__, courante.__globals__):
+            autre = _module_de(objet)
+            if autre is module and isinstance(objet, types.FunctionType):
+                fonctions.append(objet)
+            elif autre is not None and autre is not module and du_projet(autre):
+                modules.append(autre)
+
+    while modules:
+        autre = modules.pop()
+        if autre.__name__ in sources:
+            continue
+        with open(autre.__file__, 'r', encoding='utf-8') as f:
+            sources[autre.__name__] = f.read()
+        for objet in vars(autre).values():
+            dependance = _module_de(objet)
+            if dependance is not None and dependance is not module and du_projet(dependance):
+                modules.append(dependance)
+    return sources
+
+
+class Etape:
+    """
+    Étape d'un pipeline: une fonction appelée avec les résultats de ses étapes d'entrée (dans l'ordre),
+    puis ses paramètres nommés. La fonction ne doit pas modifier ses entrées, partagées avec les autres étapes.
+    """
+
+    def __init__(self, nom: str, fonction, entrees=(), parametres: dict = None, version: str = ''):
+        """
+        :param nom: Nom unique de l'étape
+        :param fonction: Fonction de l'étape, fonction(*resultats_des_entrees, **parametres)
+        :param entrees: Noms des étapes dont les résultats sont passés à la fonction
+        :param parametres: Paramètres de la fonction (sérialisables en JSON)
+        :param version: Version à changer à la main lorsque le comportement change ailleurs que dans le code
+                        suivi par sources_appelees (ex. une bibliothèque installée ou un fichier de données)
+        """
+        self.nom = nom
+        self.fonction = fonction
+        self.entrees = list(entrees)
+        self.parametres = dict(parametres or {})
+        self.version = version
+
+    def version_code(self) -> str:
+        """
+        Empreinte du code source de la fonction, du code du projet qu'elle appelle (voir sources_appelees)
+        et de la version déclarée.
+        """
+        try:
+            sources = sources_appelees(self.fonction)
+        except (OSError, TypeError):
+            sources = {}
+        if not sources:
+            sources = {'fonction': getattr(self.fonction, '__qualname__', repr(self.fonction))}
+        return empreinte(json.dumps([sources, self.version], sort_keys=True).encode('utf-8'))
+
+
+class Pipeline:
+    """
+    Graphe acyclique d'étapes dont chaque résultat est mis en cache sur le disque, sous une clé calculée à partir
+    de la version du code de l'étape, de ses paramètres et des clés de ses étapes d'entrée.
+    Modifier une étape change sa clé et celles de toutes les étapes en aval: seules celles-ci sont recalculées,
+    les autres sont relues du cache (et seulement si une étape à recalculer en a besoin).
+    """
+
+    def __init__(self, cache_dir: str = '../data/cache_pipeline'):
+        """
+        :param cache_dir: Répertoire du cache, un sous-répertoire par étape
+        """
+        self.cache_dir = cache_dir
+        self.etapes = {}
+
+    def ajouter(self, nom: str, fonction, entrees=(), parametres: dict = None, version: str = '') -> Etape:
+        """
+        Déclare une étape. Ses entrées doivent déjà être déclarées, ce qui garantit l'absence de cycle.
+        :return: L'étape ajoutée
+        """
+        if nom in self.etapes:
+            raise RuntimeError(f"Étape déjà déclarée: {nom}")
+        inconnues = [entree for entree in entrees if entree not in self.etapes]
+        if inconnues:
+            raise RuntimeError(f"Entrées non déclarées pour l'étape {nom}: {inconnues}")
+        etape = self.etapes[nom] = Etape(nom, fonction, entrees, parametres, version)
+        return etape
+
+    def cles(self) -> dict:
+        """
+        :return: Dictionnaire {nom de l'étape: clé de cache}, dans l'ordre de déclaration
+        """
+        cles = {}
+        for nom, etape in self.etapes.items():
+            description = {
+                'nom': nom,
+                'code': etape.version_code(),
+                'parametres': etape.parametres,
+                'entrees': [cles[entree] for entree in etape.entrees],
+            }
+            cles[nom] = empreinte(json.dumps(description, sort_keys=True, default=str).encode('utf-8'))
+        return cles
+
+    def _chemin(self, nom: str, cle: str, resultat=None) -> str:
+        # Les DataFrames sont stockés en Parquet (types conservés), les autres résultats en pickle
+        base = os.path.join(self.cache_dir, nom, cle[:32])
+        if resultat is None:
+            return next((base + extension for extension in ('.parquet', '.pkl') if os.path.exists(base + extension)),
+                        None)
+        return base + ('.parquet' if isinstance(resultat, pd.DataFrame) else '.pkl')
+
+    def _sauvegarder(self, nom: str, cle: str, resultat):
+        chemin = self._chemin(nom, cle, resultat)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        if chemin.endswith('.parquet'):
+            tampon = io.BytesIO()
+            resultat.to_parquet(tampon, index=False)
+            contenu = tampon.getvalue()
+        else:
+            contenu = pickle.dumps(resultat, protocol=pickle.HIGHEST_PROTOCOL)
+        ecrire_atomique(chemin, contenu)
+
+    @staticmethod
+    def _charger(chemin: str):
+        if chemin.endswith('.parquet'):
+            return pd.read_parquet(chemin)
+        with open(chemin, 'rb') as f:
+            return pickle.load(f)
+
+    def executer(self, cible: str = None, forcer=()):
+        """
+        Produit le résultat d'une étape en ne recalculant que les étapes absentes du cache.
+        :param cible: Nom de l'étape à produire (par défaut la dernière déclarée)
+        :param forcer: Noms des étapes à recalculer même si leur résultat est en cache
+        :return: Le résultat de l'étape cible
+        """
+        cible = cible if cible is not None else list(self.etapes)[-1]
+        cles = self.cles()
+        resultats = {}
+
+        def obtenir(nom):
+            if nom in resultats:
+                return resultats[nom]
+            etape = self.etapes[nom]
+            chemin = self._chemin(nom, cles[nom])
+            if chemin is not None and nom not in forcer:
+                print(f"Étape {nom}: lue du cache ({cles[nom][:12]})")
+                resultats[nom] = self._charger(chemin)
+            else:
+                valeurs = [obtenir(entree) for entree in etape.entrees]
+                print(f"Étape {nom}: calcul ({cles[nom][:12]})")
+                resultats[nom] = etape.fonction(*valeurs, **etape.parametres)
+                self._sauvegarder(nom, cles[nom], resultats[nom])
+            return resultats[nom]
+
+        return obtenir(cible)
+
+    def nettoyer_cache(self) -> int:
+        """
+        Supprime du cache les résultats qui ne correspondent plus à la clé actuelle de leur étape.
+        :return: Nombre de fichiers supprimés
+        """
+        cles = self.cles()
+        supprimes = 0
+        for nom in self.etapes:
+            dossier = os.path.join(self.cache_dir, nom)
+            if not os.path.isdir(dossier):
+                continue
+            for fichier in os.listdir(dossier):
+                if os.path.splitext(fichier)[0] != cles[nom][:32]:
+                    os.remove(os.path.join(dossier, fichier))
+                    supprimes += 1
+        return supprimes
@@ -6,17 +6,25 @@ from sklearn.metrics import roc_curve, auc
 from sklearn.calibration import calibration_curve, CalibrationDisplay
 import matplotlib.ticker as ticker
 
-def tracer_ROC(y_val, pred_probs):
+# Les fonctions dessiner_* tracent sur les axes reçus (API orientée objet, sans état global de pyplot) et sont
+# utilisées par construction_figures.py; les fonctions tracer_* les affichent dans un notebook et les sauvegardent.
+
+def _afficher(fig, fichier):
+    # Sauvegarde avant l'affichage: après plt.show(), la figure courante peut être vide
+    fig.tight_layout()
+    fig.savefig(fichier)
+    plt.show()
+
+def dessiner_ROC(ax, y_val, pred_probs):
     """
-    Trace une courbe ROC pour les valeurs réelles (y_val) et les probabilités prédites, et calcule l'AUC.
+    Trace sur ax la courbe ROC pour les valeurs réelles (y_val) et les probabilités prédites, avec son AUC.
     """
     probs_isgoal = pred_probs[:, 1]
     fpr, tpr, _ = roc_curve(y_val, probs_isgoal)
     roc_auc = auc(fpr, tpr)
 
-    plt.figure(figsize=(8, 6))
     lw = 2
-    plt.plot(
+    ax.plot(
         fpr,
         tpr,
         color="darkorange",
@@ -24,20 +32,23 @@ def tracer_ROC(y_val, pred_probs):
         label="Courbe ROC (aire = %0.2f)" % roc_auc,
     )
     # Inclure une ligne de base d'un classificateur aléatoire (50% de chance)
-    plt.plot([0, 1], [0, 1], color="navy", lw=lw, linestyle="--")
-    plt.xlim([0.0, 1.0])
-    plt.ylim([0.0, 1.05])
-    plt.xlabel("Taux de faux positifs", fontsize=16)
-    plt.ylabel("Taux de vrais positifs", fontsize=16)
-    plt.title('Courbes ROC', fontsize=16)
-    plt.legend(loc="lower right")
-
-    ax = plt.gca()
+    ax.plot([0, 1], [0, 1], color="navy", lw=lw, linestyle="--")
+    ax.set_xlim([0.0, 1.0])
+    ax.set_ylim([0.0, 1.05])
+    ax.set_xlabel("Taux de faux positifs", fontsize=16)
+    ax.set_ylabel("Taux de vrais positifs", fontsize=16)
+    ax.set_title('Courbes ROC', fontsize=16)
+    ax.legend(loc="lower right")
     ax.grid()
     ax.set_facecolor('0.95')
-    plt.tight_layout()
-    plt.savefig('roc_curve.png')
-    plt.show()
+
+def tracer_ROC(y_val, pred_probs):
+    """
+    Trace une courbe ROC pour les valeurs réelles (y_val) et les probabilités prédites, et calcule l'AUC.
+    """
+    fig, ax = plt.subplots(figsize=(8, 6))
+    dessiner_ROC(ax, y_val, pred_probs)
+    _afficher(fig, 'roc_curve.png')
 
 def calculer_percentile(pred_probs, y_val):
     """
@@ -89,41 +100,43 @@ def taux_buts(df_percentile):
     
     return df_taux_buts
 
-def tracer_taux_buts(df_taux_buts):
+def dessiner_taux_buts(ax, df_taux_buts):
     """
-    Trace le taux de buts en fonction des percentiles.
+    Trace sur ax le taux de buts en fonction des percentiles.
     """
-    plt.figure(figsize=(8, 6))
-    ax = plt.gca()
     ax.grid()
     ax.set_facecolor('0.95')
     x = df_taux_buts['Percentile']
     y = df_taux_buts['Taux']
-    plt.plot(x, y)
+    ax.plot(x, y)
     ax.set_ylim([0, 100])
     ax.set_xlim([0, 100])
     ax.invert_xaxis()
     ticks_majeurs = np.arange(0, 110, 10)
     ax.set_xticks(ticks_majeurs)
     ax.set_yticks(ticks_majeurs)
-    plt.xlabel('Percentile du modèle de probabilité de tir', fontsize=16)
-    plt.title('Taux de buts', fontsize=16)
-    plt.ylabel('Buts / (Tirs + Buts)%', fontsize=16)
-    plt.savefig('goal_rate_plot.png')
-    plt.show()
+    ax.set_xlabel('Percentile du modèle de probabilité de tir', fontsize=16)
+    ax.set_title('Taux de buts', fontsize=16)
+    ax.set_ylabel('Buts / (Tirs + Buts)%', fontsize=16)
 
-def tracer_taux_buts_cumules(df_percentile):
+def tracer_taux_buts(df_taux_buts):
     """
-    Trace les taux cumulatifs de buts en fonction des percentiles.
+    Trace le taux de buts en fonction des percentiles.
+    """
+    fig, ax = plt.subplots(figsize=(8, 6))
+    dessiner_taux_buts(ax, df_taux_buts)
+    _afficher(fig, 'goal_rate_plot.png')
+
+def dessiner_taux_buts_cumules(ax, df_percentile):
+    """
+    Trace sur ax les taux cumulatifs de buts en fonction des percentiles.
     """
-    plt.figure(figsize=(8, 6))
     df_seulement_but = df_percentile[df_percentile['isGoal'] == 1]
-    ax = sns.ecdfplot(data=df_seulement_but, x=100 - df_seulement_but.Percentile)
-    ax = plt.gca()
+    sns.ecdfplot(data=df_seulement_but, x=100 - df_seulement_but.Percentile, ax=ax)
     ax.grid()
     ax.set_facecolor('0.95')
-    plt.yticks(np.arange(0, 1.05, 0.1))
-    plt.xticks(np.arange(0, 100 * 1.01, 10))
+    ax.set_yticks(np.arange(0, 1.05, 0.1))
+    ax.set_xticks(np.arange(0, 100 * 1.01, 10))
     xvals = ax.get_xticks()
     ax.set_xticklabels(100 - xvals.astype(np.int32), fontsize=16)
     yvals = ax.get_yticks()
@@ -131,24 +144,34 @@ def tracer_taux_buts_cumules(df_percentile):
     ax.set_xlabel('Percentile du modèle de probabilité de tir', fontsize=16)
     ax.set_ylabel('Proportion', fontsize=16)
     ax.set_title(f"% Cumulatif des buts", fontsize=16)
-    plt.grid(color='gray', linestyle='--', linewidth=0.5)
-    plt.savefig('cumulative_goal_rate.png')
+    ax.grid(color='gray', linestyle='--', linewidth=0.5)
     ax.legend(['Régression Logistique'])
-    plt.show()
 
-def tracer_courbe_calibration(y_val, pred_probs):
+def tracer_taux_buts_cumules(df_percentile):
     """
-    Trace une courbe de calibration pour évaluer les prédictions du modèle.
+    Trace les taux cumulatifs de buts en fonction des percentiles.
+    """
+    fig, ax = plt.subplots(figsize=(8, 6))
+    dessiner_taux_buts_cumules(ax, df_percentile)
+    _afficher(fig, 'cumulative_goal_rate.png')
+
+def dessiner_courbe_calibration(ax, y_val, pred_probs):
     """
-    plt.figure(figsize=(8, 6))
-    ax = CalibrationDisplay.from_predictions(y_val['isGoal'], pred_probs[:, 1], n_bins=50)
-    ax = plt.gca()
+    Trace sur ax une courbe de calibration pour évaluer les prédictions du modèle.
+    """
+    CalibrationDisplay.from_predictions(y_val['isGoal'], pred_probs[:, 1], n_bins=50, ax=ax)
     ax.grid()
     ax.set_facecolor('0.95')
     ax.set_title(f"Courbe de Calibration", fontsize=16)
-    plt.ylabel('Fraction de positifs', fontsize=16)
-    plt.xlabel('Probabilité prédite moyenne', fontsize=16)
+    ax.set_ylabel('Fraction de positifs', fontsize=16)
+    ax.set_xlabel('Probabilité prédite moyenne', fontsize=16)
     ax.xaxis.set_major_locator(ticker.MultipleLocator(0.1))
     ax.yaxis.set_major_locator(ticker.MultipleLocator(0.1))
-    plt.savefig('calibration_curve.png')
-    plt.show()
\ No newline at end of file
+
+def tracer_courbe_calibration(y_val, pred_probs):
+    """
+    Trace une courbe de calibration pour évaluer les prédictions du modèle.
+    """
+    fig, ax = plt.subplots(figsize=(8, 6))
+    dessiner_courbe_calibration(ax, y_val, pred_probs)
+    _afficher(fig, 'calibration_curve.png')
\ No newline at end of file
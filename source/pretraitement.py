@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+# Module partagé par l'entraînement (data_preprocess.py, train_models.py, pipeline_caracteristiques.py) et le service
+# Flask (docker-project_vf/serving/app.py): il ne dépend que de numpy et pandas. Ce fichier en est la seule copie,
+# installée comme module de premier niveau par setup.py et copiée dans l'image du service (docker-compose.yaml).
+
+# Caractéristiques normalisées (MinMax) et caractéristiques encodées en one-hot
+COLONNES_CONTINUES = ['distance', 'angle', 'speed', 'chang_angle']
+COLONNES_CATEGORIELLES = ['shotType', 'lastEvent', 'period', 'non_gardiens_amicaux', 'non_gardiens_adverses']
+
+
+class PretraitementTirs:
+    """
+    Prétraitement ajusté une seule fois sur les données d'entraînement: bornes MinMax des caractéristiques
+    continues et vocabulaire fixe de chaque caractéristique catégorielle. Il produit ensuite toujours les mêmes
+    colonnes, dans le même ordre, quelles que soient les catégories présentes dans les lignes à transformer
+    (une catégorie inconnue ou manquante n'active aucune colonne, comme pd.get_dummies).
+    """
+
+    def __init__(self, colonnes_continues=None, colonnes_categorielles=None, drop_first: bool = True):
+        """
+        :param colonnes_continues: Colonnes normalisées entre 0 et 1 (par défaut COLONNES_CONTINUES)
+        :param colonnes_categorielles: Colonnes encodées en one-hot (par défaut COLONNES_CATEGORIELLES)
+        :param drop_first: Retirer la première catégorie de chaque colonne, comme get_dummies(drop_first=True)
+        """
+        self.colonnes_continues = list(colonnes_continues or COLONNES_CONTINUES)
+        self.colonnes_categorielles = list(colonnes_categorielles or COLONNES_CATEGORIELLES)
+        self.drop_first = drop_first
+        self.echelle = None     # 1 / (max - min) par colonne continue (1 si max == min)
+        self.decalage = None    # -min * echelle
+        self.vocabulaires = {}  # {colonne catégorielle: catégories triées vues à l'entraînement}
+
+    def ajuster(self, data: pd.DataFrame) -> 'PretraitementTirs':
+        """
+        Calcule les bornes MinMax et les vocabulaires sur les données d'entraînement.
+        :return: self
+        """
+        valeurs = data[self.colonnes_continues].to_numpy(dtype=np.float64)
+        minimum = np.nanmin(valeurs, axis=0)
+        etendue = np.nanmax(valeurs, axis=0) - minimum
+        self.echelle = 1.0 / np.where(etendue == 0, 1.0, etendue)
+        self.decalage = -minimum * self.echelle
+        self.vocabulaires = {colonne: list(pd.Categorical(data[colonne].dropna()).categories)
+                             for colonne in self.colonnes_categorielles}
+        return self
+
+    @property
+    def noms_colonnes(self) -> list:
+        """Noms des colonnes de la matrice produite par transformer, dans l'ordre."""
+        premier = 1 if self.drop_first else 0
+        noms = list(self.colonnes_continues)
+        for colonne in self.colonnes_categorielles:
+            noms.extend(f"{colonne}_{categorie}" for categorie in self.vocabulaires[colonne][premier:])
+        return noms
+
+    def transformer(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Transforme des lignes de tirs brutes en matrice pour le modèle, colonnes dans l'ordre de noms_colonnes.
+        :param data: DataFrame avec les colonnes continues et catégorielles (les autres sont ignorées)
+        :return: np.ndarray float64 de forme (n, len(noms_colonnes))
+        """
+        if self.echelle is None:
+            raise RuntimeError("PretraitementTirs doit être ajusté (ajuster) avant d'être utilisé")
+        n = len(data)
+        premier = 1 if self.drop_first else 0
+        matrice = np.zeros((n, len(self.noms_colonnes)), dtype=np.float64)
+
+        continues = data[self.colonnes_continues].to_numpy(dtype=np.float64, copy=True)
+        continues *= self.echelle
+        continues += self.decalage
+        matrice[:, :len(self.colonnes_continues)] = continues
+
+        lignes = np.arange(n)
+        debut = len(self.colonnes_continues)
+        for colonne in self.colonnes_categorielles:
+            vocabulaire = self.vocabulaires[colonne]
+            codes = pd.Categorical(data[colonne], categories=vocabulaire).codes
+            actif = codes >= premier  # -1: catégorie inconnue ou manquante; 0: catégorie retirée
+            matrice[lignes[actif], debut + codes[actif] - premier] = 1.0
+            debut += len(vocabulaire) - premier
+        return matrice
+
+    def transformer_dataframe(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Même disposition que l'ancien prétraitement (MinMaxScaler puis get_dummies): les colonnes continues sont
+        remplacées, les catégorielles retirées et leurs indicatrices ajoutées à la fin.
+        """
+        matrice = self.transformer(data)
+        k = len(self.colonnes_continues)
+        resultat = data.drop(columns=self.colonnes_categorielles)
+        resultat[self.colonnes_continues] = matrice[:, :k]
+        indicatrices = pd.DataFrame(matrice[:, k:].astype(int), columns=self.noms_colonnes[k:], index=data.index)
+        return pd.concat([resultat, indicatrices], axis=1)
+
+
+class ModeleXG:
+    """
+    Modèle entraîné sur les données de PretraitementTirs, sérialisé avec son prétraitement: le service reçoit
+    des tirs bruts et applique exactement la transformation de l'entraînement.
+    """
+
+    def __init__(self, modele, pretraitement: PretraitementTirs, colonnes=None):
+        """
+        :param modele: Modèle entraîné (predict_proba et predict)
+        :param pretraitement: PretraitementTirs ajusté sur les données d'entraînement
+        :param colonnes: Colonnes d'entraînement, dans l'ordre, si le modèle a été entraîné sur la sortie de
+                         transformer_dataframe (ex. train_models.py); None s'il l'a été sur la matrice de transformer
+        """
+        self.modele = modele
+        self.pretraitement = pretraitement
+        self.colonnes = list(colonnes) if colonnes is not None else None
+
+    def caracteristiques(self, data: pd.DataFrame):
+        """
+        :return: Les caractéristiques des tirs, dans la disposition vue par le modèle à l'entraînement
+        """
+        if self.colonnes is None:
+            return self.pretraitement.transformer(data)
+        return self.pretraitement.transformer_dataframe(data)[self.colonnes]
+
+    def predict_proba(self, data: pd.DataFrame) -> np.ndarray:
+        return self.modele.predict_proba(self.caracteristiques(data))
+
+    def predict(self, data: pd.DataFrame) -> np.ndarray:
+        return self.modele.predict(self.caracteristiques(data))
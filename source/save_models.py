@@ -1,8 +1,19 @@
 import joblib
-import decision_tree_model
 
-# Step 2.1: Save the model locally
-model_filename = "decision_tree_model.pkl"
-joblib.dump(decision_tree_model, model_filename)
+from pretraitement import ModeleXG
 
-print(f"Model saved locally as {model_filename}")
+
+def sauvegarder_modele(modele, pretraitement, model_filename, colonnes=None):
+    """
+    Sauvegarde un modèle entraîné avec son prétraitement ajusté, en un seul objet ModeleXG: c'est ce fichier que
+    le service charge (docker-project_vf/serving/app.py) pour prédire à partir de tirs bruts.
+    :param modele: Modèle entraîné
+    :param pretraitement: PretraitementTirs ajusté sur les données d'entraînement du modèle
+    :param model_filename: Fichier .pkl à écrire
+    :param colonnes: Colonnes d'entraînement du modèle, dans l'ordre (voir ModeleXG)
+    :return: Le ModeleXG sauvegardé
+    """
+    modele_xg = ModeleXG(modele, pretraitement, colonnes)
+    joblib.dump(modele_xg, model_filename)
+    print(f"Model saved locally as {model_filename}")
+    return modele_xg
@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CODES_A_RELANCER = (429, 500, 502, 503, 504)
+
+# Résultats possibles d'une tentative de téléchargement
+HIT = 'hit'          # Fichier déjà présent sur le disque
+MISS = 'miss'        # Absent du disque, téléchargé avec succès
+RETRY = 'retry'      # Réponse 429/5xx, la requête sera relancée
+ABSENT = 'absent'    # 404 permanent: le match n'existe pas
+ERREUR = 'erreur'    # Échec après toutes les tentatives
+
+
+class PolitiqueRelance:
+    """
+    Politique de relance avec attente exponentielle et gigue (« full jitter ») sur les réponses 429/5xx.
+    L'en-tête Retry-After, lorsqu'il est présent, est prioritaire sur le calcul exponentiel.
+    """
+
+    def __init__(self, max_tentatives: int = 5, delai_base: float = 1.0, delai_max: float = 60.0,
+                 codes=CODES_A_RELANCER):
+        """
+        :param max_tentatives: Nombre maximal de tentatives par requête (première tentative incluse)
+        :param delai_base: Délai en secondes de la première relance
+        :param delai_max: Délai maximal en secondes entre deux tentatives
+        :param codes: Codes HTTP déclenchant une relance
+        """
+        self.max_tentatives = max_tentatives
+        self.delai_base = delai_base
+        self.delai_max = delai_max
+        self.codes = tuple(codes)
+
+    def doit_relancer(self, status_code: int, tentative: int) -> bool:
+        return status_code in self.codes and tentative < self.max_tentatives
+
+    def delai(self, tentative: int, retry_after=None) -> float:
+        """
+        Calcule l'attente avant la tentative suivante.
+        :param tentative: Numéro de la tentative qui vient d'échouer (à partir de 1)
+        :param retry_after: Valeur brute de l'en-tête Retry-After (secondes ou date HTTP)
+        :return: Délai en secondes
+        """
+        attente = lire_retry_after(retry_after)
+        if attente is not None:
+            return min(attente, self.delai_max)
+        return random.uniform(0, min(self.delai_max, self.delai_base * 2 ** (tentative - 1)))
+
+
+def lire_retry_after(valeur):
+    """
+    Convertit l'en-tête Retry-After en nombre de secondes, ou None s'il est absent ou invalide.
+    """
+    if valeur is None:
+        return None
+    try:
+        return max(0.0, float(valeur))
+    except (TypeError, ValueError):
+        pass
+    try:
+        date = parsedate_to_datetime(valeur)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+class JournalTelechargement:
+    """
+    Journal en ajout seul (une ligne JSON par tentative) des résultats de téléchargement.
+    Permet aux exécutions suivantes d'ignorer les IDs connus comme inexistants (404).
+    """
+
+    NOM_FICHIER = '_journal_telechargement.jsonl'
+
+    def __init__(self, base_dir: str):
+        self.chemin = os.path.join(base_dir, self.NOM_FICHIER)
+        self.absents = set()
+        self.compteurs = {}
+        if os.path.exists(self.chemin):
+            with open(self.chemin, 'r', encoding='utf-8') as f:
+                for ligne in f:
+                    try:
+                        entree = json.loads(ligne)
+                    except json.JSONDecodeError:
+                        continue  # Ligne tronquée par un arrêt brutal
+                    # Le dernier résultat d'un ID l'emporte: un match redemandé après un 404 n'est plus absent
+                    if entree.get('resultat') == ABSENT:
+                        self.absents.add(str(entree['game_id']))
+                    else:
+                        self.absents.discard(str(entree['game_id']))
+
+    def est_absent(self, game_id) -> bool:
+        return str(game_id) in self.absents
+
+    def oublier_absent(self, game_id):
+        """Permet de redemander un match connu comme absent (ex. revérification par le mode reprise)."""
+        self.absents.discard(str(game_id))
+
+    def enregistrer(self, game_id, resultat: str, status_code=None):
+        """
+        Ajoute le résultat d'une tentative au journal.
+        :param game_id: L'identifiant du match
+        :param resultat: HIT, MISS, RETRY, ABSENT ou ERREUR
+        :param status_code: Code HTTP de la réponse, s'il y en a une
+        """
+        self.compteurs[resultat] = self.compteurs.get(resultat, 0) + 1
+        if resultat == HIT:
+            return  # Inutile d'écrire une ligne pour chaque fichier déjà présent
+        if resultat == ABSENT:
+            self.absents.add(str(game_id))
+        else:
+            self.absents.discard(str(game_id))
+        entree = {'game_id': str(game_id), 'resultat': resultat, 'status': status_code, 'horodatage': time.time()}
+        with open(self.chemin, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entree) + '\n')
+
+
+def creer_session(taille_pool: int = 10) -> requests.Session:
+    """
+    Crée une session HTTP persistante (keep-alive) avec un pool de connexions.
+    :param taille_pool: Nombre de connexions gardées ouvertes vers l'hôte de l'API
+    """
+    session = requests.Session()
+    adaptateur = HTTPAdapter(pool_connections=taille_pool, pool_maxsize=taille_pool)
+    session.mount('https://', adaptateur)
+    session.mount('http://', adaptateur)
+    return session
+
+
+def get_avec_relance(session: requests.Session, url: str, politique: PolitiqueRelance,
+                     journal: JournalTelechargement = None, game_id=None, timeout: float = 30.0):
+    """
+    Exécute un GET en relançant les réponses 429/5xx selon la politique donnée.
+    :return: Un tuple (résultat, données JSON ou None, code HTTP de la dernière réponse ou None)
+    """
+    tentative = 0
+    while True:
+        tentative += 1
+        status_code = None
+        try:
+            response = session.get(url, timeout=timeout)
+            status_code = response.status_code
+        except requests.RequestException as e:
+            print(f"Erreur réseau pour {url}: {e}")
+            if tentative >= politique.max_tentatives:
+                break
+            retry_after = None
+        else:
+            if status_code == 404:
+                if journal is not None:
+                    journal.enregistrer(game_id, ABSENT, status_code)
+                return ABSENT, None, status_code
+            if response.ok:
+                return MISS, response.json(), status_code
+            if not politique.doit_relancer(status_code, tentative):
+                break
+            retry_after = response.headers.get('Retry-After')
+
+        if journal is not None:
+            journal.enregistrer(game_id, RETRY, status_code)
+        time.sleep(politique.delai(tentative, retry_after))
+
+    if journal is not None:
+        journal.enregistrer(game_id, ERREUR, status_code)
+    return ERREUR, None, status_code
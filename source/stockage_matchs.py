@@ -0,0 +1,357 @@
+import os
+import io
+import json
+import gzip
+import hashlib
+import zipfile
+import tempfile
+from functools import lru_cache
+
+from decodage_json import decoder_json
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Formats de stockage des fichiers de matchs et leurs extensions.
+# 'json' conserve l'ancien format (indentation de 4 espaces); les formats compressés écrivent du JSON compact.
+FORMATS = {'json': '.json', 'gzip': '.json.gz', 'zstd': '.json.zst'}
+
+# Une archive par saison et type de match: '{saison}{type}.zip' (ex. '201602.zip', '201603.zip') contenant
+# '{game_id}.json'; les matchs de saison régulière et de playoffs d'une même saison ne partagent pas d'archive
+EXTENSION_ARCHIVE = '.zip'
+
+
+def chemin_fichier_match(base_dir: str, game_id, format_stockage: str = 'json') -> str:
+    """
+    Retourne le chemin local du fichier d'un match.
+    :param base_dir: Répertoire de sauvegarde des données
+    :param game_id: L'identifiant unique du match (ex. '2020020001')
+    :param format_stockage: 'json', 'gzip' ou 'zstd'
+    :return: Chemin du fichier '{game_id}.json' (ou .json.gz, .json.zst) dans base_dir
+    """
+    if format_stockage not in FORMATS:
+        raise RuntimeError(f"'format_stockage' doit être parmi {list(FORMATS)}")
+    return os.path.join(base_dir, f"{game_id}{FORMATS[format_stockage]}")
+
+
+def trouver_fichier_match(base_dir: str, game_id):
+    """
+    Cherche le fichier d'un match dans base_dir, quel que soit son format.
+    :return: Chemin du fichier, ou None si le match n'a pas été téléchargé
+    """
+    for format_stockage in FORMATS:
+        file_path = chemin_fichier_match(base_dir, game_id, format_stockage)
+        if os.path.exists(file_path):
+            return file_path
+    return None
+
+
+def match_existe(base_dir: str, game_id) -> bool:
+    """
+    Vérifie si le match a déjà été téléchargé dans base_dir.
+    """
+    return trouver_fichier_match(base_dir, game_id) is not None
+
+
+def charger_match(base_dir: str, game_id) -> dict:
+    """
+    Charge les données d'un match déjà présentes sur le disque.
+    :param base_dir: Répertoire de sauvegarde des données
+    :param game_id: L'identifiant unique du match
+    :return: Un dictionnaire contenant les données du match
+    """
+    return lire_fichier_match(trouver_fichier_match(base_dir, game_id))
+
+
+def supprimer_match(base_dir: str, game_id):
+    """
+    Supprime le fichier d'un match s'il existe (ex. fichier corrompu à télécharger de nouveau).
+    """
+    file_path = trouver_fichier_match(base_dir, game_id)
+    if file_path is not None:
+        os.remove(file_path)
+
+
+def id_depuis_nom_fichier(filename: str):
+    """
+    Retourne l'ID du match correspondant à un nom de fichier, ou None s'il ne s'agit pas d'un fichier de match.
+    """
+    if filename.startswith('.') or filename.startswith('_'):
+        return None
+    for extension in FORMATS.values():
+        if filename.endswith(extension):
+            return filename[:-len(extension)]
+    return None
+
+
+def lister_fichiers_matchs(folder_path) -> dict:
+    """
+    Liste tous les matchs d'un répertoire, quel que soit leur format, y compris ceux des archives par saison.
+    :param folder_path: Répertoire contenant les fichiers de matchs, ou liste de répertoires à parcourir
+                        comme un seul dépôt (ex. ['../data/nhl_reguliere', '../data/nhl_playoffs'])
+    :return: Dictionnaire {game_id: chemin}, trié par game_id. Pour une archive, le chemin est
+             '{saison}{type}.zip/{game_id}.json' et se lit avec lire_fichier_match.
+    """
+    if isinstance(folder_path, (list, tuple)):
+        fichiers = {}
+        for dossier in folder_path:
+            fichiers.update(lister_fichiers_matchs(dossier))
+        return dict(sorted(fichiers.items()))
+
+    fichiers = {}
+    for filename in os.listdir(folder_path):
+        file_path = os.path.join(folder_path, filename)
+        if filename.endswith(EXTENSION_ARCHIVE):
+            for membre in _ouvrir_archive(file_path).namelist():
+                game_id = id_depuis_nom_fichier(membre)
+                if game_id is not None:
+                    fichiers[game_id] = os.path.join(file_path, membre)
+            continue
+        game_id = id_depuis_nom_fichier(filename)
+        if game_id is not None:
+            fichiers[game_id] = file_path
+    return dict(sorted(fichiers.items()))
+
+
+def _ouvrir_archive(chemin_archive: str) -> zipfile.ZipFile:
+    # La clé du cache inclut la signature de l'archive (une archive réécrite est rouverte) et le PID: un processus
+    # créé par fork (pool d'extraction) ouvre ses propres archives au lieu d'utiliser celles héritées du parent,
+    # dont la position de lecture est partagée entre tous les processus
+    stat = os.stat(chemin_archive)
+    return _archive_ouverte(chemin_archive, stat.st_size, stat.st_mtime_ns, os.getpid())
+
+
+@lru_cache(maxsize=16)
+def _archive_ouverte(chemin_archive: str, taille: int, mtime_ns: int, pid: int) -> zipfile.ZipFile:
+    # Le répertoire central de l'archive n'est lu qu'une fois par processus et par version de l'archive
+    return zipfile.ZipFile(chemin_archive, 'r')
+
+
+def decoder_contenu(contenu: bytes, file_path: str, cles=None) -> dict:
+    """
+    Décode le contenu brut d'un fichier de match selon son extension.
+    :param cles: Clés de premier niveau à conserver, ou None pour tout le document (voir decodage_json)
+    """
+    if file_path.endswith(FORMATS['gzip']):
+        contenu = gzip.decompress(contenu)
+    elif file_path.endswith(FORMATS['zstd']):
+        if zstandard is None:
+            raise RuntimeError("Le paquet 'zstandard' est requis pour lire les fichiers .json.zst")
+        contenu = zstandard.ZstdDecompressor().decompressobj().decompress(contenu)
+    return decoder_json(contenu, cles)
+
+
+def lire_octets_match(file_path: str) -> bytes:
+    """
+    Lit les octets bruts (éventuellement compressés) d'un fichier de match ou d'un membre d'archive.
+    """
+    separateur = EXTENSION_ARCHIVE + os.sep
+    if separateur in file_path:
+        chemin_archive, membre = file_path.split(separateur, 1)
+        return _ouvrir_archive(chemin_archive + EXTENSION_ARCHIVE).read(membre)
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+
+def signature_fichier(file_path: str) -> list:
+    """
+    Signature rapide d'un fichier de match pour détecter une modification sans relire son contenu:
+    [taille, mtime en ns], ou [taille, date, CRC] enregistrés dans l'archive pour un membre d'archive.
+    """
+    separateur = EXTENSION_ARCHIVE + os.sep
+    if separateur in file_path:
+        chemin_archive, membre = file_path.split(separateur, 1)
+        info = _ouvrir_archive(chemin_archive + EXTENSION_ARCHIVE).getinfo(membre)
+        return [info.file_size, list(info.date_time), info.CRC]
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def signature_repertoire(folder_path) -> str:
+    """
+    Signature rapide de tous les fichiers de matchs d'un répertoire (ou d'une liste de répertoires):
+    empreinte SHA-256 des signature_fichier, qui change dès qu'un match est ajouté, retiré ou modifié.
+    """
+    signatures = {game_id: signature_fichier(file_path)
+                  for game_id, file_path in sorted(lister_fichiers_matchs(folder_path).items())}
+    return hashlib.sha256(json.dumps(signatures).encode('utf-8')).hexdigest()
+
+
+def lire_fichier_match(file_path: str, cles=None) -> dict:
+    """
+    Charge un fichier de match, quel que soit son format (JSON, gzip, zstd ou membre d'archive).
+    :param file_path: Chemin retourné par chemin_fichier_match ou lister_fichiers_matchs
+    :param cles: Clés de premier niveau à conserver (ex. CLES_EXTRACTION), ou None pour tout le document
+    :return: Un dictionnaire contenant les données du match
+    """
+    return decoder_contenu(lire_octets_match(file_path), file_path, cles)
+
+
+def encoder_match(game: dict, format_stockage: str = 'json') -> bytes:
+    """
+    Sérialise les données d'un match dans le format de stockage demandé.
+    """
+    if format_stockage == 'json':
+        return json.dumps(game, ensure_ascii=False, indent=4).encode('utf-8')
+    contenu = json.dumps(game, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if format_stockage == 'gzip':
+        return gzip.compress(contenu, compresslevel=6, mtime=0)
+    if format_stockage == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Le paquet 'zstandard' est requis pour le format 'zstd'")
+        return zstandard.ZstdCompressor(level=10).compress(contenu)
+    raise RuntimeError(f"'format_stockage' doit être parmi {list(FORMATS)}")
+
+
+def ecrire_atomique(file_path: str, contenu: bytes):
+    """
+    Écrit un fichier de façon atomique: écriture dans un fichier temporaire du même répertoire,
+    puis renommage. Un arrêt brutal ne laisse jamais de fichier '{game_id}.json' tronqué.
+    """
+    dossier = os.path.dirname(file_path) or '.'
+    fd, chemin_temp = tempfile.mkstemp(dir=dossier, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(contenu)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(chemin_temp, file_path)
+    except BaseException:
+        if os.path.exists(chemin_temp):
+            os.remove(chemin_temp)
+        raise
+
+
+def enregistrer_match(base_dir: str, game_id, game: dict, manifeste=None, status_http=None,
+                      format_stockage: str = 'json') -> str:
+    """
+    Sauvegarde les données d'un match dans '{game_id}.json' (ou .json.gz, .json.zst).
+    :param base_dir: Répertoire de sauvegarde des données
+    :param game_id: L'identifiant unique du match
+    :param game: Dictionnaire des données du match retourné par l'API
+    :param manifeste: ManifesteTelechargement où enregistrer la taille et l'empreinte du fichier (optionnel)
+    :param status_http: Code HTTP de la réponse de l'API, conservé dans le manifeste
+    :param format_stockage: 'json', 'gzip' ou 'zstd'
+    :return: Chemin du fichier écrit
+    """
+    file_path = chemin_fichier_match(base_dir, game_id, format_stockage)
+    contenu = encoder_match(game, format_stockage)
+    ecrire_atomique(file_path, contenu)
+    if manifeste is not None:
+        manifeste.enregistrer_telechargement(game_id, contenu, status_http)
+    return file_path
+
+
+def convertir_repertoire(source_folder: str, destination_folder: str, format_stockage: str = 'gzip',
+                         par_saison: bool = False) -> None:
+    """
+    Convertit un répertoire de matchs vers un format compact.
+    :param source_folder: Répertoire source (n'importe quel format)
+    :param destination_folder: Répertoire de destination
+    :param format_stockage: 'json', 'gzip' ou 'zstd' pour un fichier par match
+    :param par_saison: Regroupe plutôt les matchs dans une archive compressée par saison et type de match
+                       ('{saison}{type}.zip', ex. '201602.zip')
+    """
+    if not os.path.exists(destination_folder):
+        os.makedirs(destination_folder)
+
+    fichiers = lister_fichiers_matchs(source_folder)
+    taille_source = sum(len(lire_octets_match(file_path)) for file_path in fichiers.values())
+
+    if par_saison:
+        archives = {}
+        for game_id, file_path in fichiers.items():
+            archives.setdefault(game_id[:6], []).append((game_id, file_path))
+        for saison_type, matchs in archives.items():
+            tampon = io.BytesIO()
+            with zipfile.ZipFile(tampon, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+                for game_id, file_path in matchs:
+                    game = lire_fichier_match(file_path)
+                    archive.writestr(f"{game_id}.json", json.dumps(game, ensure_ascii=False, separators=(',', ':')))
+            ecrire_atomique(os.path.join(destination_folder, f"{saison_type}{EXTENSION_ARCHIVE}"), tampon.getvalue())
+    else:
+        for game_id, file_path in fichiers.items():
+            contenu = encoder_match(lire_fichier_match(file_path), format_stockage)
+            ecrire_atomique(chemin_fichier_match(destination_folder, game_id, format_stockage), contenu)
+
+    taille_destination = sum(
+        os.path.getsize(os.path.join(destination_folder, f)) for f in os.listdir(destination_folder)
+        if id_depuis_nom_fichier(f) is not None or f.endswith(EXTENSION_ARCHIVE)
+    )
+    print(f"{len(fichiers)} matchs convertis: {taille_source / 1e6:.1f} Mo -> {taille_destination / 1e6:.1f} Mo")
+
+
+def synchroniser_depot(source_folders: list, destination_folder: str, mode: str = 'hardlink') -> int:
+    """
+    Réunit plusieurs répertoires de matchs dans destination_folder sans copier de données: chaque fichier
+    de match y est un lien physique (ou symbolique) vers le fichier source. La synchronisation est idempotente:
+    seuls les fichiers ajoutés ou remplacés depuis la dernière synchronisation sont (re)liés, et les liens dont
+    le fichier source a disparu sont supprimés.
+    Un même match (ou une même archive) présent dans plusieurs répertoires sources est signalé: seul le fichier du
+    premier répertoire de la liste est lié.
+    :param source_folders: Répertoires sources (ex. ['../data/nhl_reguliere', '../data/nhl_playoffs'])
+    :param destination_folder: Répertoire du dépôt unifié (ex. '../data/nhl_data')
+    :param mode: 'hardlink' ou 'symlink'
+    :return: Nombre de liens créés, mis à jour ou supprimés
+    """
+    if mode not in ('hardlink', 'symlink'):
+        raise RuntimeError("'mode' doit être 'hardlink' ou 'symlink'")
+    if not os.path.exists(destination_folder):
+        os.makedirs(destination_folder)
+
+    # État de la dernière synchronisation: {nom du fichier: [source, inode, mtime_ns]}
+    chemin_etat = os.path.join(destination_folder, '_synchronisation.json')
+    etat = {}
+    if os.path.exists(chemin_etat):
+        with open(chemin_etat, 'r', encoding='utf-8') as f:
+            etat = json.load(f)
+
+    # Fichiers à lier, {nom: chemin source}; un match est identifié par son ID, quel que soit son format
+    sources, origines, collisions = {}, {}, []
+    for source_folder in source_folders:
+        for filename in sorted(os.listdir(source_folder)):
+            cle = id_depuis_nom_fichier(filename)
+            if cle is None and not filename.endswith(EXTENSION_ARCHIVE):
+                continue  # Manifeste, journal, fichiers temporaires
+            cle = cle if cle is not None else filename
+            source_file = os.path.join(source_folder, filename)
+            if cle in origines:
+                collisions.append((cle, origines[cle], source_file))
+                continue
+            origines[cle] = source_file
+            sources[filename] = source_file
+
+    liens = 0
+    for filename, source_file in sources.items():
+        stat = os.stat(source_file)
+        signature = [os.path.abspath(os.path.dirname(source_file)), stat.st_ino, stat.st_mtime_ns]
+        destination_file = os.path.join(destination_folder, filename)
+        if etat.get(filename) == signature and os.path.lexists(destination_file):
+            continue
+
+        # Un fichier réécrit de façon atomique change d'inode: le lien physique doit être refait
+        if os.path.lexists(destination_file):
+            os.remove(destination_file)
+        if mode == 'hardlink':
+            os.link(source_file, destination_file)
+        else:
+            os.symlink(os.path.relpath(source_file, destination_folder), destination_file)
+        etat[filename] = signature
+        liens += 1
+
+    # Liens dont le fichier source a été supprimé (ou n'est plus retenu à cause d'une collision)
+    for filename in sorted(set(etat) - set(sources)):
+        destination_file = os.path.join(destination_folder, filename)
+        if os.path.lexists(destination_file):
+            os.remove(destination_file)
+        del etat[filename]
+        liens += 1
+
+    ecrire_atomique(chemin_etat, json.dumps(etat).encode('utf-8'))
+    for cle, retenu, ignore in collisions:
+        print(f"Attention: {cle} existe dans plusieurs répertoires sources, {ignore} est ignoré au profit de {retenu}")
+    print(f"{liens} fichier(s) lié(s) ou retiré(s) dans {destination_folder} ({len(etat)} au total, "
+          f"{len(collisions)} collision(s))")
+    return liens
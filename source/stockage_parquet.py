@@ -0,0 +1,139 @@
+import io
+import os
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pandas as pd
+
+from stockage_matchs import ecrire_atomique
+
+# Colonnes de partitionnement des jeux de données Parquet: un répertoire par saison, puis par type de match
+# ('02' saison régulière, '03' playoffs), ex. 'season=20162017/gameType=02/part-0.parquet'
+PARTITIONS = pa.schema([('season', pa.int32()), ('gameType', pa.string())])
+
+_CATEGORIE = pa.dictionary(pa.int32(), pa.string())
+
+# Type Arrow explicite de chaque colonne connue des jeux de données de tirs (nettoyage, Q2, Q4).
+# Une colonne absente de ce catalogue doit y être ajoutée avant d'être écrite.
+TYPES_COLONNES = {
+    'gameId': pa.int32(), 'gameID': pa.string(), 'season': pa.int32(), 'gameType': pa.string(),
+    'teamHomeId': pa.int32(), 'teamHome': _CATEGORIE, 'teamAwayId': pa.int32(), 'teamAway': _CATEGORIE,
+    'event_id': pa.int32(), 'eventType': _CATEGORIE, 'eventTeamId': pa.int32(), 'eventTeam': _CATEGORIE,
+    'zoneCode': _CATEGORIE, 'period': pa.int8(), 'periodTime': _CATEGORIE, 'gameSeconds': pa.int32(),
+    'coordinateX': pa.float32(), 'coordinateY': pa.float32(), 'shooterName': _CATEGORIE, 'goalieName': _CATEGORIE,
+    'shotType': _CATEGORIE, 'emptyNet': pa.int8(), 'strength': _CATEGORIE, 'homeTeamDefendingSide': _CATEGORIE,
+    'distance': pa.float64(), 'distance_round': pa.float64(), 'angle': pa.float64(), 'isGoal': pa.int8(),
+    'lastEvent': _CATEGORIE, 'lastCoordinateX': pa.float32(), 'lastCoordinateY': pa.float32(),
+    'lastDistance': pa.float64(), 'timeLastEvent': pa.float64(), 'rebound': pa.int8(), 'chang_angle': pa.float64(),
+    'speed': pa.float64(), 'non_gardiens_amicaux': pa.int8(), 'non_gardiens_adverses': pa.int8(),
+    'situationCode': _CATEGORIE, 'awayGoalie': pa.int8(), 'awaySkaters': pa.int8(), 'homeSkaters': pa.int8(),
+    'homeGoalie': pa.int8(), 'vitesse_chang_angle': pa.float64(),
+}
+
+
+def schema_pour(colonnes) -> pa.Schema:
+    """
+    Construit le schéma Arrow explicite d'un ensemble de colonnes à partir de TYPES_COLONNES.
+    :param colonnes: Noms des colonnes, dans l'ordre du DataFrame
+    :return: pa.Schema
+    """
+    inconnues = [colonne for colonne in colonnes if colonne not in TYPES_COLONNES]
+    if inconnues:
+        raise RuntimeError(f"Colonnes sans type explicite dans TYPES_COLONNES: {inconnues}")
+    return pa.schema([(colonne, TYPES_COLONNES[colonne]) for colonne in colonnes])
+
+
+def code_saison(saison) -> int:
+    """Accepte une année de début (2016) ou un code de saison (20162017) et retourne le code de saison."""
+    saison = int(saison)
+    return saison if saison > 9999 else int(f"{saison}{saison + 1}")
+
+
+def ajouter_colonnes_partition(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ajoute les colonnes 'season' et 'gameType' lorsqu'elles manquent, à partir de l'ID du match
+    ('gameId' ou 'gameID', ex. 2016020001 -> saison 20162017, type '02').
+    """
+    colonne_id = 'gameId' if 'gameId' in df.columns else 'gameID'
+    ids = df[colonne_id].astype(str)
+    df = df.copy()
+    if 'season' not in df.columns:
+        df['season'] = ids.str[:4].astype(int).map(code_saison)
+    if 'gameType' not in df.columns:
+        df['gameType'] = ids.str[4:6]
+    return df
+
+
+def ecrire_dataset(df: pd.DataFrame, racine: str, schema: pa.Schema = None):
+    """
+    Écrit un DataFrame dans un jeu de données Parquet partitionné par saison et par type de match.
+    Les partitions déjà présentes pour les mêmes saisons et types de match sont remplacées; les autres
+    sont conservées (une nouvelle saison peut donc être ajoutée sans réécrire les précédentes).
+    :param df: DataFrame à écrire (doit contenir 'gameId' ou 'gameID')
+    :param racine: Répertoire du jeu de données (ex. '../data/parquet/Q2_data')
+    :param schema: Schéma Arrow explicite (par défaut construit à partir de TYPES_COLONNES)
+    """
+    df = ajouter_colonnes_partition(df)
+    schema = schema if schema is not None else schema_pour(df.columns)
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    ds.write_dataset(
+        table, racine, format='parquet',
+        partitioning=ds.partitioning(PARTITIONS, flavor='hive'),
+        basename_template='part-{i}.parquet',
+        existing_data_behavior='delete_matching',
+    )
+    print(f"{table.num_rows} lignes écrites dans {racine}")
+
+
+def chemin_fragment_match(racine: str, game_id) -> str:
+    """
+    Fichier Parquet d'un seul match dans sa partition, ex. 'season=20162017/gameType=02/2016020001.parquet'.
+    """
+    game_id = str(game_id)
+    return os.path.join(racine, f"season={code_saison(game_id[:4])}", f"gameType={game_id[4:6]}",
+                        f"{game_id}.parquet")
+
+
+def ecrire_fragment_match(df: pd.DataFrame, racine: str, game_id, schema: pa.Schema = None) -> str:
+    """
+    Écrit les lignes d'un seul match dans son propre fichier de la partition (voir chemin_fragment_match), sans
+    toucher aux autres fichiers: une mise à jour ne réécrit que les matchs modifiés. Les colonnes de
+    partitionnement ne sont pas écrites dans le fichier, comme avec ecrire_dataset.
+    :param df: Lignes du match (éventuellement aucune)
+    :param racine: Répertoire du jeu de données
+    :param game_id: L'identifiant du match
+    :param schema: Schéma Arrow explicite (par défaut construit à partir de TYPES_COLONNES)
+    :return: Chemin du fichier écrit
+    """
+    df = df.drop(columns=[champ.name for champ in PARTITIONS if champ.name in df.columns])
+    schema = schema if schema is not None else schema_pour(df.columns)
+    tampon = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False), tampon)
+    chemin = chemin_fragment_match(racine, game_id)
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    ecrire_atomique(chemin, tampon.getvalue())
+    return chemin
+
+
+def charger_dataset(racine: str, colonnes=None, saisons=None, game_types=None, filtre=None) -> pd.DataFrame:
+    """
+    Charge un jeu de données Parquet en ne lisant que les colonnes et les partitions demandées.
+    Exemple: charger_dataset('../data/parquet/Q2_data', ['distance', 'angle', 'isGoal'], saisons=range(2016, 2020))
+    :param racine: Répertoire du jeu de données
+    :param colonnes: Colonnes à lire (projection), ou None pour toutes
+    :param saisons: Saisons à lire, en années de début (2016) ou en codes (20162017); None pour toutes
+    :param game_types: Types de matchs à lire ('02', '03'); None pour tous
+    :param filtre: Expression pyarrow.dataset supplémentaire, appliquée pendant la lecture
+                   (ex. ds.field('period') <= 3)
+    :return: DataFrame (les colonnes catégorielles redeviennent des pd.Categorical)
+    """
+    dataset = ds.dataset(racine, format='parquet', partitioning=ds.partitioning(PARTITIONS, flavor='hive'))
+    expression = filtre
+    if saisons is not None:
+        condition = ds.field('season').isin([code_saison(saison) for saison in saisons])
+        expression = condition if expression is None else expression & condition
+    if game_types is not None:
+        condition = ds.field('gameType').isin(list(game_types))
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=colonnes, filter=expression).to_pandas()
@@ -0,0 +1,224 @@
+import os
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+from stockage_matchs import match_existe, charger_match, enregistrer_match, supprimer_match
+from manifeste import ManifesteTelechargement, DELAI_ABSENT
+from calendrier import CalendrierNHL
+from session_http import PolitiqueRelance, JournalTelechargement, HIT, MISS, RETRY, ABSENT, ERREUR
+
+URL_API = "https://api-web.nhle.com/v1"
+
+
+class TokenBucket:
+    """
+    Limiteur de débit à jetons partagé entre toutes les requêtes en cours.
+    Le seau se remplit à raison de `taux` jetons par seconde, jusqu'à `capacite` jetons.
+    """
+
+    def __init__(self, taux: float, capacite: int = 1):
+        """
+        :param taux: Nombre de requêtes autorisées par seconde
+        :param capacite: Nombre maximal de requêtes pouvant partir en rafale
+        """
+        if taux <= 0:
+            raise ValueError("'taux' doit être strictement positif")
+        self.taux = taux
+        self.capacite = max(1, capacite)
+        self.jetons = float(self.capacite)
+        self.dernier_remplissage = time.monotonic()
+        self._verrou = asyncio.Lock()
+
+    def _remplir(self):
+        maintenant = time.monotonic()
+        self.jetons = min(self.capacite, self.jetons + (maintenant - self.dernier_remplissage) * self.taux)
+        self.dernier_remplissage = maintenant
+
+    async def acquerir(self):
+        """Attend qu'un jeton soit disponible puis le consomme."""
+        async with self._verrou:
+            self._remplir()
+            while self.jetons < 1:
+                await asyncio.sleep((1 - self.jetons) / self.taux)
+                self._remplir()
+            self.jetons -= 1
+
+
+class AsyncNHLDataDownloader:
+    """
+    Téléchargement asynchrone des matchs: N requêtes en parallèle derrière un TokenBucket.
+    Utilise le même cache disque et le même nommage '{game_id}.json' (.json.gz, .json.zst) que NHLDataDownloader.
+    """
+
+    def __init__(self, base_dir: str, concurrence: int = 8, requetes_par_seconde: float = 5.0,
+                 base_url: str = URL_API, timeout: float = 30.0, politique: PolitiqueRelance = None,
+                 format_stockage: str = 'json'):
+        """
+        :param base_dir: Chemin du répertoire local pour la sauvegarde des données
+        :param concurrence: Nombre maximal de requêtes simultanées (et taille du pool de connexions)
+        :param requetes_par_seconde: Budget de requêtes par seconde envoyées à l'API
+        :param base_url: URL de base de l'API (modifiable pour pointer vers un serveur local de test)
+        :param timeout: Délai maximal en secondes pour une requête
+        :param politique: PolitiqueRelance appliquée aux réponses 429/5xx
+        :param format_stockage: 'json' (indenté), 'gzip' ou 'zstd' (JSON compact compressé)
+        """
+        self.base_dir = base_dir
+        self.concurrence = concurrence
+        self.requetes_par_seconde = requetes_par_seconde
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.format_stockage = format_stockage
+        self.politique = politique if politique is not None else PolitiqueRelance()
+        if not os.path.exists(base_dir):
+            os.makedirs(base_dir)
+        self.journal = JournalTelechargement(base_dir)
+        self.manifeste = ManifesteTelechargement(base_dir)
+
+    def url_match(self, game_id) -> str:
+        return f"{self.base_url}/gamecenter/{game_id}/play-by-play"
+
+    async def _telecharger_match(self, session, limiteur, game_id) -> dict:
+        """
+        Télécharge un match, ou le charge depuis le disque s'il existe déjà.
+        :return: Un dictionnaire contenant les données du match, ou None en cas d'erreur
+        """
+        if match_existe(self.base_dir, game_id):
+            self.journal.enregistrer(game_id, HIT)
+            return await asyncio.to_thread(charger_match, self.base_dir, game_id)
+
+        game_type = str(game_id)[4:6]
+        if game_type not in ('02', '03') or self.journal.est_absent(game_id):
+            return None
+
+        tentative = 0
+        while True:
+            tentative += 1
+            status_code = None
+            retry_after = None
+            await limiteur.acquerir()
+            try:
+                async with session.get(self.url_match(game_id)) as response:
+                    status_code = response.status
+                    if status_code == 404:
+                        self.journal.enregistrer(game_id, ABSENT, status_code)
+                        await asyncio.to_thread(self.manifeste.enregistrer, game_id, ABSENT, None, status_code)
+                        return None
+                    if response.ok:
+                        game = await response.json(content_type=None)
+                        break
+                    retry_after = response.headers.get('Retry-After')
+            except Exception as e:
+                print(f"Erreur de téléchargement du match {game_id}: {e}")
+
+            relancable = status_code is None or status_code in self.politique.codes
+            if not relancable or tentative >= self.politique.max_tentatives:
+                # Noté dans le manifeste, sans fichier: le mode reprise le redemandera
+                self.journal.enregistrer(game_id, ERREUR, status_code)
+                await asyncio.to_thread(self.manifeste.enregistrer, game_id, ERREUR, None, status_code)
+                return None
+            self.journal.enregistrer(game_id, RETRY, status_code)
+            await asyncio.sleep(self.politique.delai(tentative, retry_after))
+
+        await asyncio.to_thread(enregistrer_match, self.base_dir, game_id, game, self.manifeste, status_code,
+                                self.format_stockage)
+        self.journal.enregistrer(game_id, MISS, status_code)
+        print(f"Téléchargé et enregistré : {game_id} ({self.format_stockage})")
+        return game
+
+    async def _travailleur(self, session, limiteur, file: asyncio.Queue, resultats: dict):
+        # Chaque travailleur traite les IDs de la file un par un: au plus `concurrence` matchs sont en cours
+        while True:
+            try:
+                game_id = file.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                resultats[game_id] = await self._telecharger_match(session, limiteur, game_id)
+            except Exception as e:
+                print(f"Erreur inattendue pour le match {game_id}: {e}")
+                await asyncio.to_thread(self.manifeste.enregistrer, game_id, ERREUR)
+                resultats[game_id] = None
+            finally:
+                file.task_done()
+
+    async def telecharger_matchs(self, game_ids) -> dict:
+        """
+        Télécharge une liste de matchs de façon concurrente, avec une file d'IDs consommée par `concurrence`
+        travailleurs: le nombre de tâches ne dépend pas du nombre de matchs.
+        :param game_ids: Itérable d'identifiants de matchs
+        :return: Dictionnaire {game_id: données du match ou None}, dans l'ordre des IDs
+        """
+        game_ids = [str(game_id) for game_id in game_ids]
+        file = asyncio.Queue()
+        for game_id in game_ids:
+            file.put_nowait(game_id)
+        resultats = {}
+        limiteur = TokenBucket(self.requetes_par_seconde, capacite=self.concurrence)
+        connecteur = aiohttp.TCPConnector(limit=self.concurrence, keepalive_timeout=60)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(connector=connecteur, timeout=timeout) as session:
+            await asyncio.gather(*(self._travailleur(session, limiteur, file, resultats)
+                                   for _ in range(min(self.concurrence, len(game_ids)))))
+        return {game_id: resultats.get(game_id) for game_id in game_ids}
+
+    def reprendre(self, delai_absent: float = DELAI_ABSENT) -> dict:
+        """
+        Mode vérification/reprise: télécharge de nouveau uniquement les matchs que le manifeste
+        signale comme manquants, corrompus, en erreur ou absents (404) depuis plus de delai_absent secondes.
+        :param delai_absent: Âge en secondes à partir duquel un match absent est redemandé (None: jamais)
+        :return: Dictionnaire {game_id: données du match ou None}
+        """
+        game_ids = self.manifeste.verifier(delai_absent)
+        for game_id in game_ids:
+            supprimer_match(self.base_dir, game_id)
+            self.journal.oublier_absent(game_id)
+        return self.download_games(game_ids)
+
+    def download_games(self, game_ids) -> dict:
+        """
+        Version bloquante de telecharger_matchs, utilisable dans un script ou dans Jupyter
+        (où une boucle asyncio tourne déjà, d'où l'exécution dans un thread séparé).
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.telecharger_matchs(game_ids))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.telecharger_matchs(game_ids)).result()
+
+
+def download_all_seasons_async(downloader: AsyncNHLDataDownloader, start_year, end_year,
+                               calendrier: CalendrierNHL = None) -> None:
+    """
+    Équivalent asynchrone de download_all_seasons (saison régulière, type 02).
+    :param downloader: Une instance de AsyncNHLDataDownloader
+    :param start_year: Année de début écrite en 4 chiffres
+    :param end_year: Année de fin écrite en 4 chiffres
+    :param calendrier: CalendrierNHL fournissant les IDs valides (par défaut CalendrierNHL())
+    """
+    calendrier = calendrier if calendrier is not None else CalendrierNHL()
+    for year in range(start_year, end_year + 1):
+        resultats = downloader.download_games(calendrier.ids_saison(year)['02'])
+        downloaded_count = sum(1 for game in resultats.values() if game)
+        print(f"Total de fichiers téléchargés pour la saison {year}: {downloaded_count}")
+
+
+def download_playoffs_data_async(downloader: AsyncNHLDataDownloader, start_year, end_year,
+                                 calendrier: CalendrierNHL = None) -> None:
+    """
+    Équivalent asynchrone de download_playoffs_data (playoffs, type 03).
+    :param downloader: Une instance de AsyncNHLDataDownloader
+    :param start_year: Année de début écrite en 4 chiffres
+    :param end_year: Année de fin écrite en 4 chiffres
+    :param calendrier: CalendrierNHL fournissant les IDs valides (par défaut CalendrierNHL())
+    """
+    calendrier = calendrier if calendrier is not None else CalendrierNHL()
+    for year in range(start_year, end_year + 1):
+        print(f"Téléchargement des données des playoffs pour la saison {year}")
+        resultats = downloader.download_games(calendrier.ids_saison(year)['03'])
+        downloaded_count = sum(1 for game in resultats.values() if game)
+        print(f"Total de matchs de playoffs téléchargés pour la saison {year}: {downloaded_count}")
@@ -14,8 +14,11 @@ from catboost import CatBoostClassifier
 
 import wandb
 
-# Load preprocessed data
-data = pd.read_csv("data/preprocessed_data.csv")
+from preprocess_data import preprocess_data
+from save_models import sauvegarder_modele
+
+# Preprocess the training data; the fitted preprocessing is saved with the best model
+data, pretraitement = preprocess_data('../data/Milestone2_data/Q4_train.csv')
 X = data.drop(columns=['isGoal'])
 y = data['isGoal']
 
@@ -77,4 +80,8 @@ wandb.log({"Voting Classifier AUC": auc_voting})
 # Save the best model
 best_model_name = max(results, key=lambda k: results[k]["auc"])
 best_model = results[best_model_name]["model"]
-wandb.save(f"{best_model_name}.model")
+
+# The model and its fitted preprocessing are saved as one ModeleXG, loaded as is by the serving app
+model_filename = f"{best_model_name}.pkl"
+sauvegarder_modele(best_model, pretraitement, model_filename, colonnes=list(X.columns))
+wandb.save(model_filename)
@@ -8,6 +8,7 @@
 
 import os, json, pandas as pd, numpy as np
 import matplotlib.pyplot as plt, seaborn as sns
+from stockage_matchs import lire_fichier_match, lister_fichiers_matchs
 
 
 # In[10]:
@@ -21,8 +22,7 @@ def extract_player_names(file_path):
     
     # Open the JSON file with utf-8 encoding to avoid Unicode errors
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
+        data = lire_fichier_match(file_path)
         
         # Check if 'rosterSpots' exists in the data
         if 'rosterSpots' in data:
@@ -42,12 +42,10 @@ def process_all_files(directory):
     Process all JSON files in the specified directory and extract player names.
     """
     all_players = {}
-    for filename in os.listdir(directory):
-        if filename.endswith('.json'):
-            file_path = os.path.join(directory, filename)
-            print(f"Processing file: {file_path}")
-            player_names = extract_player_names(file_path)
-            all_players.update(player_names)
+    for file_path in lister_fichiers_matchs(directory).values():
+        print(f"Processing file: {file_path}")
+        player_names = extract_player_names(file_path)
+        all_players.update(player_names)
     return all_players
 
 
@@ -59,17 +57,15 @@ def process_all_files(directory):
 def extract_unique_event_types_from_folder(folder_path):
     event_types = set()  # Utiliser un set pour obtenir des types uniques
 
-    # Obtenir tous les fichiers JSON dans le répertoire
-    json_files = sorted(filter(lambda x: x.endswith('.json'), os.listdir(folder_path)))
+    # Obtenir tous les fichiers de matchs du répertoire (JSON, gzip, zstd ou archives par saison)
+    json_files = lister_fichiers_matchs(folder_path)
     
-    for filename in json_files:
-        file_path = os.path.join(folder_path, filename)
+    for file_path in json_files.values():
         print(f"Processing file: {file_path}")
         
         try:
             # Charger le fichier JSON
-            with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
+            data = lire_fichier_match(file_path)
 
             # Extraire les types d'événements du champ 'plays'
             plays = data.get('plays', [])
@@ -110,8 +106,7 @@ class NHLPlayByPlayExtractor:
     
     def __init__(self, json_file, player_names):
         # Charger le fichier JSON
-        with open(json_file, 'r', encoding='utf-8') as file:
-            self.data = json.load(file)
+        self.data = lire_fichier_match(json_file)
         self.player_names = player_names  # Stocker le dictionnaire des noms des joueurs
     
     def extract_events(self):
@@ -224,11 +219,10 @@ class NHLPlayByPlayExtractor:
     def clean_data(folder_path, player_names):
         all_events = []  # Liste pour stocker les événements de tous les fichiers
     
-        # Obtenir tous les fichiers JSON dans le répertoire
-        json_files = sorted(filter(lambda x: x.endswith('.json'), os.listdir(folder_path)))
+        # Obtenir tous les fichiers de matchs du répertoire (JSON, gzip, zstd ou archives par saison)
+        json_files = lister_fichiers_matchs(folder_path)
     
-        for filename in json_files:
-            file_path = os.path.join(folder_path, filename)
+        for file_path in json_files.values():
             print(f"Traitement du fichier : {file_path}")
         
             try:
@@ -270,8 +264,7 @@ class NHLPlayByPlayExtractor:
     
     def __init__(self, json_file, player_names):
         # Charger le fichier JSON
-        with open(json_file, 'r', encoding='utf-8') as file:
-            self.data = json.load(file)
+        self.data = lire_fichier_match(json_file)
         self.player_names = player_names  # Stocker le dictionnaire des noms des joueurs
     
     def extract_events(self):
@@ -405,11 +398,10 @@ class NHLPlayByPlayExtractor:
     def clean_data(folder_path, player_names):
         all_events = []  # Liste pour stocker les événements de tous les fichiers
     
-        # Obtenir tous les fichiers JSON dans le répertoire
-        json_files = sorted(filter(lambda x: x.endswith('.json'), os.listdir(folder_path)))
+        # Obtenir tous les fichiers de matchs du répertoire (JSON, gzip, zstd ou archives par saison)
+        json_files = lister_fichiers_matchs(folder_path)
     
-        for filename in json_files:
-            file_path = os.path.join(folder_path, filename)
+        for file_path in json_files.values():
             print(f"Traitement du fichier : {file_path}")
         
             try:
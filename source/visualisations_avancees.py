@@ -179,45 +179,41 @@ print("Données moyennes de l'équipe pour la saison 2020-2021 :", moyenne_equip
 
 
 from scipy.ndimage import gaussian_filter
+from cartes_tirs import cube_taux_tirs, cube_excedent_lisse, charger_cube_lisse, quantifier_cube
 
-def moyenne_tirs_par_equipe_toutes_saisons(df: pd.DataFrame, saisons: list, sigma: int = 4, seuil: float = 0.001) -> dict:
+def moyenne_tirs_par_equipe_toutes_saisons(df: pd.DataFrame, saisons: list, sigma: int = 4, seuil: float = 0.001) -> tuple:
     """
     Calcule le nombre moyen de tirs par heure pour chaque équipe dans la ligue pour toutes les saisons spécifiées.
 
     :param df: DataFrame avec les coordonnées projetées sur une demi-patinoire.
     :param saisons: Liste des saisons d'intérêt (exemple : [20172018, 20182019, 20192020]).
-    :param sigma: Paramètre du noyau Gaussien pour le lissage. Intervalle recommandé : [2,4].
-    :param seuil: Différences gaussiennes inférieures ou égales au seuil sont ignorées et remplacées par None.
-    :return: Dictionnaire avec les saisons contenant un autre dictionnaire par équipe avec leurs fréquences de tirs.
+    :param sigma: Paramètre du noyau Gaussien pour le lissage. Le lissage d'une valeur unique par équipe ne la modifie pas.
+    :param seuil: Différences inférieures ou égales au seuil sont ignorées et remplacées par NaN.
+    :return: Un tuple (différences float32 (saison, équipe), saisons, equipes). Une équipe sans match à domicile dans la saison vaut NaN.
     """
-    equipes_par_saison = {}
-    frequence_tirs_par_equipe_par_saison = {}
-
-    # Construire un dictionnaire contenant toutes les équipes uniques par saison
-    for saison in saisons:
-        # Obtenir toutes les équipes uniques pour une saison donnée
-        equipes_par_saison[saison] = np.array(df[df['season'] == saison]['teamHome'].unique())
+    df = df[df['season'].isin(saisons)]
 
-    # Calcul de la fréquence de tirs pour chaque saison et chaque équipe
-    for saison in saisons:
-        # Créer un dictionnaire pour chaque saison. Chaque dictionnaire contient les équipes et leurs fréquences de tirs.
-        frequence_tirs_par_equipe_par_saison[saison] = {}
-        moyenne_ligue = calcul_moyenne_ligue(df, saison)
-        
-        for equipe in equipes_par_saison[saison]:
-            moyenne_equipe = calcul_moyenne_tirs_equipe(df, saison, equipe)
-            difference_moyenne = moyenne_equipe - moyenne_ligue
+    # Moyenne de la ligue, calculée une seule fois par saison
+    moyenne_ligue = df.groupby('season').size() / (df.groupby('season')['gameId'].nunique() * 2)
 
-            # Appliquer un lissage gaussien aux résultats
-            difference_lisse = gaussian_filter(difference_moyenne, sigma=sigma)
+    # Tirs et matchs de chaque équipe (à domicile ou à l'extérieur), pour toutes les saisons et équipes à la fois
+    par_equipe = pd.concat([
+        df[['season', 'gameId']].assign(equipe=df['teamHome']),
+        df.loc[df['teamAway'] != df['teamHome'], ['season', 'gameId']].assign(equipe=df['teamAway']),
+    ])
+    groupes = par_equipe.groupby(['season', 'equipe'])
+    difference_moyenne = (groupes.size() / (groupes['gameId'].nunique() * 2)).sub(moyenne_ligue, level='season')
 
-            # Ignorer les valeurs proches de zéro pour une meilleure visualisation
-            difference_lisse[np.abs(difference_lisse) <= seuil] = None
+    # Équipes de chaque saison (équipes à domicile), disposées en tableau (saison, équipe)
+    equipes_par_saison = pd.MultiIndex.from_frame(df[['season', 'teamHome']].drop_duplicates(), names=['season', 'equipe'])
+    equipes = sorted(equipes_par_saison.get_level_values('equipe').unique())
+    difference_moyenne = difference_moyenne.reindex(equipes_par_saison).unstack('equipe').reindex(index=saisons, columns=equipes)
 
-            # Enregistrer le résultat
-            frequence_tirs_par_equipe_par_saison[saison][equipe] = difference_lisse
+    # Ignorer les valeurs proches de zéro pour une meilleure visualisation
+    difference = difference_moyenne.to_numpy(dtype=np.float64, copy=True)
+    difference[np.abs(difference) <= seuil] = np.nan
 
-    return frequence_tirs_par_equipe_par_saison
+    return difference.astype(np.float32), list(saisons), equipes
 
 
 # #### Refaire l'etude pour chaque localisation (coordinate x, coordinate y)
@@ -240,43 +236,11 @@ def moyenne_tirs_equipe_par_location(df: pd.DataFrame, saison: int, equipe: str)
     :param equipe: Nom de l'équipe pour laquelle calculer la moyenne.
     :return: np.array de taille 100x85 avec le taux moyen de tirs par heure pour chaque localisation.
     """
-    # Filtrer le DataFrame pour la saison et l'équipe spécifiées
-    df_saison = df[df["season"] == saison].copy()
-    df_equipe = df_saison[(df_saison["teamHome"] == equipe) | (df_saison["teamAway"] == equipe)].copy()
-
-    # Supprimer les valeurs NaN dans les coordonnées
-    df_equipe = df_equipe.dropna(subset=["coordinateX", "coordinateY"])
-
-    # Projeter les coordonnées sur une demi-patinoire
-    df_equipe["x_new"] = np.where(
-        df_equipe["coordinateX"] < 0,
-        -df_equipe["coordinateX"],
-        df_equipe["coordinateX"],
-    )
-    df_equipe["y_new"] = np.where(
-        df_equipe["coordinateX"] < 0,
-        -df_equipe["coordinateY"] + 42,
-        df_equipe["coordinateY"] + 42,
-    )
-
-    # Initialiser une matrice 100x85 pour stocker le nombre de tirs par localisation
-    data_equipe = np.zeros((100, 85))
-
-    # Calculer le nombre de tirs pour chaque localisation et remplir la matrice
-    for (x, y), group in df_equipe.groupby(["x_new", "y_new"]):
-        if not np.isnan(x) and not np.isnan(y):
-            data_equipe[int(x), int(y)] = len(group)
-
-    # Calculer le nombre total de matchs joués par l'équipe dans la saison
-    total_matchs_equipe = df_equipe["gameId"].nunique()
-
-    # Calculer le taux de tirs par heure (1 heure par match, hypothèse)
-    data_equipe = data_equipe / total_matchs_equipe
-
-    return data_equipe
+    # Cube (saison, équipe, x, y) construit en un seul passage, puis extraction de l'équipe demandée
+    taux, _, _, equipes = cube_taux_tirs(df, [saison])
+    return taux[0, equipes.index(equipe)]
 
 # Exemple d'utilisation
-df_new = pd.read_csv('../data/nhl_play_by_play_combined.csv')  # Charger les données
 taux_moyen_tirs_location_equipe = moyenne_tirs_equipe_par_location(df_new, saison=20202021, equipe="Canadiens")
 print("Matrice des tirs moyens par heure pour chaque localisation pour les Canadiens:", taux_moyen_tirs_location_equipe)
 
@@ -292,44 +256,11 @@ def ligue_projected_array(df: pd.DataFrame, saison: int) -> np.array:
     :param saison: Saison d'intérêt (par exemple, 20202021).
     :return: np.array de taille 100x85 avec le taux moyen de tirs par heure pour chaque localisation.
     """
-    # Filtrer le DataFrame pour la saison spécifiée
-    df_saison = df[df["season"] == saison].copy()
-
-    # Supprimer les valeurs NaN dans les coordonnées
-    df_saison = df_saison.dropna(subset=["coordinateX", "coordinateY"])
-
-    # Projeter les coordonnées sur une demi-patinoire
-    df_saison["x_new"] = np.where(
-        df_saison["coordinateX"] < 0,
-        -df_saison["coordinateX"],
-        df_saison["coordinateX"],
-    )
-    df_saison["y_new"] = np.where(
-        df_saison["coordinateX"] < 0,
-        -df_saison["coordinateY"] + 42,
-        df_saison["coordinateY"] + 42,
-    )
-
-    # Initialiser une matrice 100x85 pour stocker le nombre de tirs par localisation
-    data_ligue = np.zeros((100, 85))
-
-    # Calculer le nombre de tirs pour chaque localisation et remplir la matrice
-    for (x, y), group in df_saison.groupby(["x_new", "y_new"]):
-        if not np.isnan(x) and not np.isnan(y):
-            data_ligue[int(x), int(y)] = len(group)
-
-    # Calculer le nombre total de matchs joués dans la saison
-    total_games_ligue = df_saison["gameId"].nunique()
-
-    print(total_games_ligue)
-
-    # Calculer le taux de tirs par heure (1 heure par match, hypothèse)
-    data_ligue = data_ligue / total_games_ligue
-
-    return data_ligue
+    # Taux de la ligue calculé par le même passage unique que le cube des équipes
+    _, ligue, _, _ = cube_taux_tirs(df, [saison])
+    return ligue[0]
 
 # Exemple d'utilisation
-df_new = pd.read_csv('../data/nhl_play_by_play_combined.csv')  # Charger les données
 moyenne_tirs_location = ligue_projected_array(df_new, saison=20202021)
 print("Matrice des tirs moyens par heure pour chaque localisation :", moyenne_tirs_location)
 
@@ -346,43 +277,11 @@ def moyenne_tirs_equipe_par_location(df: pd.DataFrame, saison: int, equipe: str)
     :param equipe: Nom de l'équipe pour laquelle calculer la moyenne.
     :return: np.array de taille 100x85 avec le taux moyen de tirs par heure pour chaque localisation.
     """
-    # Filtrer le DataFrame pour la saison et l'équipe spécifiées
-    df_saison = df[df["season"] == saison].copy()
-    df_equipe = df_saison[(df_saison["teamHome"] == equipe) | (df_saison["teamAway"] == equipe)].copy()
-
-    # Supprimer les valeurs NaN dans les coordonnées
-    df_equipe = df_equipe.dropna(subset=["coordinateX", "coordinateY"])
-
-    # Projeter les coordonnées sur une demi-patinoire
-    df_equipe["x_new"] = np.where(
-        df_equipe["coordinateX"] < 0,
-        -df_equipe["coordinateX"],
-        df_equipe["coordinateX"],
-    )
-    df_equipe["y_new"] = np.where(
-        df_equipe["coordinateX"] < 0,
-        -df_equipe["coordinateY"] + 42,
-        df_equipe["coordinateY"] + 42,
-    )
-
-    # Initialiser une matrice 100x85 pour stocker le nombre de tirs par localisation
-    data_equipe = np.zeros((100, 85))
-
-    # Calculer le nombre de tirs pour chaque localisation et remplir la matrice
-    for (x, y), group in df_equipe.groupby(["x_new", "y_new"]):
-        if not np.isnan(x) and not np.isnan(y):
-            data_equipe[int(x), int(y)] = len(group)
-
-    # Calculer le nombre total de matchs joués par l'équipe dans la saison
-    total_matchs_equipe = df_equipe["gameId"].nunique()
-
-    # Calculer le taux de tirs par heure (1 heure par match, hypothèse)
-    data_equipe = data_equipe / total_matchs_equipe
-
-    return data_equipe
+    # Cube (saison, équipe, x, y) construit en un seul passage, puis extraction de l'équipe demandée
+    taux, _, _, equipes = cube_taux_tirs(df, [saison])
+    return taux[0, equipes.index(equipe)]
 
 # Exemple d'utilisation
-df_new = pd.read_csv('../data/nhl_play_by_play_combined.csv')  # Charger les données
 taux_moyen_tirs_location_equipe = moyenne_tirs_equipe_par_location(df_new, saison=20202021, equipe="Canadiens")
 print("Matrice des tirs moyens par heure pour chaque localisation pour les Canadiens:", taux_moyen_tirs_location_equipe)
 
@@ -390,7 +289,7 @@ print("Matrice des tirs moyens par heure pour chaque localisation pour les Canad
 # In[24]:
 
 
-def moyenne_tirs_par_equipe_toutes_saisons_loc(df: pd.DataFrame, saisons: list, sigma: int = 4, seuil: float = 0.0001) -> dict:
+def moyenne_tirs_par_equipe_toutes_saisons_loc(df: pd.DataFrame, saisons: list, sigma: int = 4, seuil: float = 0.0001) -> tuple:
     """
     Calcule le nombre moyen de tirs par heure pour chaque équipe dans la ligue pour toutes les saisons spécifiées.
 
@@ -398,10 +297,9 @@ def moyenne_tirs_par_equipe_toutes_saisons_loc(df: pd.DataFrame, saisons: list,
     :param saisons: Liste des saisons d'intérêt (exemple : [20172018, 20182019, 20192020]).
     :param sigma: Paramètre du noyau Gaussien pour le lissage. Intervalle recommandé : [2,4].
     :param seuil: Différences gaussiennes inférieures ou égales au seuil sont ignorées et remplacées par None.
-    :return: Dictionnaire avec les saisons contenant un autre dictionnaire par équipe avec leurs fréquences de tirs.
+    :return: Un tuple (cube float32 (saison, équipe, 100, 85), saisons, equipes) des différences lissées. Une équipe absente de la saison vaut NaN.
     """
     equipes_par_saison = {}
-    frequence_tirs_par_equipe_par_saison = {}
 
     # Récupérer les équipes uniques (domicile et extérieur) par saison sans duplications
     for saison in saisons:
@@ -412,37 +310,19 @@ def moyenne_tirs_par_equipe_toutes_saisons_loc(df: pd.DataFrame, saisons: list,
         # Afficher les équipes pour la saison
         print(f"Saison {saison}, Équipes listées : {sorted(equipes_par_saison[saison])}")
 
-    # Calcul de la fréquence de tirs pour chaque saison et chaque équipe
-    for saison in saisons:
-        frequence_tirs_par_equipe_par_saison[saison] = {}
-        moyenne_ligue = ligue_projected_array(df, saison)
-        
-        for equipe in equipes_par_saison[saison]:
-            # Obtenir la fréquence moyenne des tirs pour l'équipe et la saison données
-            moyenne_equipe = moyenne_tirs_equipe_par_location(df, saison, equipe)
-            difference_moyenne = moyenne_equipe - moyenne_ligue
-
-            # Appliquer un lissage gaussien aux résultats
-            difference_lisse = gaussian_filter(difference_moyenne, sigma=sigma)
-
-            # Ignorer les valeurs proches de zéro pour une meilleure visualisation
-            difference_lisse[np.abs(difference_lisse) <= seuil] = None
-
-            # Enregistrer le résultat pour l'équipe et la saison
-            frequence_tirs_par_equipe_par_saison[saison][equipe] = difference_lisse
-
-    return frequence_tirs_par_equipe_par_saison
+    # Écarts de toutes les équipes à la ligue pour toutes les saisons (un seul passage sur les tirs), puis lissage
+    # gaussien de toutes les cartes en un seul appel et valeurs proches de zéro ignorées
+    return cube_excedent_lisse(df, saisons, sigma=sigma, seuil=seuil)
 
 # Exemple d'utilisation
 saisons = [20172018, 20182019, 20192020, 20202021]
-df_new = pd.read_csv('../data/nhl_play_by_play_combined.csv')  # Charger les données
-frequence_tirs = moyenne_tirs_par_equipe_toutes_saisons_loc(df_new, saisons)
+frequence_tirs, saisons_cube, equipes = moyenne_tirs_par_equipe_toutes_saisons_loc(df_new, saisons)
 
 # Affichage d'un exemple pour une équipe et une saison
-for saison in frequence_tirs:
-    for equipe in frequence_tirs[saison]:
+for i, saison in enumerate(saisons_cube):
+    for j, equipe in enumerate(equipes):
         print(f"Saison {saison}, Équipe {equipe}, Fréquence des tirs par localisation :")
-        print(frequence_tirs[saison][equipe])
+        print(frequence_tirs[i, j])
 
 
 # In[26]:
@@ -467,13 +347,12 @@ RINK_IMG  = '../figures/nhl_rink.png'
 # In[29]:
 
 
-df_new = pd.read_csv('../data/nhl_play_by_play_combined.csv')  # Charger les données
-
 # Définir la liste des saisons d'intérêt de 20162017 à 20202021
 saisons = [20162017, 20172018, 20182019, 20192020, 20202021]
 
-# Calculer la fréquence moyenne de tirs par équipe pour chaque saison
-team_year_shoot = moyenne_tirs_par_equipe_toutes_saisons_loc(df_new, saisons)
+# Calculer la fréquence moyenne de tirs par équipe pour chaque saison. Les cartes lissées sont gardées en cache
+# (une par saison et sigma): le CSV n'est relu que pour les saisons absentes du cache
+team_year_shoot = charger_cube_lisse('../data/nhl_play_by_play_combined.csv', saisons, sigma=4, seuil=0.0001)
 
 
 # ### Explications des principaux éléments du graphique interactif:
@@ -496,33 +375,19 @@ team_year_shoot = moyenne_tirs_par_equipe_toutes_saisons_loc(df_new, saisons)
 # Chemin vers l'image de la patinoire
 RINK_IMG = '../figures/nhl_rink.png'
 
-def contour(df_shoot, html_out=True):
-    # Initialiser l'ensemble de toutes les équipes uniques à travers les saisons
-    equipes = set()  # Utiliser un ensemble pour éviter les doublons
-    
-    # Parcourir chaque saison pour collecter toutes les équipes
-    for saison in df_shoot.keys():
-        equipes.update(df_shoot[saison].keys())
-    
-    equipes = sorted(equipes)  # Convertir en liste triée pour un ordre cohérent
-    
-    # Définir des valeurs NaN pour les équipes absentes dans certaines saisons
-    A = np.ones((100, 85))  # Matrice de 100x85 pour représenter la patinoire
-    A[:] = np.nan  # Remplir de NaN
-    df_saisons = {}
-    for saison in df_shoot.keys():
-        df_saisons[saison] = {}
-        for equipe in equipes:
-            # Si l'équipe n'est pas présente dans la saison, lui assigner la matrice NaN
-            if equipe not in df_shoot[saison].keys():
-                df_shoot[saison][equipe] = A
-            # Sinon, ajouter les données de l'équipe
-            df_saisons[saison][equipe] = df_shoot[saison][equipe]
-    
+def contour(df_shoot, html_out=True, pas=1, chiffres=None, fichier_html='../figures/Interactive_plot.html'):
+    # Cube (saison, équipe, 100, 85) de moyenne_tirs_par_equipe_toutes_saisons_loc: les équipes absentes d'une
+    # saison y sont déjà des matrices de NaN, et les équipes sont triées pour un ordre cohérent
+    cube, saisons, equipes = df_shoot
+
+    # Export léger: une case sur `pas` et valeurs arrondies à `chiffres` chiffres significatifs, pour un fichier
+    # HTML plus petit (plus rapide à écrire et à ouvrir). Par défaut, pleine résolution.
+    if pas > 1 or chiffres is not None:
+        cube = quantifier_cube(cube, pas=pas, chiffres=chiffres)
+
     # Créer la grille de coordonnées pour le graphique
     xx, yy = np.mgrid[0:100:100j, -42.5:42.5:85j]
-    saison_initiale = df_saisons[list(df_saisons.keys())[0]]
-    equipe_initiale = saison_initiale[list(saison_initiale.keys())[0]]
+    xx, yy = xx[::pas, ::pas], yy[::pas, ::pas]
     
     # Initialiser la figure avec l'image de la patinoire
     fig = go.Figure()
@@ -542,12 +407,12 @@ def contour(df_shoot, html_out=True):
     )
     
     # Ajouter des courbes de contours pour chaque équipe
-    for equipe in equipes:
+    for j, equipe in enumerate(equipes):
         fig.add_trace(
             go.Contour(
-                x=xx[:, 1],
-                y=yy[1, :], 
-                z=np.rot90(np.fliplr(equipe_initiale)),
+                x=xx[:, 0],
+                y=yy[0, :],
+                z=np.rot90(np.fliplr(cube[0, j])),
                 colorscale='RdBu',
                 reversescale=True,
                 connectgaps=False,
@@ -561,9 +426,9 @@ def contour(df_shoot, html_out=True):
     boutons_equipes = []
 
     # Créer les options de menu pour chaque saison
-    for saison in df_saisons.keys():
+    for i, saison in enumerate(saisons):
         liste_args = [
-            np.rot90(np.fliplr(df_saisons[saison][equipe])) for equipe in equipes
+            np.rot90(np.fliplr(cube[i, j])) for j in range(len(equipes))
         ]
         boutons_saisons.append(dict(
             method='update',
@@ -611,7 +476,7 @@ def contour(df_shoot, html_out=True):
     # Sauvegarder en HTML si nécessaire
     if html_out:
         fig.write_html(
-            '../figures/Interactive_plot.html',
+            fichier_html,
             default_width='90%',
             default_height="100%",
             include_plotlyjs="cdn"
@@ -623,3 +488,6 @@ def contour(df_shoot, html_out=True):
 
 contour(team_year_shoot)
 
+# Export allégé: une case sur deux et trois chiffres significatifs
+contour(team_year_shoot, pas=2, chiffres=3, fichier_html='../figures/Interactive_plot_leger.html')
+
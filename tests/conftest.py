@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Les modules du projet sont importés à plat depuis source/ (comme dans les notebooks et scripts)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'source'))
+
+DOSSIER_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
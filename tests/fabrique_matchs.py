@@ -0,0 +1,63 @@
+import random
+
+from stockage_matchs import enregistrer_match
+
+TYPES_ACTIONS = ['faceoff', 'hit', 'shot-on-goal', 'missed-shot', 'blocked-shot', 'giveaway', 'takeaway', 'goal',
+                 'stoppage', 'period-start', 'period-end']
+ZONES = ['O', 'D', 'N']
+EQUIPES = [(1, 'Devils', 'NJD'), (6, 'Bruins', 'BOS'), (8, 'Canadiens', 'MTL'), (10, 'Maple Leafs', 'TOR')]
+
+
+def fabriquer_match(game_id: str, graine: int, n_actions: int = 60) -> dict:
+    """
+    Match synthétique au format de l'API play-by-play (clés utilisées par l'extraction et les caractéristiques).
+    """
+    alea = random.Random(graine)
+    domicile, exterieur = alea.sample(EQUIPES, 2)
+    roster = [{'playerId': 8470000 + i, 'teamId': (domicile if i < 10 else exterieur)[0],
+               'firstName': {'default': f"Prénom{i}"}, 'lastName': {'default': f"Nom{i}"}} for i in range(20)]
+    plays = []
+    for event_id in range(1, n_actions + 1):
+        period = min(3, 1 + (event_id - 1) * 3 // n_actions)
+        equipe = alea.choice((domicile, exterieur))[0]
+        details = {'eventOwnerTeamId': equipe, 'zoneCode': alea.choice(ZONES)}
+        if alea.random() < 0.9:
+            details.update(xCoord=alea.randint(-99, 99), yCoord=alea.randint(-42, 42))
+        type_action = alea.choice(TYPES_ACTIONS)
+        if type_action in ('shot-on-goal', 'goal', 'missed-shot'):
+            details.update(shotType=alea.choice(['wrist', 'slap', 'snap', 'backhand']),
+                           shootingPlayerId=alea.choice(roster)['playerId'],
+                           goalieInNetId=alea.choice(roster)['playerId'])
+        secondes = ((event_id - 1) * 3 * 1200 // n_actions) % 1200
+        plays.append({
+            'eventId': event_id, 'typeDescKey': type_action, 'periodDescriptor': {'number': period},
+            'timeInPeriod': f"{secondes // 60:02d}:{secondes % 60:02d}",
+            'situationCode': alea.choice(['1551', '1451', '1541', '0651', '1560']),
+            'homeTeamDefendingSide': alea.choice(['left', 'right']), 'details': details,
+        })
+    return {
+        'id': int(game_id), 'season': int(f"{game_id[:4]}{int(game_id[:4]) + 1}"),
+        'homeTeam': {'id': domicile[0], 'name': {'default': domicile[1]}, 'abbrev': domicile[2]},
+        'awayTeam': {'id': exterieur[0], 'name': {'default': exterieur[1]}, 'abbrev': exterieur[2]},
+        'gameDate': '2016-10-12', 'plays': plays, 'rosterSpots': roster,
+    }
+
+
+def ids_matchs(saisons=(2016, 2017), n_reguliers: int = 30, n_playoffs: int = 6) -> list:
+    ids = []
+    for saison in saisons:
+        ids += [f"{saison}02{i:04d}" for i in range(1, n_reguliers + 1)]
+        ids += [f"{saison}0301{i}" + "1" for i in range(1, n_playoffs + 1)]
+    return ids
+
+
+def fabriquer_repertoire(dossier: str, game_ids, format_stockage: str = 'json') -> dict:
+    """
+    Écrit un fichier par match synthétique dans dossier.
+    :return: Dictionnaire {game_id: données du match}
+    """
+    matchs = {}
+    for graine, game_id in enumerate(game_ids):
+        matchs[game_id] = fabriquer_match(game_id, graine)
+        enregistrer_match(dossier, game_id, matchs[game_id], format_stockage=format_stockage)
+    return matchs
@@ -0,0 +1,50 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ServeurStub:
+    """
+    Serveur HTTP local qui rejoue des réponses programmées par chemin et note l'heure de chaque requête.
+    reponses: {chemin: [(code, en-têtes, corps JSON), ...]}; la dernière réponse d'une liste est répétée,
+    un chemin inconnu répond 404.
+    """
+
+    def __init__(self, reponses: dict):
+        self.reponses = {chemin: list(liste) for chemin, liste in reponses.items()}
+        self.requetes = []
+        self._verrou = threading.Lock()
+        stub = self
+
+        class Gestionnaire(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._verrou:
+                    stub.requetes.append((self.path, time.monotonic()))
+                    liste = stub.reponses.get(self.path)
+                    code, entetes, corps = (liste.pop(0) if len(liste) > 1 else liste[0]) if liste else (404, {}, None)
+                contenu = json.dumps(corps).encode('utf-8') if corps is not None else b''
+                self.send_response(code)
+                for nom, valeur in entetes.items():
+                    self.send_header(nom, valeur)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(contenu)))
+                self.end_headers()
+                self.wfile.write(contenu)
+
+            def log_message(self, *args):
+                pass
+
+        self.serveur = ThreadingHTTPServer(('127.0.0.1', 0), Gestionnaire)
+        self.url = f"http://127.0.0.1:{self.serveur.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+
+    def heures(self, chemin: str) -> list:
+        return [heure for chemin_requete, heure in self.requetes if chemin_requete.startswith(chemin)]
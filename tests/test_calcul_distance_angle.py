@@ -0,0 +1,125 @@
+import os
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import DOSSIER_FIXTURES
+from caracteristiques import calcul_distance_angle, table_cote_defense
+
+
+def calcul_distance_angle_iterrows(df, cotes: pd.Series = None):
+    """
+    Ancienne implémentation ligne par ligne de Q2_ingenieurie_caracteristique.py (référence de validation).
+    La première boucle ne sert qu'à laisser dans `distance` la valeur de sa dernière ligne, que la seconde
+    boucle ne réinitialise jamais: elle est conservée pour reproduire ce comportement.
+    :param cotes: Si donnée, table (gameId, period) -> côté défendu (table_cote_defense) utilisée pour la zone
+                  neutre à la place du côté déduit du premier tir à domicile de la période dans tout le DataFrame
+    """
+    distances = []
+    home_defending_side_period = {1: None, 2: None, 3: None}
+    distance = None
+    for index, row in df.iterrows():
+        distance = None
+
+    angles = []
+    home_defending_side_period = {1: None, 2: None, 3: None}
+    for index, row in df.iterrows():
+        angle = None
+        x = row['coordinateX']
+        y = row['coordinateY']
+        event_team_id = row['eventTeamId']
+        home_team_id = row['teamHomeId']
+        zone_code = row.get('zoneCode', None)
+        period = row.get('period', None)
+        if cotes is not None:
+            home_defending_side_period = {period: cotes.get((row['gameId'], period))}
+
+        if zone_code is not None:
+            if cotes is None and event_team_id == home_team_id and period in home_defending_side_period:
+                if home_defending_side_period[period] is None:
+                    home_defending_side_period[period] = 'right' if x > 0 else 'left'
+
+            if zone_code == "D":
+                if x > 0:
+                    distance = math.sqrt((x + 89)**2 + y**2)
+                    angle = np.arctan2(y, (x + 89))
+                elif x < 0:
+                    distance = math.sqrt((89 - x)**2 + y**2)
+                    angle = np.arctan2(y, (89 - x))
+            elif zone_code == "O":
+                if x > 0:
+                    distance = math.sqrt((89 - x)**2 + y**2)
+                    angle = np.arctan2(y, (89 - x))
+                elif x < 0:
+                    distance = math.sqrt((x + 89)**2 + y**2)
+                    angle = np.arctan2(y, (x + 89))
+            elif zone_code == "N" and period in home_defending_side_period:
+                if event_team_id == home_team_id:
+                    if home_defending_side_period[period] == 'right':
+                        distance = math.sqrt((x + 89)**2 + y**2)
+                        angle = np.arctan2(y, (x + 89))
+                    elif home_defending_side_period[period] == 'left':
+                        distance = math.sqrt((89 - x)**2 + y**2)
+                        angle = np.arctan2(y, (89 - x))
+                else:
+                    if home_defending_side_period[period] == 'right':
+                        distance = math.sqrt((89 - x)**2 + y**2)
+                        angle = np.arctan2(y, (89 - x))
+                    elif home_defending_side_period[period] == 'left':
+                        distance = math.sqrt((x + 89)**2 + y**2)
+                        angle = np.arctan2(y, (x + 89))
+
+        if angle is not None:
+            angle = round(np.rad2deg(angle), 4)
+        distances.append(distance)
+        angles.append(angle)
+
+    df['distance'] = distances
+    df['distance_round'] = df['distance'].round(0)
+    df['angle'] = angles
+    return df
+
+
+def charger_fixture(zone: str) -> pd.DataFrame:
+    # 400 tirs sur 8 matchs: zones O/D/N manquantes, prolongations, x nul et coordonnées manquantes
+    df = pd.read_csv(os.path.join(DOSSIER_FIXTURES, 'tirs_zones.csv'))
+    if zone == 'none':
+        df['zoneCode'] = df['zoneCode'].astype(object).where(df['zoneCode'].notna(), None)
+    elif zone == 'category':
+        df['zoneCode'] = df['zoneCode'].astype('category')
+    return df
+
+
+def comparer(ancien: pd.DataFrame, nouveau: pd.DataFrame, lignes: np.ndarray):
+    angle_ancien = pd.to_numeric(ancien['angle'], errors='coerce').to_numpy(dtype=np.float64)[lignes]
+    np.testing.assert_array_equal(nouveau['angle'].to_numpy()[lignes], angle_ancien)
+    assert np.isfinite(angle_ancien).sum() > 0.75 * lignes.sum()
+
+    # Sans angle, l'ancienne boucle gardait la distance de la ligne précédente; ces lignes sont ensuite
+    # retirées par dropna(subset=['angle']) et valent maintenant NaN
+    avec_angle = ~np.isnan(angle_ancien)
+    for colonne in ('distance', 'distance_round'):
+        valeurs_anciennes = pd.to_numeric(ancien[colonne], errors='coerce').to_numpy(dtype=np.float64)[lignes]
+        valeurs = nouveau[colonne].to_numpy()[lignes]
+        np.testing.assert_array_equal(valeurs[avec_angle], valeurs_anciennes[avec_angle])
+        assert np.isnan(valeurs[~avec_angle]).all()
+
+
+@pytest.mark.parametrize('zone', ['nan', 'none', 'category'])
+def test_zones_offensive_defensive_identiques_a_iterrows(zone):
+    # En zone O ou D (et sans zone), le filet visé ne dépend que de x: résultat identique à l'ancienne fonction
+    ancien = calcul_distance_angle_iterrows(charger_fixture(zone))
+    nouveau = calcul_distance_angle(charger_fixture(zone))
+    comparer(ancien, nouveau, (charger_fixture(zone)['zoneCode'] != 'N').to_numpy(dtype=bool))
+
+
+@pytest.mark.parametrize('zone', ['nan', 'none', 'category'])
+def test_zone_neutre_identique_a_iterrows_par_match(zone):
+    # En zone neutre, le côté défendu vient de la table (gameId, period) plutôt que du premier tir à domicile
+    # de la période dans tout le DataFrame; avec la même table, la boucle ligne par ligne donne le même résultat
+    cotes = table_cote_defense(charger_fixture(zone))
+    ancien = calcul_distance_angle_iterrows(charger_fixture(zone), cotes)
+    nouveau = calcul_distance_angle(charger_fixture(zone))
+    comparer(ancien, nouveau, np.ones(len(nouveau), dtype=bool))
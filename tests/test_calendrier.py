@@ -0,0 +1,63 @@
+import os
+import json
+import time
+from datetime import date
+
+from conftest import DOSSIER_FIXTURES
+from serveur_stub import ServeurStub
+from calendrier import CalendrierNHL, extraire_ids_calendrier, saison_en_cours, code_saison
+
+# Réponse enregistrée du calendrier 2016-2017 (extrait): présaison (1), saison régulière (2), playoffs (3),
+# match des étoiles (4), et un match en double
+with open(os.path.join(DOSSIER_FIXTURES, 'calendrier_20162017.json'), 'r', encoding='utf-8') as f:
+    CALENDRIER_2016 = json.load(f)
+
+IDS_2016 = {
+    '02': ['2016020001', '2016020002', '2016020003', '2016020004', '2016021230'],
+    '03': ['2016030111', '2016030112', '2016030417'],
+}
+
+
+def chemin_calendrier(year) -> str:
+    return f"/stats/rest/en/game?cayenneExp=season%3D{code_saison(year)}"
+
+
+def test_extraire_ids_calendrier():
+    assert extraire_ids_calendrier(CALENDRIER_2016) == IDS_2016
+    assert extraire_ids_calendrier(CALENDRIER_2016, ('03',)) == {'03': IDS_2016['03']}
+
+
+def test_saison_en_cours():
+    assert saison_en_cours(date(2024, 8, 31)) == 2023
+    assert saison_en_cours(date(2024, 9, 1)) == 2024
+
+
+def test_cache_saison_terminee(tmp_path):
+    with ServeurStub({chemin_calendrier(2016): [(200, {}, CALENDRIER_2016)]}) as stub:
+        calendrier = CalendrierNHL(str(tmp_path), url=stub.url + '/stats/rest/en/game')
+        assert calendrier.ids_saison(2016) == IDS_2016
+        # Même ancien, le cache d'une saison terminée reste valide
+        ancien = time.time() - 365 * 24 * 3600
+        os.utime(calendrier.chemin_cache(2016), (ancien, ancien))
+        assert calendrier.ids_saison(2016) == IDS_2016
+        assert calendrier.ids_matchs(2016, 2016, '03') == IDS_2016['03']
+        assert len(stub.requetes) == 1
+
+    assert sorted(os.listdir(tmp_path)) == ['calendrier_20162017.json']
+
+
+def test_ttl_saison_en_cours(tmp_path):
+    year = saison_en_cours()
+    partiel = {'data': [match for match in CALENDRIER_2016['data'] if match['gameType'] == 2]}
+    reponses = {chemin_calendrier(year): [(200, {}, partiel), (200, {}, CALENDRIER_2016)]}
+    with ServeurStub(reponses) as stub:
+        calendrier = CalendrierNHL(str(tmp_path), url=stub.url + '/stats/rest/en/game', ttl_saison_en_cours=3600)
+        assert calendrier.ids_saison(year)['03'] == []
+        assert calendrier.ids_saison(year)['03'] == []
+        assert len(stub.requetes) == 1
+
+        # Cache plus vieux que le TTL: le calendrier de la saison en cours est téléchargé de nouveau
+        ancien = time.time() - 2 * 3600
+        os.utime(calendrier.chemin_cache(year), (ancien, ancien))
+        assert calendrier.ids_saison(year) == IDS_2016
+        assert len(stub.requetes) == 2
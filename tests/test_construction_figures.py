@@ -0,0 +1,35 @@
+import sys
+import importlib
+import textwrap
+
+import matplotlib
+
+from construction_figures import TacheFigure, construire_figures
+
+matplotlib.use('Agg')
+
+
+def test_figure_redessinee_quand_le_code_appele_change(tmp_path, monkeypatch):
+    # Une fonction de figure mince qui délègue le dessin à un autre module, comme figure_ROC et plot_metrics
+    (tmp_path / 'dessins.py').write_text("def dessiner(ax, valeurs):\n    ax.plot(valeurs)\n")
+    (tmp_path / 'figures_test.py').write_text(textwrap.dedent("""
+        from dessins import dessiner
+
+        def figure_valeurs(ax, valeurs):
+            dessiner(ax, valeurs)
+    """))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    for nom in ('dessins', 'figures_test'):
+        sys.modules.pop(nom, None)
+    figures_test = importlib.import_module('figures_test')
+    try:
+        tache = TacheFigure('valeurs.png', figures_test.figure_valeurs, parametres={'valeurs': [1, 3, 2]})
+        dossier = str(tmp_path / 'figures')
+        assert construire_figures([tache], dossier, n_workers=1) == {'valeurs.png': 'rendue'}
+        assert construire_figures([tache], dossier, n_workers=1) == {'valeurs.png': 'inchangée'}
+
+        (tmp_path / 'dessins.py').write_text("def dessiner(ax, valeurs):\n    ax.bar(range(len(valeurs)), valeurs)\n")
+        assert construire_figures([tache], dossier, n_workers=1) == {'valeurs.png': 'rendue'}
+    finally:
+        for nom in ('dessins', 'figures_test'):
+            sys.modules.pop(nom, None)
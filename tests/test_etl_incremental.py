@@ -0,0 +1,110 @@
+import os
+
+import pandas as pd
+
+from fabrique_matchs import fabriquer_match, fabriquer_repertoire, ids_matchs
+from stockage_matchs import enregistrer_match
+from stockage_parquet import charger_dataset, ecrire_dataset
+from etl_incremental import ETLIncremental
+
+
+def dataset_trie(racine: str) -> pd.DataFrame:
+    df = charger_dataset(racine).drop(columns=['gameType'])
+    return df.sort_values(['gameId', 'event_id']).reset_index(drop=True)
+
+
+def attendu(etl: ETLIncremental, colonnes) -> pd.DataFrame:
+    df = etl.charger().sort_values(['gameId', 'event_id']).reset_index(drop=True)
+    return df[colonnes].astype({colonne: str for colonne in df.columns if df[colonne].dtype == 'category'})
+
+
+def verifier(etl: ETLIncremental, racine: str):
+    df = dataset_trie(racine)
+    df = df.astype({colonne: str for colonne in df.columns if df[colonne].dtype == 'category'})
+    pd.testing.assert_frame_equal(df, attendu(etl, df.columns), check_dtype=False)
+
+
+def fragments(racine: str) -> dict:
+    return {os.path.relpath(os.path.join(dossier, nom), racine): os.stat(os.path.join(dossier, nom)).st_mtime_ns
+            for dossier, _, noms in os.walk(racine) for nom in noms}
+
+
+def test_mise_a_jour_incrementale(tmp_path):
+    matchs_dir, sortie, racine = str(tmp_path / 'matchs'), str(tmp_path / 'etl'), str(tmp_path / 'parquet')
+    os.makedirs(matchs_dir)
+    fabriquer_repertoire(matchs_dir, ids_matchs(n_reguliers=8, n_playoffs=2))
+
+    etl = ETLIncremental(sortie)
+    assert etl.executer(matchs_dir)['extraits'] == 20
+    assert etl.mettre_a_jour_dataset(racine) == 20
+    verifier(etl, racine)
+    avant = fragments(racine)
+
+    # Un nouveau match des playoffs 2017: seul son fichier est écrit, les autres matchs ne sont pas relus
+    enregistrer_match(matchs_dir, '2017030131', fabriquer_match('2017030131', 999))
+    etl = ETLIncremental(sortie)
+    assert etl.executer(matchs_dir) == {'extraits': 1, 'inchanges': 20, 'supprimes': 0, 'echecs': 0}
+    assert etl.mettre_a_jour_dataset(racine) == 1
+    verifier(etl, racine)
+    apres = fragments(racine)
+    modifies = {chemin for chemin in apres if avant.get(chemin) != apres[chemin]}
+    assert modifies == {os.path.join('season=20172018', 'gameType=03', '2017030131.parquet')}
+
+    # Un match modifié qui ne peut plus être extrait: ses anciennes lignes disparaissent des deux sorties
+    with open(os.path.join(matchs_dir, '2016020001.json'), 'wb') as f:
+        f.write(b'{"id": 2016020001, "plays": [')
+    # Tous les matchs des playoffs 2016 supprimés: le fragment correspondant est retiré
+    for game_id in ids_matchs(saisons=(2016,), n_reguliers=0, n_playoffs=2):
+        os.remove(os.path.join(matchs_dir, f"{game_id}.json"))
+    etl = ETLIncremental(sortie)
+    assert etl.executer(matchs_dir) == {'extraits': 0, 'inchanges': 18, 'supprimes': 2, 'echecs': 1}
+    assert etl.mettre_a_jour_dataset(racine) == 3
+    verifier(etl, racine)
+    ids = set(dataset_trie(racine)['gameId'])
+    assert 2016020001 not in ids and 2016030111 not in ids
+    assert not os.path.exists(os.path.join(racine, 'season=20162017', 'gameType=03'))
+
+    # Le match en erreur est de nouveau tenté à chaque exécution, et reste absent des sorties
+    etl = ETLIncremental(sortie)
+    assert etl.executer(matchs_dir)['echecs'] == 1
+    assert etl.mettre_a_jour_dataset(racine) == 1
+
+
+def test_attente_conservee_apres_un_arret(tmp_path):
+    matchs_dir, sortie, racine = str(tmp_path / 'matchs'), str(tmp_path / 'etl'), str(tmp_path / 'parquet')
+    os.makedirs(matchs_dir)
+    fabriquer_repertoire(matchs_dir, ids_matchs(n_reguliers=3, n_playoffs=1))
+    etl = ETLIncremental(sortie)
+    etl.executer(matchs_dir)
+    etl.mettre_a_jour_dataset(racine)
+
+    # Arrêt entre l'extraction et la mise à jour du Parquet: l'exécution suivante n'a rien à extraire, mais les
+    # matchs en attente sont relus du fichier d'état et le Parquet est tout de même mis à jour
+    enregistrer_match(matchs_dir, '2017030131', fabriquer_match('2017030131', 999))
+    assert ETLIncremental(sortie).executer(matchs_dir)['extraits'] == 1
+    etl = ETLIncremental(sortie)
+    assert etl.executer(matchs_dir)['extraits'] == 0
+    assert etl.parquet_en_attente == {'2017030131'}
+    assert etl.mettre_a_jour_dataset(racine) == 1
+    verifier(etl, racine)
+    assert ETLIncremental(sortie).mettre_a_jour_dataset(racine) == 0
+
+
+def test_conversion_d_un_dataset_ecrit_d_un_bloc(tmp_path):
+    matchs_dir, sortie, racine = str(tmp_path / 'matchs'), str(tmp_path / 'etl'), str(tmp_path / 'parquet')
+    os.makedirs(matchs_dir)
+    fabriquer_repertoire(matchs_dir, ids_matchs(n_reguliers=3, n_playoffs=1))
+    etl = ETLIncremental(sortie)
+    etl.executer(matchs_dir)
+    # Jeu écrit en entier (part-0.parquet par partition), comme le fait le notebook de nettoyage
+    ecrire_dataset(etl.charger(), racine)
+    etl.parquet_en_attente.clear()
+
+    enregistrer_match(matchs_dir, '2017030131', fabriquer_match('2017030131', 999))
+    etl.executer(matchs_dir)
+    etl.mettre_a_jour_dataset(racine)
+    # La partition touchée passe à un fichier par match, sans doublon; les autres gardent leur part-0.parquet
+    verifier(etl, racine)
+    noms = set(fragments(racine))
+    assert os.path.join('season=20172018', 'gameType=03', 'part-0.parquet') not in noms
+    assert os.path.join('season=20162017', 'gameType=02', 'part-0.parquet') in noms
@@ -0,0 +1,37 @@
+import os
+
+import pandas as pd
+import pytest
+
+from fabrique_matchs import fabriquer_repertoire, ids_matchs
+from stockage_matchs import convertir_repertoire, lire_fichier_match, lister_fichiers_matchs
+from decodage_json import CLES_EXTRACTION
+from extraction_evenements import COLONNES_ACTIONS, SCHEMA_ACTIONS, iterer_actions, extraire_actions
+
+
+def extraire_actions_lignes(folder_path) -> pd.DataFrame:
+    """Ancienne implémentation: liste Python de lignes, convertie en fin d'extraction."""
+    lignes = []
+    for file_path in lister_fichiers_matchs(folder_path).values():
+        lignes.extend(list(iterer_actions(lire_fichier_match(file_path, CLES_EXTRACTION))))
+    return pd.DataFrame(lignes, columns=COLONNES_ACTIONS).astype(SCHEMA_ACTIONS)
+
+
+@pytest.fixture(scope='module')
+def repertoire(tmp_path_factory):
+    racine = tmp_path_factory.mktemp('actions')
+    fichiers, archives = str(racine / 'fichiers'), str(racine / 'archives')
+    os.makedirs(fichiers)
+    fabriquer_repertoire(fichiers, ids_matchs(n_reguliers=12, n_playoffs=3))
+    convertir_repertoire(fichiers, archives, par_saison=True)
+    return fichiers, archives
+
+
+@pytest.mark.parametrize('archives', [False, True], ids=['fichiers', 'archives'])
+@pytest.mark.parametrize('n_workers', [1, 3])
+def test_identique_aux_lignes(repertoire, archives, n_workers):
+    dossier = repertoire[archives]
+    attendu = extraire_actions_lignes(dossier)
+    df = extraire_actions(dossier, n_workers=n_workers, taille_lot=4)
+    assert len(df) == 30 * 60
+    pd.testing.assert_frame_equal(df, attendu)
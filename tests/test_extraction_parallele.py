@@ -0,0 +1,43 @@
+import os
+
+import pandas as pd
+import pytest
+
+from fabrique_matchs import fabriquer_repertoire, ids_matchs
+from stockage_matchs import convertir_repertoire
+from extraction_evenements import extraire_repertoire
+
+
+@pytest.fixture(scope='module')
+def repertoires(tmp_path_factory):
+    """Les mêmes matchs en fichiers JSON individuels et en archives par saison et type de match."""
+    racine = tmp_path_factory.mktemp('matchs')
+    fichiers, archives = str(racine / 'fichiers'), str(racine / 'archives')
+    os.makedirs(fichiers)
+    fabriquer_repertoire(fichiers, ids_matchs())
+    convertir_repertoire(fichiers, archives, par_saison=True)
+    return fichiers, archives
+
+
+@pytest.mark.parametrize('format_repertoire', [0, 1], ids=['fichiers', 'archives'])
+@pytest.mark.parametrize('n_workers', [2, 4])
+def test_parallele_identique_a_serie(repertoires, format_repertoire, n_workers):
+    dossier = repertoires[format_repertoire]
+    noms_serie, types_serie, df_serie = extraire_repertoire(dossier, n_workers=1)
+    noms, types, df = extraire_repertoire(dossier, n_workers=n_workers, taille_lot=5)
+
+    assert len(df_serie) > 0
+    assert noms == noms_serie and types == types_serie
+    pd.testing.assert_frame_equal(df, df_serie)
+
+
+def test_fichiers_en_erreur(repertoires, tmp_path):
+    fichiers, _ = repertoires
+    for nom in sorted(os.listdir(fichiers))[:3]:
+        os.link(os.path.join(fichiers, nom), tmp_path / nom)
+    (tmp_path / '2016020999.json').write_bytes(b'{"id": 2016020999, "plays": [')
+
+    with pytest.raises(RuntimeError, match='2016020999'):
+        extraire_repertoire(str(tmp_path), n_workers=2, taille_lot=1)
+    _, _, df = extraire_repertoire(str(tmp_path), n_workers=2, taille_lot=1, ignorer_echecs=True)
+    assert df['gameId'].nunique() == 3
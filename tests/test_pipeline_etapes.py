@@ -0,0 +1,68 @@
+import sys
+import importlib
+import textwrap
+
+import pytest
+
+from pipeline_etapes import Pipeline
+
+
+@pytest.fixture
+def modules_etapes(tmp_path, monkeypatch):
+    """Un module d'étapes minces qui appellent le code d'un autre module, lui-même dépendant d'un troisième."""
+    (tmp_path / 'aide_bas.py').write_text("def facteur():\n    return 2\n")
+    (tmp_path / 'aide.py').write_text(textwrap.dedent("""
+        from aide_bas import facteur
+
+        def doubler(valeurs):
+            return [v * facteur() for v in valeurs]
+    """))
+    (tmp_path / 'etapes.py').write_text(textwrap.dedent("""
+        from aide import doubler
+
+        def _identite(valeurs):
+            return list(valeurs)
+
+        def etape_source(n):
+            return list(range(n))
+
+        def etape_double(valeurs):
+            return doubler(_identite(valeurs))
+
+        def etape_somme(valeurs):
+            return sum(valeurs)
+    """))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    for nom in ('aide_bas', 'aide', 'etapes'):
+        sys.modules.pop(nom, None)
+    yield tmp_path, importlib.import_module('etapes')
+    for nom in ('aide_bas', 'aide', 'etapes'):
+        sys.modules.pop(nom, None)
+
+
+def construire(etapes, cache_dir) -> Pipeline:
+    pipeline = Pipeline(str(cache_dir))
+    pipeline.ajouter('source', etapes.etape_source, parametres={'n': 4})
+    pipeline.ajouter('double', etapes.etape_double, ['source'])
+    pipeline.ajouter('somme', etapes.etape_somme, ['double'])
+    return pipeline
+
+
+def test_modification_du_code_appele(modules_etapes, tmp_path):
+    dossier, etapes = modules_etapes
+    pipeline = construire(etapes, tmp_path / 'cache')
+    assert pipeline.executer('somme') == 12
+    cles = pipeline.cles()
+
+    # Le module appelé indirectement (aide -> aide_bas) change: 'double' et 'somme' sont invalidées, pas 'source'
+    (dossier / 'aide_bas.py').write_text("def facteur():\n    return 3\n")
+    nouvelles = pipeline.cles()
+    assert nouvelles['source'] == cles['source']
+    assert nouvelles['double'] != cles['double'] and nouvelles['somme'] != cles['somme']
+
+    # Une fonction auxiliaire du module des étapes fait aussi partie de la clé de l'étape qui l'appelle
+    (dossier / 'etapes.py').write_text((dossier / 'etapes.py').read_text().replace(
+        'return list(valeurs)', 'return list(valeurs)  # modifiée'))
+    importlib.reload(etapes)
+    apres = construire(etapes, tmp_path / 'cache').cles()
+    assert apres['source'] == nouvelles['source'] and apres['double'] != nouvelles['double']
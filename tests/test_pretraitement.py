@@ -0,0 +1,40 @@
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from pretraitement import PretraitementTirs, ModeleXG
+from save_models import sauvegarder_modele
+
+
+def tirs(n: int, graine: int) -> pd.DataFrame:
+    generateur = np.random.default_rng(graine)
+    return pd.DataFrame({
+        'distance': generateur.uniform(0, 90, n),
+        'angle': generateur.uniform(-90, 90, n),
+        'speed': generateur.uniform(0, 40, n),
+        'chang_angle': generateur.uniform(0, 180, n),
+        'shotType': generateur.choice(['wrist', 'slap', 'snap', 'backhand'], n),
+        'lastEvent': generateur.choice(['faceoff', 'hit', 'shot-on-goal'], n),
+        'period': generateur.integers(1, 4, n),
+        'non_gardiens_amicaux': generateur.integers(3, 6, n),
+        'non_gardiens_adverses': generateur.integers(3, 6, n),
+        'isGoal': generateur.integers(0, 2, n),
+    })
+
+
+def test_modele_sauvegarde_avec_son_pretraitement(tmp_path):
+    # Comme train_models.py: entraînement sur la sortie de transformer_dataframe, puis un seul fichier sauvegardé
+    entrainement = tirs(400, 0)
+    pretraitement = PretraitementTirs().ajuster(entrainement)
+    X = pretraitement.transformer_dataframe(entrainement).drop(columns=['isGoal'])
+    modele = LogisticRegression().fit(X, entrainement['isGoal'])
+    chemin = str(tmp_path / 'modele.pkl')
+    sauvegarder_modele(modele, pretraitement, chemin, colonnes=list(X.columns))
+
+    charge = joblib.load(chemin)
+    assert isinstance(charge, ModeleXG)
+    # Tirs bruts, sans la cible, colonnes dans un autre ordre et une seule catégorie de shotType
+    nouveaux = tirs(20, 1).drop(columns=['isGoal']).iloc[:, ::-1].assign(shotType='slap')
+    attendu = modele.predict_proba(pretraitement.transformer_dataframe(nouveaux)[list(X.columns)])
+    np.testing.assert_allclose(charge.predict_proba(nouveaux), attendu)
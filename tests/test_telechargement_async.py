@@ -0,0 +1,108 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from serveur_stub import ServeurStub
+from session_http import PolitiqueRelance, RETRY, ABSENT, MISS, ERREUR
+from stockage_matchs import match_existe, charger_match
+from telechargement_async import AsyncNHLDataDownloader
+
+
+def chemin_match(game_id) -> str:
+    return f"/gamecenter/{game_id}/play-by-play"
+
+
+def match(game_id) -> dict:
+    return {'id': int(game_id), 'plays': []}
+
+
+def test_429_retry_after_puis_succes(tmp_path):
+    game_id = '2016020001'
+    reponses = {chemin_match(game_id): [(429, {'Retry-After': '0.3'}, None), (200, {}, match(game_id))]}
+    # delai_base nul: seule l'en-tête Retry-After peut expliquer l'attente entre les deux requêtes
+    politique = PolitiqueRelance(max_tentatives=3, delai_base=0)
+    with ServeurStub(reponses) as stub:
+        downloader = AsyncNHLDataDownloader(str(tmp_path), base_url=stub.url, requetes_par_seconde=100,
+                                            politique=politique)
+        resultats = downloader.download_games([game_id])
+        heures = stub.heures(chemin_match(game_id))
+
+    assert resultats == {game_id: match(game_id)}
+    assert len(heures) == 2 and heures[1] - heures[0] >= 0.3
+    assert charger_match(str(tmp_path), game_id) == match(game_id)
+    assert downloader.journal.compteurs == {RETRY: 1, MISS: 1}
+
+
+def test_404_absent_et_non_redemande(tmp_path):
+    game_id = '2016030999'
+    with ServeurStub({}) as stub:
+        downloader = AsyncNHLDataDownloader(str(tmp_path), base_url=stub.url, requetes_par_seconde=100)
+        assert downloader.download_games([game_id]) == {game_id: None}
+        # Une nouvelle instance relit le journal: l'ID connu comme absent n'est plus demandé
+        downloader = AsyncNHLDataDownloader(str(tmp_path), base_url=stub.url, requetes_par_seconde=100)
+        assert downloader.download_games([game_id]) == {game_id: None}
+        assert len(stub.requetes) == 1
+
+    assert downloader.journal.est_absent(game_id)
+    assert not match_existe(str(tmp_path), game_id)
+    assert downloader.manifeste.entrees()[game_id][0] == ABSENT
+
+
+def test_debit_limite_et_cache(tmp_path):
+    game_ids = [f"2016020{i:03d}" for i in range(1, 31)]
+    reponses = {chemin_match(game_id): [(200, {}, match(game_id))] for game_id in game_ids}
+    taux, concurrence = 40.0, 4
+    with ServeurStub(reponses) as stub:
+        downloader = AsyncNHLDataDownloader(str(tmp_path), base_url=stub.url, concurrence=concurrence,
+                                            requetes_par_seconde=taux)
+        debut = time.monotonic()
+        resultats = downloader.download_games(game_ids)
+        duree = time.monotonic() - debut
+        heures = sorted(stub.heures('/gamecenter/'))
+
+        assert resultats == {game_id: match(game_id) for game_id in game_ids}
+        # Le seau part plein (`concurrence` jetons), puis un jeton toutes les 1/taux secondes
+        assert duree >= (len(game_ids) - concurrence) / taux
+        assert heures[-1] - heures[concurrence - 1] >= (len(game_ids) - concurrence) / taux * 0.9
+
+        # Deuxième passage: tout vient du cache disque, aucune requête
+        assert downloader.download_games(game_ids) == resultats
+        assert len(stub.requetes) == len(game_ids)
+    assert {f"{game_id}.json" for game_id in game_ids} <= set(os.listdir(tmp_path))
+
+
+def test_echec_apres_relances_puis_reprise(tmp_path):
+    game_id = '2016020002'
+    reponses = {chemin_match(game_id): [(503, {}, None), (503, {}, None), (200, {}, match(game_id))]}
+    politique = PolitiqueRelance(max_tentatives=2, delai_base=0)
+    with ServeurStub(reponses) as stub:
+        downloader = AsyncNHLDataDownloader(str(tmp_path), base_url=stub.url, requetes_par_seconde=100,
+                                            politique=politique)
+        assert downloader.download_games([game_id]) == {game_id: None}
+        # L'échec est noté dans le manifeste avec son code HTTP, même sans fichier sur le disque
+        statut, _, _, _, status_http = downloader.manifeste.entrees()[game_id]
+        assert (statut, status_http) == (ERREUR, 503)
+
+        assert downloader.reprendre() == {game_id: match(game_id)}
+        assert len(stub.requetes) == 3
+    assert charger_match(str(tmp_path), game_id) == match(game_id)
+    assert downloader.manifeste.verifier() == []
+
+
+def test_absent_reverifie_apres_le_delai(tmp_path):
+    game_id = '2016030111'
+    reponses = {chemin_match(game_id): [(404, {}, None), (200, {}, match(game_id))]}
+    with ServeurStub(reponses) as stub:
+        downloader = AsyncNHLDataDownloader(str(tmp_path), base_url=stub.url, requetes_par_seconde=100)
+        assert downloader.download_games([game_id]) == {game_id: None}
+        # Avant le délai, le match absent n'est pas redemandé
+        assert downloader.reprendre() == {}
+        assert len(stub.requetes) == 1
+
+        # Après le délai (données publiées entre-temps), il est redemandé malgré le journal
+        assert downloader.reprendre(delai_absent=0) == {game_id: match(game_id)}
+        assert len(stub.requetes) == 2
+    assert not AsyncNHLDataDownloader(str(tmp_path)).journal.est_absent(game_id)